@@ -2,7 +2,7 @@ from flask import Flask
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 from config import get_config
-from extensions import db, migrate
+from extensions import db, init_sqlite_pragmas, migrate
 
 
 def create_app():
@@ -10,23 +10,43 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(get_config())
 
+    # Stream, hash and size-check uploads while the body is parsed.
+    from services.upload_service import UploadRequest
+
+    app.request_class = UploadRequest
+
     # Initialize extensions
     db.init_app(app)
+    init_sqlite_pragmas(app)
     migrate.init_app(app, db)
 
+    # Request latency, status and per-request query metrics for /metrics
+    from services.metrics_service import init_metrics
+
+    init_metrics(app)
+
     # Proxy fix for production behind reverse proxies
-    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+    app.wsgi_app = ProxyFix(
+        app.wsgi_app, x_for=app.config.get("PROXY_FIX_X_FOR", 0), x_proto=1, x_host=1
+    )
+
+    # Opt-in cProfile / stack-sampling of selected requests (PROFILING_ENABLED)
+    from services.profiling_service import init_profiling
+
+    init_profiling(app)
 
     # Register blueprints
     from blueprints.auth.routes import auth_bp
     from blueprints.profile.routes import profile_bp
     from blueprints.diet.routes import diet_bp
     from blueprints.nutrition.routes import nutrition_bp
+    from blueprints.admin.routes import admin_bp
 
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(profile_bp, url_prefix="/profile")
     app.register_blueprint(diet_bp, url_prefix="/diet")
     app.register_blueprint(nutrition_bp, url_prefix="/nutrition")
+    app.register_blueprint(admin_bp, url_prefix="/admin")
 
     # Landing + health routes
     @app.route("/")
@@ -38,9 +58,50 @@ def create_app():
             return redirect(url_for("profile.profile"))
         return render_template("landing.html")
 
+    def component_stats():
+        from services.circuit_breaker_service import get_breaker_stats
+        from services.gemini_service import get_client_stats
+        from services.image_preprocess_service import get_preprocess_stats
+        from services.lifestyle_cache_service import get_lifestyle_cache_stats
+        from services.meal_cache_service import get_meal_cache_stats
+        from services.plan_cache_service import get_plan_cache_stats
+        from services.profiling_service import get_profiling_stats
+        from services.rate_limit_service import get_rate_limit_stats
+        from services.singleflight_service import get_single_flight_stats
+
+        return {
+            "gemini_clients": get_client_stats(),
+            "gemini_breakers": get_breaker_stats(),
+            "gemini_rate_limit": get_rate_limit_stats(),
+            "meal_cache": get_meal_cache_stats(),
+            "meal_image_preprocess": get_preprocess_stats(),
+            "diet_plan_cache": get_plan_cache_stats(),
+            "lifestyle_cache": get_lifestyle_cache_stats(),
+            "single_flight": get_single_flight_stats(),
+            "profiling": get_profiling_stats(),
+        }
+
     @app.route("/health")
     def health():
-        return {"status": "ok", "app": "SwasthyaSync"}
+        from extensions import get_database_stats
+
+        return {
+            "status": "ok",
+            "app": "SwasthyaSync",
+            **component_stats(),
+            "database": get_database_stats(),
+        }
+
+    @app.route("/metrics")
+    def metrics():
+        """Request, database and Gemini metrics in the Prometheus text format."""
+        from flask import Response, abort
+
+        from services.metrics_service import CONTENT_TYPE, metrics_access_allowed, render_metrics
+
+        if not metrics_access_allowed(app.config):
+            abort(403)
+        return Response(render_metrics(component_stats), content_type=CONTENT_TYPE)
 
     return app
 
@@ -0,0 +1,187 @@
+"""
+Check and time the vectorized meal-timing and sleep rules against the scalar ones.
+
+Seeds random lifestyles (some times left unset) and meal logs, runs
+``analyze_meal_timing`` / ``calculate_sleep_analysis`` one event at a time
+and the batch equivalents once, and fails if any result differs.
+
+Usage (from the repository root):
+
+    python benchmarks/batch_analysis.py --users 2000 --logs-per-user 50
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, time as dt_time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LABELS = ["breakfast", "lunch", "Lunch", "snack", "dinner", "DINNER", None]
+
+
+def _random_time(rng, missing=0.1):
+    if rng.random() < missing:
+        return None
+    return dt_time(rng.randrange(24), rng.randrange(60))
+
+
+def _seed(db, NutritionLog, UserLifestyle, users, logs_per_user, rng):
+    now = datetime.utcnow()
+    start = datetime.now().replace(microsecond=0) - timedelta(days=60)
+    lifestyles, logs = [], []
+    for user_id in range(1, users + 1):
+        if rng.random() < 0.9:
+            lifestyles.append(
+                {
+                    "user_id": user_id,
+                    **{
+                        field: _random_time(rng)
+                        for field in (
+                            "wake_time",
+                            "breakfast_time",
+                            "lunch_time",
+                            "snack_time",
+                            "dinner_time",
+                            "sleep_time",
+                        )
+                    },
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+        for _ in range(logs_per_user):
+            logs.append(
+                {
+                    "user_id": user_id,
+                    "meal_label": rng.choice(LABELS),
+                    "logged_at": start + timedelta(seconds=rng.randrange(60 * 86400)),
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+    with db.engine.begin() as conn:
+        if lifestyles:
+            conn.execute(UserLifestyle.__table__.insert(), lifestyles)
+        conn.execute(NutritionLog.__table__.insert(), logs)
+
+
+def _scalar(db, NutritionLog, UserLifestyle, analyze_meal_timing, calculate_sleep_analysis):
+    lifestyles = {row.user_id: row for row in UserLifestyle.query.all()}
+    sleep = {}
+    for user_id, lifestyle in lifestyles.items():
+        sleep[user_id] = calculate_sleep_analysis(
+            lifestyle.wake_time.strftime("%H:%M") if lifestyle.wake_time else None,
+            lifestyle.sleep_time.strftime("%H:%M") if lifestyle.sleep_time else None,
+        )
+
+    feedback = {}
+    last_by_user = {}
+    rows = db.session.execute(
+        db.select(
+            NutritionLog.id, NutritionLog.user_id, NutritionLog.logged_at, NutritionLog.meal_label
+        ).order_by(NutritionLog.user_id, NutritionLog.logged_at, NutritionLog.id)
+    )
+    for log_id, user_id, logged_at, meal_label in rows:
+        feedback[log_id] = analyze_meal_timing(
+            now=logged_at,
+            lifestyle=lifestyles.get(user_id),
+            last_meal_time=last_by_user.get(user_id),
+            meal_label=meal_label,
+        )
+        last_by_user[user_id] = logged_at
+    return sleep, feedback
+
+
+def _compare(scalar_sleep, scalar_feedback, batch_sleep, batch_feedback):
+    mismatches = 0
+    for index, user_id in enumerate(batch_sleep["user_id"].tolist()):
+        expected = scalar_sleep[user_id]
+        hours = batch_sleep["sleep_hours"][index]
+        actual_hours = None if math.isnan(hours) else float(hours)
+        if (actual_hours, batch_sleep["sleep_status"][index]) != (
+            expected["sleep_hours"],
+            expected["sleep_status"],
+        ):
+            mismatches += 1
+    if len(batch_sleep["user_id"]) != len(scalar_sleep):
+        mismatches += 1
+
+    mismatches += _compare_feedback(scalar_feedback, batch_feedback)
+    if len(batch_feedback["log_id"]) != len(scalar_feedback):
+        mismatches += 1
+    return mismatches
+
+
+def _compare_feedback(scalar_feedback, batch_feedback):
+    mismatches = 0
+    for index, log_id in enumerate(batch_feedback["log_id"].tolist()):
+        actual = {
+            "message": batch_feedback["message"][index],
+            "tags": batch_feedback["tags"][index],
+        }
+        if actual != scalar_feedback[log_id]:
+            mismatches += 1
+    return mismatches
+
+
+def run(users, logs_per_user, seed):
+    from app import create_app
+    from extensions import db
+    from models.lifestyle_model import UserLifestyle
+    from models.nutrition_model import NutritionLog
+    from services.batch_analysis_service import batch_meal_timing, batch_sleep_analysis
+    from services.sleep_service import calculate_sleep_analysis
+    from services.timing_analysis_service import analyze_meal_timing
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        _seed(db, NutritionLog, UserLifestyle, users, logs_per_user, random.Random(seed))
+
+        started = time.perf_counter()
+        scalar_sleep, scalar_feedback = _scalar(
+            db, NutritionLog, UserLifestyle, analyze_meal_timing, calculate_sleep_analysis
+        )
+        scalar_seconds = time.perf_counter() - started
+        db.session.expunge_all()
+
+        started = time.perf_counter()
+        batch_sleep = batch_sleep_analysis()
+        batch_feedback = batch_meal_timing()
+        batch_seconds = time.perf_counter() - started
+
+        mismatches = _compare(scalar_sleep, scalar_feedback, batch_sleep, batch_feedback)
+        # A window must still see each user's previous log from before it.
+        window = batch_meal_timing(
+            start=datetime.now() - timedelta(days=30), user_ids=range(1, users + 1, 2)
+        )
+        mismatches += _compare_feedback(scalar_feedback, window)
+
+    print(
+        f"{users:>6,} users  {users * logs_per_user:>9,} logs  "
+        f"scalar {scalar_seconds * 1000:8.1f} ms  batch {batch_seconds * 1000:8.1f} ms  "
+        f"mismatches {mismatches}"
+    )
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--logs-per-user", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    # Config is read at import time, so point it at a scratch database first.
+    tmpdir = tempfile.mkdtemp(prefix="swasthyasync-bench-")
+    os.environ["SWASTHYASYNC_DATABASE_URI"] = f"sqlite:///{tmpdir}/bench.db"
+    if run(args.users, args.logs_per_user, args.seed):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
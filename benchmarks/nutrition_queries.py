@@ -0,0 +1,165 @@
+"""
+Benchmark the tracker's per-day nutrition queries at increasing history sizes.
+
+Compares the previous implementation (ORM scan of the day's logs summed in
+Python, single-column ``user_id`` index) against the current one (SQL SUM /
+column-only range query on the ``(user_id, logged_at)`` index).
+
+Usage (from the repository root):
+
+    python benchmarks/nutrition_queries.py --rows 10000 100000 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MEALS_PER_DAY = 4
+
+
+def _legacy_aggregate(NutritionLog, user_id, day):
+    start = datetime(day.year, day.month, day.day)
+    end = start.replace(hour=23, minute=59, second=59)
+    logs = (
+        NutritionLog.query.filter(
+            NutritionLog.user_id == user_id,
+            NutritionLog.logged_at >= start,
+            NutritionLog.logged_at <= end,
+        )
+        .order_by(NutritionLog.logged_at.asc())
+        .all()
+    )
+    totals = dict.fromkeys(["calories", "protein", "carbs", "fats", "sugar", "fiber"], 0.0)
+    for log in logs:
+        for key in totals:
+            value = getattr(log, key)
+            if value is not None:
+                totals[key] += float(value)
+    return totals, logs
+
+
+def _seed(db, NutritionLog, user_id, rows):
+    table = NutritionLog.__table__
+    now = datetime.now().replace(hour=7, minute=0, second=0, microsecond=0)
+    batch = []
+    with db.engine.begin() as conn:
+        for i in range(rows):
+            logged_at = now - timedelta(days=i // MEALS_PER_DAY, hours=4 * (i % MEALS_PER_DAY))
+            batch.append(
+                {
+                    "user_id": user_id,
+                    "meal_label": "lunch",
+                    "logged_at": logged_at,
+                    "calories": 450.0,
+                    "protein": 20.0,
+                    "carbs": 50.0,
+                    "fats": 12.0,
+                    "sugar": 6.0,
+                    "fiber": 5.0,
+                    "ai_food_summary": "Benchmark meal " * 20,
+                    "ai_guidance": "Benchmark guidance " * 20,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+            if len(batch) == 10_000:
+                conn.execute(table.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(table.insert(), batch)
+
+
+def _time(fn, repeats, reset):
+    samples = []
+    for _ in range(repeats):
+        # Both sides start from an empty identity map; the reset is untimed.
+        reset()
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def _use_indexes(db, legacy):
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX IF EXISTS ix_nutrition_logs_user_id")
+        conn.exec_driver_sql("DROP INDEX IF EXISTS ix_nutrition_logs_user_id_logged_at")
+        if legacy:
+            conn.exec_driver_sql(
+                "CREATE INDEX ix_nutrition_logs_user_id ON nutrition_logs (user_id)"
+            )
+        else:
+            conn.exec_driver_sql(
+                "CREATE INDEX ix_nutrition_logs_user_id_logged_at "
+                "ON nutrition_logs (user_id, logged_at)"
+            )
+        conn.exec_driver_sql("ANALYZE")
+
+
+def run(rows, repeats):
+    from app import create_app
+    from extensions import db
+    from models.nutrition_model import NutritionLog
+    from models.user_model import User
+    from services.nutrition_service import aggregate_daily_nutrition, get_daily_meal_logs
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(email="bench@example.com", full_name="Bench")
+        user.set_password("bench")
+        other = User(email="other@example.com", full_name="Other")
+        other.set_password("bench")
+        db.session.add_all([user, other])
+        db.session.commit()
+
+        started = time.perf_counter()
+        _seed(db, NutritionLog, user.id, rows)
+        # Another user's history so the index has to discriminate.
+        _seed(db, NutritionLog, other.id, min(rows, 10_000))
+        seed_seconds = time.perf_counter() - started
+        today = datetime.now()
+        # Loaded before the timed loops expunge the session.
+        user_id = user.id
+
+        _use_indexes(db, legacy=True)
+        legacy_ms = _time(
+            lambda: _legacy_aggregate(NutritionLog, user_id, today),
+            repeats,
+            db.session.expunge_all,
+        )
+
+        _use_indexes(db, legacy=False)
+        current_ms = _time(
+            lambda: (aggregate_daily_nutrition(user, today), get_daily_meal_logs(user, today)),
+            repeats,
+            db.session.expunge_all,
+        )
+
+    print(
+        f"{rows:>9,} rows  seed {seed_seconds:6.1f}s  "
+        f"legacy {legacy_ms:8.2f} ms  current {current_ms:8.2f} ms  "
+        f"speedup {legacy_ms / current_ms if current_ms else float('inf'):6.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    # Config is read at import time, so point it at a scratch database first.
+    tmpdir = tempfile.mkdtemp(prefix="swasthyasync-bench-")
+    os.environ["SWASTHYASYNC_DATABASE_URI"] = f"sqlite:///{tmpdir}/bench.db"
+    for rows in args.rows:
+        run(rows, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Concurrent read/write benchmark for the default and production SQLite profiles.
+
+Writer processes log meals the way the tracker does (insert plus rollup
+update, one commit each) while reader processes run the tracker's per-day
+queries. Each profile gets a fresh database seeded with the same history.
+Reports throughput, read latency and "database is locked" failures.
+
+Usage (from the repository root):
+
+    python benchmarks/sqlite_concurrency.py --writers 4 --readers 8 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PROFILES = {"default": "development", "production": "production"}
+USERS = 20
+
+
+def _seed(history_rows, results):
+    from app import create_app
+    from extensions import db
+    from models.nutrition_model import NutritionLog
+    from models.user_model import User
+    from services.analytics_service import rebuild_nutrition_rollups
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        users = []
+        for index in range(USERS):
+            user = User(email=f"bench{index}@example.com", full_name="Bench")
+            user.set_password("bench")
+            users.append(user)
+        db.session.add_all(users)
+        db.session.commit()
+
+        now = datetime.now()
+        rows = [
+            {
+                "user_id": users[i % USERS].id,
+                "meal_label": "lunch",
+                "logged_at": now - timedelta(minutes=37 * (i // USERS)),
+                "calories": 450.0,
+                "protein": 20.0,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(history_rows)
+        ]
+        db.session.execute(NutritionLog.__table__.insert(), rows)
+        db.session.commit()
+        rebuild_nutrition_rollups()
+        results.put(db.session.execute(db.text("PRAGMA journal_mode")).scalar())
+
+
+def _worker(role, worker_id, seconds, results):
+    from sqlalchemy.exc import OperationalError
+
+    from app import create_app
+    from extensions import db
+    from models.nutrition_model import NutritionLog
+    from models.user_model import User
+    from services.analytics_service import record_log_in_rollups
+    from services.nutrition_service import aggregate_daily_nutrition, get_daily_meal_logs
+
+    app = create_app()
+    latencies, failures = [], 0
+    deadline = time.monotonic() + seconds
+    iteration = 0
+    with app.app_context():
+        users = [db.session.get(User, user_id) for user_id in range(1, USERS + 1)]
+        while time.monotonic() < deadline:
+            iteration += 1
+            user = users[(worker_id + iteration) % USERS]
+            started = time.perf_counter()
+            try:
+                if role == "writer":
+                    log = NutritionLog(
+                        user_id=user.id,
+                        meal_label="snack",
+                        logged_at=datetime.now(),
+                        calories=150.0,
+                        protein=5.0,
+                    )
+                    db.session.add(log)
+                    db.session.flush()
+                    record_log_in_rollups(log, None)
+                    db.session.commit()
+                    db.session.expunge(log)
+                else:
+                    today = datetime.now()
+                    aggregate_daily_nutrition(user, today)
+                    get_daily_meal_logs(user, today)
+                    db.session.commit()
+            except OperationalError:
+                db.session.rollback()
+                failures += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+    results.put((role, latencies, failures))
+
+
+def run(profile, writers, readers, seconds, history_rows):
+    tmpdir = tempfile.mkdtemp(prefix="swasthyasync-bench-")
+    # Children are spawned, so they read the same environment on import.
+    os.environ["SWASTHYASYNC_DATABASE_URI"] = f"sqlite:///{tmpdir}/bench.db"
+    os.environ["FLASK_ENV"] = PROFILES[profile]
+
+    # Config is read on import, so the app only ever loads in spawned children.
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    seeder = context.Process(target=_seed, args=(history_rows, results))
+    seeder.start()
+    journal_mode = results.get()
+    seeder.join()
+
+    processes = [
+        context.Process(target=_worker, args=(role, index, seconds, results))
+        for index, role in enumerate(["writer"] * writers + ["reader"] * readers)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    for role in ("writer", "reader"):
+        latencies = sorted(
+            value for kind, values, _ in collected if kind == role for value in values
+        )
+        failures = sum(failed for kind, _, failed in collected if kind == role)
+        if not latencies:
+            print(f"{profile:>10} ({journal_mode}) {role}s: no successful operations, {failures} locked")
+            continue
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(
+            f"{profile:>10} ({journal_mode:>6}) {role}s: {len(latencies) / seconds:8.1f} ops/s  "
+            f"p50 {statistics.median(latencies) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms  "
+            f"max {latencies[-1] * 1000:8.2f} ms  locked {failures}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--history", type=int, default=50_000, help="Seeded meal logs.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), nargs="+", default=list(PROFILES))
+    args = parser.parse_args()
+    for profile in args.profile:
+        run(profile, args.writers, args.readers, args.seconds, args.history)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import click
+from flask import Blueprint, abort, current_app, redirect, render_template, request, url_for
+
+from services.latency_report_service import (
+    BUCKETS,
+    KINDS,
+    PERCENTILES,
+    get_latency_report,
+)
+from services.profiling_service import HEADER, MODES, create_profile_token
+from services.user_service import get_current_user, is_admin
+
+admin_bp = Blueprint("admin", __name__, template_folder="../../templates/admin")
+
+
+def _report_args():
+    kind = request.args.get("kind", KINDS[0])
+    bucket = request.args.get("bucket", "day")
+    days = request.args.get("days", 30, type=int)
+    if kind not in KINDS or bucket not in BUCKETS:
+        abort(400)
+    return kind, bucket, days
+
+
+@admin_bp.route("/latency", methods=["GET"])
+def latency():
+    """p50/p95/p99 diet-plan and meal-analysis latency over time."""
+    user = get_current_user()
+    if not user:
+        return redirect(url_for("auth.login"))
+    if not is_admin(user):
+        abort(403)
+
+    kind, bucket, days = _report_args()
+    return render_template(
+        "admin/latency.html",
+        user=user,
+        report=get_latency_report(kind, bucket, days),
+        kind=kind,
+        bucket=bucket,
+        days=days,
+        kinds=KINDS,
+        buckets=BUCKETS,
+        percentiles=PERCENTILES,
+    )
+
+
+@admin_bp.route("/latency.json", methods=["GET"])
+def latency_json():
+    user = get_current_user()
+    if not user:
+        return {"error": "unauthorized"}, 401
+    if not is_admin(user):
+        return {"error": "forbidden"}, 403
+
+    kind, bucket, days = _report_args()
+    return {
+        "kind": kind,
+        "bucket": bucket,
+        "days": days,
+        "rows": get_latency_report(kind, bucket, days),
+    }
+
+
+@admin_bp.cli.command("profile-token")
+@click.option("--mode", type=click.Choice(MODES), default=MODES[0])
+@click.option("--max-age", type=int, default=3600, help="Seconds the token stays valid.")
+def profile_token_command(mode, max_age):
+    """Print a signed header that makes requests get profiled (PROFILING_ENABLED)."""
+    try:
+        token = create_profile_token(current_app.config["SECRET_KEY"], mode, max_age)
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    print(f"{HEADER}: {token}")
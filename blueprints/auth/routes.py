@@ -12,6 +12,7 @@ from flask import (
 
 from extensions import db  # type: ignore
 from models.user_model import User
+from services.user_service import forget_current_user
 
 auth_bp = Blueprint("auth", __name__, template_folder="../../templates/auth")
 
@@ -20,6 +21,7 @@ def _login_user(user: User) -> None:
     session["user_id"] = user.id
     session["user_email"] = user.email
     session.permanent = True
+    forget_current_user()
 
 
 @auth_bp.route("/register", methods=["GET", "POST"])
@@ -72,6 +74,7 @@ def login():
 @auth_bp.route("/logout")
 def logout():
     session.clear()
+    forget_current_user()
     flash("You have been logged out.", "info")
     return redirect(url_for("auth.login"))
 
@@ -1,33 +1,43 @@
+import time
 from datetime import datetime
 from typing import Any, Dict, Optional
 
-from flask import Blueprint, redirect, render_template, request, session, url_for
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    flash,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
 
-from models.lifestyle_model import UserLifestyle
-from models.user_model import User
 from models.diet_model import DietRequest
+from services.lifestyle_cache_service import get_lifestyle
 from services.sleep_service import calculate_sleep_analysis
 from services.prompt_builder import build_diet_prompt_payload
-from services.gemini_service import generate_diet_plan
+from services.gemini_service import generate_diet_plan, get_diet_prompt_version
+from services.plan_cache_service import purge_plan_cache
+from services.user_service import get_current_user
+from services.diet_generation_service import (
+    fail_stale_diet_request,
+    iter_diet_plan_events,
+    start_diet_generation,
+)
 from extensions import db  # type: ignore
 
 diet_bp = Blueprint("diet", __name__, template_folder="../../templates/diet")
 
 
-def _get_current_user() -> Optional[User]:
-    user_id = session.get("user_id")
-    if not user_id:
-        return None
-    return User.query.get(user_id)
-
-
 @diet_bp.route("/plan", methods=["GET", "POST"])
 def diet_plan():
-    user = _get_current_user()
+    user = get_current_user()
     if not user:
         return redirect(url_for("auth.login"))
 
-    lifestyle = UserLifestyle.get_lifestyle_by_user_id(user.id)
+    lifestyle = get_lifestyle(user)
 
     if request.method == "POST":
         # These should match the existing health and diet input fields.
@@ -84,17 +94,24 @@ def diet_plan():
             sleep_analysis=sleep_analysis,
         )
 
-        diet_response: Dict[str, Any] = generate_diet_plan(prompt_payload)
-
-        diet_req = DietRequest(
-            user_id=user.id,
-            prompt_payload=prompt_payload,
-            ai_model="gemini-1.5-pro",
-            response_latency_ms=None,
-        )
-        diet_req.response_payload = diet_response
-        db.session.add(diet_req)
-        db.session.commit()
+        diet_req = DietRequest(user_id=user.id, prompt_payload=prompt_payload)
+
+        if current_app.config.get("DIET_PLAN_BACKGROUND", True):
+            # Persist the request up front; the detail page streams progress
+            # over SSE while a background worker generates the plan.
+            diet_req.status = DietRequest.STATUS_PENDING
+            db.session.add(diet_req)
+            db.session.commit()
+            start_diet_generation(diet_req)
+        else:
+            started = time.perf_counter()
+            diet_response: Dict[str, Any] = generate_diet_plan(prompt_payload)
+            diet_req.response_payload = diet_response
+            diet_req.record_ai_response(
+                diet_response, round((time.perf_counter() - started) * 1000)
+            )
+            db.session.add(diet_req)
+            db.session.commit()
 
         return redirect(url_for("diet.diet_plan_detail", request_id=diet_req.id))
 
@@ -109,19 +126,37 @@ def diet_plan():
 @diet_bp.route("/plan/detail/<int:request_id>", methods=["GET"])
 def diet_plan_detail(request_id: int):
     """Show the full diet plan on a separate page after generation."""
-    user = _get_current_user()
+    user = get_current_user()
     if not user:
         return redirect(url_for("auth.login"))
 
-    lifestyle = UserLifestyle.get_lifestyle_by_user_id(user.id)
+    lifestyle = get_lifestyle(user)
 
     diet_req: Optional[DietRequest] = DietRequest.query.get(request_id)
     if not diet_req or diet_req.user_id != user.id:
         return redirect(url_for("diet.diet_plan"))
 
+    if diet_req.status == DietRequest.STATUS_PENDING:
+        # A worker restart loses the in-process pool; give up on the request.
+        fail_stale_diet_request(diet_req.id, diet_req.created_at)
+
     diet_response: Optional[Dict[str, Any]] = diet_req.response_payload
     prompt_payload: Optional[Dict[str, Any]] = diet_req.prompt_payload
 
+    if diet_req.status == DietRequest.STATUS_PENDING and prompt_payload:
+        return render_template(
+            "diet/plan_detail.html",
+            user=user,
+            lifestyle=lifestyle,
+            diet_response=None,
+            prompt_payload=prompt_payload,
+            pending_request=diet_req,
+        )
+
+    if diet_req.status == DietRequest.STATUS_FAILED:
+        flash("We couldn't generate your diet plan. Please try again.", "error")
+        return redirect(url_for("diet.diet_plan"))
+
     if not diet_response or not prompt_payload:
         return redirect(url_for("diet.diet_plan"))
 
@@ -133,3 +168,33 @@ def diet_plan_detail(request_id: int):
         prompt_payload=prompt_payload,
     )
 
+
+@diet_bp.route("/plan/<int:request_id>/events", methods=["GET"])
+def diet_plan_events(request_id: int):
+    """Server-Sent Events stream of a pending plan's generation progress."""
+    user = get_current_user()
+    if not user:
+        return {"error": "unauthorized"}, 401
+
+    diet_req: Optional[DietRequest] = DietRequest.query.get(request_id)
+    if not diet_req or diet_req.user_id != user.id:
+        return {"error": "not_found"}, 404
+
+    done_url = url_for("diet.diet_plan_detail", request_id=request_id)
+    last_event_id = request.headers.get("Last-Event-ID", "")
+    resume_from = int(last_event_id) if last_event_id.isdigit() else 0
+    events = iter_diet_plan_events(request_id, done_url, diet_req.created_at, resume_from)
+    # Release the request's connection before the stream starts waiting.
+    db.session.remove()
+    return Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@diet_bp.cli.command("purge-plan-cache")
+def purge_plan_cache_command():
+    """Delete expired cached plans and plans from older system prompts."""
+    removed = purge_plan_cache(get_diet_prompt_version())
+    print(f"Removed {removed} cached diet plans.")
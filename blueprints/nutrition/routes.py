@@ -1,39 +1,65 @@
+import gzip
+import io
 from datetime import datetime
 from typing import Optional
 
+import click
 from flask import (
     Blueprint,
+    current_app,
     flash,
     redirect,
     render_template,
     request,
-    session,
     url_for,
 )
+from werkzeug.exceptions import RequestEntityTooLarge
 
+from extensions import db  # type: ignore
+from models.meal_job_model import MealAnalysisJob
+from models.nutrition_model import NutritionLog
 from models.user_model import User
-from services.nutrition_service import (
-    aggregate_daily_nutrition,
-    create_nutrition_log,
-    get_daily_meal_logs,
+from services.analytics_service import get_nutrition_trends, rebuild_nutrition_rollups
+from services.history_service import (
+    InvalidCursorError,
+    get_meal_history,
+    serialize_history_row,
 )
-from services.gemini_service import analyze_meal_from_image
+from services.import_service import (
+    FORMATS,
+    ImportFormatError,
+    detect_format,
+    import_nutrition_logs,
+)
+from services.nutrition_service import get_day_view
+from services.meal_analysis_service import (
+    analyze_and_log_meal,
+    drain_meal_jobs,
+    enqueue_meal_analysis,
+    get_meal_job_status,
+)
+from services.meal_cache_service import purge_expired_meal_analyses
+from services.upload_service import open_upload_buffer
+from services.user_service import get_current_user
 
 nutrition_bp = Blueprint(
     "nutrition", __name__, template_folder="../../templates/nutrition"
 )
 
 
-def _get_current_user() -> Optional[User]:
-    user_id = session.get("user_id")
-    if not user_id:
-        return None
-    return User.query.get(user_id)
+@nutrition_bp.errorhandler(RequestEntityTooLarge)
+def upload_too_large(_exc):
+    if request.endpoint == "nutrition.import_logs":
+        limit = current_app.config.get("NUTRITION_IMPORT_MAX_BYTES", 0)
+        return {"error": "too_large", "max_bytes": limit}, 413
+    limit_mb = current_app.config.get("MEAL_UPLOAD_MAX_BYTES", 0) / (1024 * 1024)
+    flash(f"That photo is too large. Please upload an image under {limit_mb:.0f} MB.", "danger")
+    return redirect(url_for("nutrition.tracker"))
 
 
 @nutrition_bp.route("/tracker", methods=["GET", "POST"])
 def tracker():
-    user = _get_current_user()
+    user = get_current_user()
     if not user:
         return redirect(url_for("auth.login"))
 
@@ -42,6 +68,7 @@ def tracker():
     timing_feedback = {}
     day_totals = {}
     next_meal_plan = None
+    pending_job = None
 
     if request.method == "POST":
         meal_label = request.form.get("meal_label") or None
@@ -51,42 +78,53 @@ def tracker():
             flash("Please upload a meal photo.", "danger")
             return redirect(url_for("nutrition.tracker"))
 
-        image_bytes = image_file.read()
-        mime_type = image_file.mimetype or "image/jpeg"
+        with open_upload_buffer(image_file) as upload:
+            if current_app.config.get("MEAL_ANALYSIS_ASYNC"):
+                # Accept the upload now; a background worker analyses it and
+                # the page polls the job status endpoint until it is logged.
+                job = enqueue_meal_analysis(
+                    user=user, upload=upload, meal_label=meal_label
+                )
+                flash("Photo received. Analysing your meal…", "info")
+                return redirect(url_for("nutrition.tracker", job=job.id))
 
-        analysis = analyze_meal_from_image(
-            image_bytes=image_bytes,
-            mime_type=mime_type,
-            meal_label=meal_label,
-        )
+            result = analyze_and_log_meal(
+                user=user,
+                image_data=upload.data,
+                mime_type=upload.mime_type,
+                meal_label=meal_label,
+                content_hash=upload.sha256,
+            )
 
-        metrics = analysis.get("metrics", {}) or {}
-        ai_food_summary = analysis.get("summary") or ""
-        ai_guidance = analysis.get("guidance") or ""
-
-        result = create_nutrition_log(
-            user=user,
-            meal_label=meal_label,
-            metrics=metrics,
-            ai_food_summary=ai_food_summary,
-            ai_guidance=ai_guidance,
-            image_path=None,
-        )
+        analysis = result["analysis"]
         created_log = result["log"]
         day_totals = result["day_totals"]
         timing_feedback = result["timing_feedback"]
         next_meal_plan = result.get("next_meal_plan")
 
         flash("Meal analysed and logged successfully.", "success")
+    elif request.args.get("job", type=int):
+        job = db.session.get(MealAnalysisJob, request.args.get("job", type=int))
+        if job is not None and job.user_id == user.id:
+            if job.status == MealAnalysisJob.STATUS_DONE:
+                created_log = db.session.get(NutritionLog, job.nutrition_log_id)
+                payload = job.result_payload or {}
+                analysis = payload.get("analysis")
+                timing_feedback = payload.get("timing_feedback") or {}
+                next_meal_plan = payload.get("next_meal_plan")
+            elif job.status == MealAnalysisJob.STATUS_FAILED:
+                flash("We couldn't analyse that photo. Please try again.", "danger")
+            else:
+                pending_job = job
 
     # Use local server time (IST on your machine) so "today" matches
     # your wall‑clock day when aggregating and listing meals.
     today = datetime.now()
 
+    # Shared with create_nutrition_log() on POST, so the day is loaded once.
+    day_view = get_day_view(user, today)
     if not day_totals:
-        day_totals = aggregate_daily_nutrition(user, today)
-
-    today_logs = get_daily_meal_logs(user, today)
+        day_totals = day_view.totals
 
     return render_template(
         "nutrition/tracker.html",
@@ -96,6 +134,193 @@ def tracker():
         day_totals=day_totals,
         analysis=analysis,
         next_meal_plan=next_meal_plan,
-        meal_logs=today_logs,
+        meal_logs=day_view.logs,
+        pending_job=pending_job,
+    )
+
+
+@nutrition_bp.route("/jobs/<int:job_id>", methods=["GET"])
+def meal_job_status(job_id: int):
+    """JSON status of a background meal analysis job (polled by the tracker)."""
+    user = get_current_user()
+    if not user:
+        return {"error": "unauthorized"}, 401
+
+    job = db.session.get(MealAnalysisJob, job_id)
+    if job is None or job.user_id != user.id:
+        return {"error": "not_found"}, 404
+
+    payload = get_meal_job_status(job)
+    if job.status == MealAnalysisJob.STATUS_DONE:
+        payload["redirect_url"] = url_for("nutrition.tracker", job=job.id)
+    return payload
+
+
+def _trend_days() -> int:
+    days = request.args.get("days", type=int) or 90
+    return max(7, min(days, 366))
+
+
+@nutrition_bp.route("/analytics", methods=["GET"])
+def analytics():
+    user = get_current_user()
+    if not user:
+        return redirect(url_for("auth.login"))
+
+    days = _trend_days()
+    return render_template(
+        "nutrition/analytics.html",
+        user=user,
+        days=days,
+        trends=get_nutrition_trends(user, days=days),
+    )
+
+
+@nutrition_bp.route("/analytics.json", methods=["GET"])
+def analytics_json():
+    """Day/week/month macro series, meal counts and timing adherence."""
+    user = get_current_user()
+    if not user:
+        return {"error": "unauthorized"}, 401
+    return get_nutrition_trends(user, days=_trend_days())
+
+
+def _history_page(user: User):
+    return get_meal_history(
+        user,
+        cursor=request.args.get("cursor") or None,
+        page_size=request.args.get("limit", type=int),
+        meal_label=request.args.get("meal_label") or None,
+    )
+
+
+@nutrition_bp.route("/history", methods=["GET"])
+def history():
+    user = get_current_user()
+    if not user:
+        return redirect(url_for("auth.login"))
+
+    try:
+        page = _history_page(user)
+    except InvalidCursorError:
+        flash("That history link has expired. Showing your latest meals.", "info")
+        return redirect(url_for("nutrition.history", meal_label=request.args.get("meal_label")))
+    return render_template("nutrition/history.html", user=user, page=page)
+
+
+@nutrition_bp.route("/history.json", methods=["GET"])
+def history_json():
+    """Keyset-paginated meal history; pass back ``next_cursor``/``prev_cursor``."""
+    user = get_current_user()
+    if not user:
+        return {"error": "unauthorized"}, 401
+
+    try:
+        page = _history_page(user)
+    except InvalidCursorError:
+        return {"error": "invalid_cursor"}, 400
+    return {**page, "logs": [serialize_history_row(row) for row in page["logs"]]}
+
+
+@nutrition_bp.route("/import", methods=["POST"])
+def import_logs():
+    """
+    Bulk-import meal logs from CSV or JSONL.
+
+    Send the file as the raw request body or as a multipart ``file`` field;
+    the format comes from ``?format=``, the file name or the content type.
+    """
+    user = get_current_user()
+    if not user:
+        return {"error": "unauthorized"}, 401
+
+    limit = int(current_app.config.get("NUTRITION_IMPORT_MAX_BYTES", 0))
+    request.max_content_length = limit + 64 * 1024
+    request.file_size_limit = limit
+
+    if request.mimetype == "multipart/form-data":
+        upload = request.files.get("file")
+        if upload is None or upload.filename == "":
+            return {"error": "missing_file"}, 400
+        stream, filename, content_type = upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, content_type = request.stream, None, request.mimetype
+
+    fmt = request.args.get("format") or detect_format(filename, content_type)
+    if fmt not in FORMATS:
+        return {"error": "unknown_format", "formats": list(FORMATS)}, 400
+
+    # Decoded incrementally; the file is never held in memory whole.
+    lines = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        result = import_nutrition_logs(
+            user, lines, fmt, chunk_size=request.args.get("chunk_size", type=int)
+        )
+    except (ImportFormatError, UnicodeDecodeError) as exc:
+        return {"error": "invalid_file", "message": str(exc)}, 400
+    finally:
+        lines.detach()
+    return result
+
+
+@nutrition_bp.cli.command("purge-meal-cache")
+def purge_meal_cache_command():
+    """Delete expired meal analysis cache rows."""
+    removed = purge_expired_meal_analyses()
+    print(f"Removed {removed} expired meal analysis cache entries.")
+
+
+@nutrition_bp.cli.command("rebuild-daily-totals")
+@click.option("--user-id", type=int, default=None, help="Only rebuild this user's days.")
+@click.option(
+    "--day",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help="Only rebuild this day (YYYY-MM-DD).",
+)
+def rebuild_daily_totals_command(user_id: Optional[int], day: Optional[datetime]):
+    """Backfill or repair the daily/weekly/monthly nutrition rollups from meal logs."""
+    written = rebuild_nutrition_rollups(user_id=user_id, day=day.date() if day else None)
+    print(f"Rebuilt {written} daily nutrition total rows and their week/month buckets.")
+
+
+@nutrition_bp.cli.command("import-logs")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--user-id", type=int, required=True, help="User the meals belong to.")
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(FORMATS),
+    default=None,
+    help="File format (default: from the extension; .gz files are decompressed).",
+)
+@click.option("--chunk-size", type=int, default=None, help="Rows inserted per transaction.")
+def import_logs_command(path: str, user_id: int, fmt: Optional[str], chunk_size: Optional[int]):
+    """Bulk-import meal logs for a user from a CSV or JSONL file."""
+    user = db.session.get(User, user_id)
+    if user is None:
+        raise click.ClickException(f"No user with id {user_id}.")
+    fmt = fmt or detect_format(path, None)
+    if fmt is None:
+        raise click.ClickException("Cannot tell the file format; pass --format.")
+
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    try:
+        with opener(path, "rt", encoding="utf-8-sig", newline="") as lines:
+            result = import_nutrition_logs(user, lines, fmt, chunk_size=chunk_size)
+    except (ImportFormatError, UnicodeDecodeError) as exc:
+        raise click.ClickException(str(exc))
+
+    print(
+        f"Imported {result['imported']} meal logs across {result['days']} days "
+        f"({result['duplicates']} duplicates skipped, {result['invalid']} invalid rows)."
     )
+    for error in result["errors"]:
+        print(f"  line {error['line']}: {error['error']}")
+
 
+@nutrition_bp.cli.command("run-meal-jobs")
+def run_meal_jobs_command():
+    """Process any pending background meal analysis jobs in this process."""
+    handled = drain_meal_jobs()
+    print(f"Processed {handled} meal analysis jobs.")
@@ -1,37 +1,43 @@
-from datetime import datetime
+import sys
+from datetime import date, datetime
 from typing import Optional
 
+import click
 from flask import (
     Blueprint,
+    Response,
     flash,
     redirect,
     render_template,
     request,
-    session,
+    stream_with_context,
     url_for,
 )
 
 from extensions import db  # type: ignore
-from models.user_model import User
 from models.lifestyle_model import UserLifestyle
+from services.export_service import (
+    DATASETS,
+    FORMAT_CSV,
+    FORMATS,
+    MIME_TYPES,
+    ExportError,
+    export_filename,
+    iter_export,
+)
+from services.lifestyle_cache_service import get_lifestyle
+from services.user_service import get_current_user
 
 profile_bp = Blueprint("profile", __name__, template_folder="../../templates/profile")
 
 
-def _get_current_user() -> Optional[User]:
-    user_id = session.get("user_id")
-    if not user_id:
-        return None
-    return User.query.get(user_id)
-
-
 @profile_bp.route("/", methods=["GET", "POST"])
 def profile():
-    user = _get_current_user()
+    user = get_current_user()
     if not user:
         return redirect(url_for("auth.login"))
 
-    lifestyle = UserLifestyle.get_lifestyle_by_user_id(user.id)
+    lifestyle = get_lifestyle(user)
 
     if request.method == "POST":
         # Existing health + diet inputs should be handled here as in the current system.
@@ -87,3 +93,88 @@ def profile():
         lifestyle=lifestyle,
     )
 
+
+def _parse_day(value: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(value) if value else None
+
+
+@profile_bp.route("/export", methods=["GET"])
+def export():
+    """
+    Download the current user's history as a streamed file.
+
+    Query: ``dataset`` (nutrition|diet), ``format`` (csv|jsonl|parquet),
+    optional inclusive ``start``/``end`` days (YYYY-MM-DD) and ``gzip=1``.
+    """
+    user = get_current_user()
+    if not user:
+        return redirect(url_for("auth.login"))
+
+    dataset = request.args.get("dataset", "nutrition")
+    fmt = request.args.get("format", FORMAT_CSV)
+    compress = request.args.get("gzip") == "1"
+    try:
+        chunks = iter_export(
+            dataset,
+            fmt,
+            user_id=user.id,
+            start=_parse_day(request.args.get("start")),
+            end=_parse_day(request.args.get("end")),
+            compress=compress,
+        )
+    except ExportError as exc:
+        return {"error": "invalid_export", "message": str(exc)}, 400
+    except ValueError:
+        return {"error": "invalid_date", "message": "Use YYYY-MM-DD for start/end."}, 400
+
+    filename = export_filename(dataset, fmt, compress)
+    return Response(
+        stream_with_context(chunks),
+        mimetype="application/gzip" if filename.endswith(".gz") else MIME_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@profile_bp.cli.command("export")
+@click.option("--dataset", type=click.Choice(DATASETS), default="nutrition")
+@click.option("--format", "fmt", type=click.Choice(FORMATS), default=FORMAT_CSV)
+@click.option("--user-id", type=int, default=None, help="Only this user (default: everyone).")
+@click.option("--start", type=click.DateTime(formats=["%Y-%m-%d"]), default=None)
+@click.option("--end", type=click.DateTime(formats=["%Y-%m-%d"]), default=None)
+@click.option("--gzip", "compress", is_flag=True, help="gzip-compress CSV/JSONL output.")
+@click.option(
+    "--output", "-o", type=click.Path(dir_okay=False), default=None, help="Default: stdout."
+)
+def export_command(
+    dataset: str,
+    fmt: str,
+    user_id: Optional[int],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    compress: bool,
+    output: Optional[str],
+):
+    """Stream nutrition logs or diet requests to a CSV, JSONL or Parquet file."""
+    try:
+        chunks = iter_export(
+            dataset,
+            fmt,
+            user_id=user_id,
+            start=start.date() if start else None,
+            end=end.date() if end else None,
+            compress=compress,
+        )
+    except ExportError as exc:
+        raise click.ClickException(str(exc))
+
+    handle = open(output, "wb") if output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            handle.write(chunk)
+    finally:
+        if output:
+            handle.close()
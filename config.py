@@ -1,18 +1,185 @@
 import os
 from datetime import timedelta
 
+# Only for local development; signed tokens (e.g. profiling headers) are
+# refused while this key is in use.
+DEFAULT_SECRET_KEY = "dev-secret-key"
+
 
 class BaseConfig:
     """Base configuration for SwasthyaSync."""
 
-    SECRET_KEY = os.environ.get("SWASTHYASYNC_SECRET_KEY", "dev-secret-key")
+    SECRET_KEY = os.environ.get("SWASTHYASYNC_SECRET_KEY", DEFAULT_SECRET_KEY)
     SQLALCHEMY_DATABASE_URI = os.environ.get(
         "SWASTHYASYNC_DATABASE_URI",
         "sqlite:///swasthyasync.db",
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Issued on every new SQLite connection (see extensions.init_sqlite_pragmas).
+    # Writers wait for the lock instead of failing with "database is locked".
+    SQLITE_PRAGMAS = {"busy_timeout": 5000}
+
+    # Signed-in users with these emails can open the /admin reports.
+    ADMIN_EMAILS = frozenset(
+        email.strip().lower()
+        for email in os.environ.get("SWASTHYASYNC_ADMIN_EMAILS", "").split(",")
+        if email.strip()
+    )
 
     GEMINI_API_KEY = os.environ.get("SWASTHYASYNC_GEMINI_API_KEY")
+    GEMINI_MODEL_NAME = os.environ.get("SWASTHYASYNC_GEMINI_MODEL", "gemini-1.5-pro")
+
+    # Content-addressed cache of meal photo analyses (memory LRU + DB tier).
+    MEAL_ANALYSIS_CACHE_SIZE = int(os.environ.get("SWASTHYASYNC_MEAL_CACHE_SIZE", "256"))
+    MEAL_ANALYSIS_CACHE_TTL_SECONDS = int(
+        os.environ.get("SWASTHYASYNC_MEAL_CACHE_TTL_SECONDS", str(7 * 24 * 3600))
+    )
+    # Reuse a recent log's analysis when the photo's dHash differs by at most
+    # this many bits (set to -1 to disable near-duplicate reuse).
+    MEAL_PHASH_MAX_DISTANCE = int(os.environ.get("SWASTHYASYNC_MEAL_PHASH_MAX_DISTANCE", "6"))
+    MEAL_PHASH_RECENT_LIMIT = int(os.environ.get("SWASTHYASYNC_MEAL_PHASH_RECENT_LIMIT", "50"))
+
+    # Uploads are hashed while parsed and spooled to disk past the threshold;
+    # oversized photos are rejected with 413 before the body is fully read.
+    MEAL_UPLOAD_MAX_BYTES = int(
+        os.environ.get("SWASTHYASYNC_MEAL_UPLOAD_MAX_BYTES", str(10 * 1024 * 1024))
+    )
+    UPLOAD_SPOOL_THRESHOLD_BYTES = 512 * 1024
+    MAX_CONTENT_LENGTH = MEAL_UPLOAD_MAX_BYTES + 64 * 1024
+
+    # Number of reverse proxies whose X-Forwarded-For is trusted for the
+    # client address (0 keeps the socket peer address).
+    PROXY_FIX_X_FOR = int(os.environ.get("SWASTHYASYNC_PROXY_FIX_X_FOR", "0"))
+
+    # Generated diet plans are cached on a canonicalised prompt payload.
+    DIET_PLAN_CACHE_TTL_SECONDS = int(
+        os.environ.get("SWASTHYASYNC_DIET_PLAN_CACHE_TTL_SECONDS", str(3 * 24 * 3600))
+    )
+
+    # Per-worker request, database and Gemini metrics served at /metrics,
+    # readable with "Authorization: Bearer <token>" or from an opt-in list of
+    # addresses. Loopback is not trusted by default: behind a same-host
+    # reverse proxy every client is 127.0.0.1 unless PROXY_FIX_X_FOR is set.
+    METRICS_ENABLED = os.environ.get("SWASTHYASYNC_METRICS_ENABLED", "1") == "1"
+    METRICS_ALLOWED_IPS = frozenset(
+        address.strip()
+        for address in os.environ.get("SWASTHYASYNC_METRICS_ALLOWED_IPS", "").split(",")
+        if address.strip()
+    )
+    METRICS_TOKEN = os.environ.get("SWASTHYASYNC_METRICS_TOKEN")
+
+    # Opt-in request profiling. When enabled, requests carrying a signed
+    # X-SwasthyaSync-Profile header (``flask admin profile-token``), plus a
+    # PROFILING_SAMPLE_RATE share of requests under PROFILING_PATH_PREFIXES,
+    # are profiled into PROFILING_DIR (default: instance/profiles).
+    PROFILING_ENABLED = os.environ.get("SWASTHYASYNC_PROFILING_ENABLED", "0") == "1"
+    PROFILING_DIR = os.environ.get("SWASTHYASYNC_PROFILING_DIR")
+    PROFILING_MODE = os.environ.get("SWASTHYASYNC_PROFILING_MODE", "cprofile")
+    PROFILING_SAMPLE_RATE = float(os.environ.get("SWASTHYASYNC_PROFILING_SAMPLE_RATE", "0"))
+    PROFILING_PATH_PREFIXES = tuple(
+        prefix.strip()
+        for prefix in os.environ.get("SWASTHYASYNC_PROFILING_PATH_PREFIXES", "").split(",")
+        if prefix.strip()
+    )
+    PROFILING_SAMPLE_INTERVAL_MS = float(
+        os.environ.get("SWASTHYASYNC_PROFILING_SAMPLE_INTERVAL_MS", "5")
+    )
+    PROFILING_MAX_FILES = int(os.environ.get("SWASTHYASYNC_PROFILING_MAX_FILES", "200"))
+    PROFILING_MAX_AGE_HOURS = float(os.environ.get("SWASTHYASYNC_PROFILING_MAX_AGE_HOURS", "72"))
+
+    # Worker-local cache of lifestyle timings; snapshots also carry
+    # users.lifestyle_version, so edits made through other workers show up
+    # on the next request and the TTL only bounds memory churn.
+    LIFESTYLE_CACHE_SIZE = int(os.environ.get("SWASTHYASYNC_LIFESTYLE_CACHE_SIZE", "1024"))
+    LIFESTYLE_CACHE_TTL_SECONDS = int(
+        os.environ.get("SWASTHYASYNC_LIFESTYLE_CACHE_TTL_SECONDS", "300")
+    )
+
+    # A meal counts as on time when logged within this many minutes of the
+    # matching lifestyle time (trend analytics).
+    MEAL_ADHERENCE_WINDOW_MINUTES = int(
+        os.environ.get("SWASTHYASYNC_MEAL_ADHERENCE_WINDOW_MINUTES", "45")
+    )
+
+    # Bulk meal-log imports (CSV/JSONL) insert and commit this many rows at a
+    # time; the HTTP endpoint accepts files up to NUTRITION_IMPORT_MAX_BYTES.
+    NUTRITION_IMPORT_CHUNK_SIZE = int(
+        os.environ.get("SWASTHYASYNC_NUTRITION_IMPORT_CHUNK_SIZE", "1000")
+    )
+    NUTRITION_IMPORT_MAX_BYTES = int(
+        os.environ.get("SWASTHYASYNC_NUTRITION_IMPORT_MAX_BYTES", str(50 * 1024 * 1024))
+    )
+    # Meal history pages (keyset pagination; callers may ask for up to the max).
+    HISTORY_PAGE_SIZE = 25
+    HISTORY_MAX_PAGE_SIZE = 100
+    # Exports stream rows from a server-side cursor this many at a time.
+    EXPORT_BATCH_SIZE = 1000
+
+    # Meal photos are downscaled/re-encoded before upload (max edge 0 disables).
+    MEAL_IMAGE_MAX_EDGE = int(os.environ.get("SWASTHYASYNC_MEAL_IMAGE_MAX_EDGE", "1024"))
+    MEAL_IMAGE_FORMAT = os.environ.get("SWASTHYASYNC_MEAL_IMAGE_FORMAT", "JPEG")
+    MEAL_IMAGE_QUALITY = int(os.environ.get("SWASTHYASYNC_MEAL_IMAGE_QUALITY", "85"))
+
+    # Local background worker pools: meal analysis jobs, and a separate one for
+    # diet generation so plans never queue behind a backlog of meal photos.
+    BACKGROUND_WORKERS = int(os.environ.get("SWASTHYASYNC_BACKGROUND_WORKERS", "2"))
+    DIET_PLAN_WORKERS = int(os.environ.get("SWASTHYASYNC_DIET_PLAN_WORKERS", "2"))
+    # Opt-in: accept meal photos immediately and analyse them in the background.
+    MEAL_ANALYSIS_ASYNC = os.environ.get("SWASTHYASYNC_MEAL_ANALYSIS_ASYNC", "0") == "1"
+    MEAL_JOB_UPLOAD_DIR = os.environ.get("SWASTHYASYNC_MEAL_JOB_UPLOAD_DIR")
+    MEAL_JOB_STALE_SECONDS = 300
+    # Diet plans are generated in the background and streamed to the detail
+    # page over Server-Sent Events.
+    DIET_PLAN_BACKGROUND = os.environ.get("SWASTHYASYNC_DIET_PLAN_BACKGROUND", "1") == "1"
+    DIET_PLAN_STREAMING = True
+    DIET_PLAN_SSE_TIMEOUT_SECONDS = 120
+    # Pending plans older than this (their worker restarted) are marked failed.
+    DIET_PLAN_STALE_SECONDS = int(os.environ.get("SWASTHYASYNC_DIET_PLAN_STALE_SECONDS", "300"))
+    # Each open stream holds a worker thread: streams close after this long
+    # (the browser reconnects) and past the cap clients are told to retry.
+    DIET_PLAN_SSE_STREAM_SECONDS = int(os.environ.get("SWASTHYASYNC_DIET_PLAN_SSE_STREAM_SECONDS", "25"))
+    DIET_PLAN_SSE_MAX_STREAMS = int(os.environ.get("SWASTHYASYNC_DIET_PLAN_SSE_MAX_STREAMS", "8"))
+    # Identical in-flight Gemini calls are coalesced; followers wait this long
+    # for the leader before calling the model themselves.
+    SINGLE_FLIGHT_WAIT_SECONDS = float(
+        os.environ.get("SWASTHYASYNC_SINGLE_FLIGHT_WAIT_SECONDS", "90")
+    )
+    SINGLE_FLIGHT_LOCK_TTL_SECONDS = 120
+    SINGLE_FLIGHT_POLL_SECONDS = 0.25
+    # Circuit breaker and adaptive deadline around Gemini calls: the timeout
+    # is GEMINI_TIMEOUT_MULTIPLIER x the rolling p95 latency, clamped.
+    GEMINI_BREAKER_FAILURE_THRESHOLD = int(
+        os.environ.get("SWASTHYASYNC_GEMINI_BREAKER_FAILURES", "5")
+    )
+    GEMINI_BREAKER_RESET_SECONDS = float(
+        os.environ.get("SWASTHYASYNC_GEMINI_BREAKER_RESET_SECONDS", "30")
+    )
+    GEMINI_LATENCY_WINDOW = 100
+    GEMINI_TIMEOUT_PERCENTILE = 0.95
+    GEMINI_TIMEOUT_MULTIPLIER = 2.0
+    GEMINI_TIMEOUT_MIN_SECONDS = float(
+        os.environ.get("SWASTHYASYNC_GEMINI_TIMEOUT_MIN_SECONDS", "10")
+    )
+    GEMINI_TIMEOUT_MAX_SECONDS = float(
+        os.environ.get("SWASTHYASYNC_GEMINI_TIMEOUT_MAX_SECONDS", "90")
+    )
+    # Outbound Gemini limiter shared by all workers through the database:
+    # token bucket (rate/burst) plus a cap on concurrent calls. With the
+    # "wait" policy callers queue up to the max wait; "fallback" fails fast.
+    GEMINI_RATE_LIMIT_PER_SECOND = float(
+        os.environ.get("SWASTHYASYNC_GEMINI_RATE_LIMIT_PER_SECOND", "2")
+    )
+    GEMINI_RATE_LIMIT_BURST = int(os.environ.get("SWASTHYASYNC_GEMINI_RATE_LIMIT_BURST", "5"))
+    GEMINI_MAX_CONCURRENT_CALLS = int(
+        os.environ.get("SWASTHYASYNC_GEMINI_MAX_CONCURRENT_CALLS", "4")
+    )
+    GEMINI_RATE_LIMIT_POLICY = os.environ.get("SWASTHYASYNC_GEMINI_RATE_LIMIT_POLICY", "wait")
+    GEMINI_RATE_LIMIT_MAX_WAIT_SECONDS = float(
+        os.environ.get("SWASTHYASYNC_GEMINI_RATE_LIMIT_MAX_WAIT_SECONDS", "10")
+    )
+    # Each concurrent call holds a lease row that expires after this long, so
+    # slots leaked by a crashed worker free themselves.
+    GEMINI_CALL_LEASE_SECONDS = 300
 
     SESSION_COOKIE_HTTPONLY = True
     REMEMBER_COOKIE_HTTPONLY = True
@@ -26,6 +193,24 @@ class DevelopmentConfig(BaseConfig):
 class ProductionConfig(BaseConfig):
     DEBUG = False
 
+    # WAL lets readers run alongside the single writer instead of blocking on
+    # the rollback journal; NORMAL sync is durable in WAL mode except for the
+    # last commits on power loss. Negative cache_size is in KiB.
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.environ.get("SWASTHYASYNC_SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "cache_size": -64 * 1024,
+        "mmap_size": int(os.environ.get("SWASTHYASYNC_SQLITE_MMAP_BYTES", str(256 * 1024 * 1024))),
+        "temp_store": "MEMORY",
+    }
+    # Sized for the worker's request threads plus background pool threads.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.environ.get("SWASTHYASYNC_DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.environ.get("SWASTHYASYNC_DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": 30,
+    }
+
 
 config_by_name = {
     "development": DevelopmentConfig,
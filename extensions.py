@@ -1,8 +1,44 @@
+from typing import Any, Dict
+
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import event
 
 # Centralised extension instances to avoid circular imports and multiple db objects.
 
 db = SQLAlchemy()
 migrate = Migrate()
 
+
+def init_sqlite_pragmas(app) -> None:
+    """
+    Run ``SQLITE_PRAGMAS`` on every new SQLite connection of the app's engine.
+
+    Per-connection settings (synchronous, cache_size, mmap_size,
+    busy_timeout) must be issued on each connection the pool opens;
+    journal_mode=WAL persists in the database file once set.
+    """
+    pragmas = app.config.get("SQLITE_PRAGMAS") or {}
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, _record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def get_database_stats() -> Dict[str, Any]:
+    """Pool occupancy and, for SQLite, the journal mode actually in effect."""
+    engine = db.engine
+    stats: Dict[str, Any] = {"dialect": engine.dialect.name, "pool": engine.pool.status()}
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            stats["journal_mode"] = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+    return stats
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Any
 
 from extensions import db  # type: ignore
 
@@ -15,6 +16,37 @@ class TimestampMixin:
     )
 
 
+class AIResponseMixin:
+    """
+    Mixin recording which model produced a row's AI response and how long it took.
+
+    ``response_source`` is "gemini", "cache", "fallback" or "near_duplicate";
+    ``response_latency_ms`` is the caller's end-to-end generation time and the
+    other timings come from the Gemini service's ``meta.timing``.
+    """
+
+    ai_model = db.Column(db.String(128), nullable=True)
+    response_source = db.Column(db.String(16), nullable=True)
+    fallback_reason = db.Column(db.String(32), nullable=True)
+    response_latency_ms = db.Column(db.Integer, nullable=True)
+    queue_wait_ms = db.Column(db.Integer, nullable=True)
+    model_latency_ms = db.Column(db.Integer, nullable=True)
+    parse_latency_ms = db.Column(db.Integer, nullable=True)
+
+    def record_ai_response(self, response: Any, latency_ms: int) -> None:
+        """Copy model, source and timing from a Gemini service result's ``meta``."""
+        meta = response.get("meta") if isinstance(response, dict) else None
+        meta = meta if isinstance(meta, dict) else {}
+        timing = meta.get("timing") if isinstance(meta.get("timing"), dict) else {}
+        self.ai_model = meta.get("model")
+        self.response_source = "cache" if meta.get("cache") == "hit" else meta.get("source")
+        self.fallback_reason = meta.get("fallback_reason")
+        self.response_latency_ms = latency_ms
+        self.queue_wait_ms = timing.get("queue_wait_ms")
+        self.model_latency_ms = timing.get("model_ms")
+        self.parse_latency_ms = timing.get("parse_ms")
+
+
 def init_models():
     """Import models so that SQLAlchemy is aware of them."""
     # Local imports to avoid circular dependencies
@@ -22,4 +54,10 @@ def init_models():
     from .lifestyle_model import UserLifestyle  # noqa: F401
     from .nutrition_model import NutritionLog  # noqa: F401
     from .diet_model import DietRequest  # noqa: F401
+    from .meal_cache_model import MealAnalysisCacheEntry  # noqa: F401
+    from .meal_job_model import MealAnalysisJob  # noqa: F401
+    from .plan_cache_model import DietPlanCacheEntry  # noqa: F401
 
+    from .inflight_model import InflightCall  # noqa: F401
+    from .rate_limit_model import OutboundCallLease, OutboundRateLimit  # noqa: F401
+    from .daily_totals_model import DailyNutritionTotal, NutritionPeriodTotal  # noqa: F401
@@ -0,0 +1,59 @@
+from extensions import db  # type: ignore
+from models import TimestampMixin
+
+
+class DailyNutritionTotal(TimestampMixin, db.Model):
+    """Per-user, per-day macro sums maintained as meals are logged."""
+
+    __tablename__ = "daily_nutrition_totals"
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day = db.Column(db.Date, primary_key=True)
+
+    calories = db.Column(db.Float, nullable=False, default=0.0)
+    protein = db.Column(db.Float, nullable=False, default=0.0)
+    carbs = db.Column(db.Float, nullable=False, default=0.0)
+    fats = db.Column(db.Float, nullable=False, default=0.0)
+    sugar = db.Column(db.Float, nullable=False, default=0.0)
+    fiber = db.Column(db.Float, nullable=False, default=0.0)
+    meal_count = db.Column(db.Integer, nullable=False, default=0)
+    # Meals with a lifestyle time for their label, and those eaten within
+    # the adherence window of it.
+    scheduled_meals = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    on_time_meals = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    user = db.relationship("User", back_populates="daily_nutrition_totals")
+
+
+class NutritionPeriodTotal(TimestampMixin, db.Model):
+    """Weekly (Monday-start) and monthly rollups of ``DailyNutritionTotal``."""
+
+    __tablename__ = "nutrition_period_totals"
+
+    PERIOD_WEEK = "week"
+    PERIOD_MONTH = "month"
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    period = db.Column(db.String(8), primary_key=True)
+    period_start = db.Column(db.Date, primary_key=True)
+
+    calories = db.Column(db.Float, nullable=False, default=0.0)
+    protein = db.Column(db.Float, nullable=False, default=0.0)
+    carbs = db.Column(db.Float, nullable=False, default=0.0)
+    fats = db.Column(db.Float, nullable=False, default=0.0)
+    sugar = db.Column(db.Float, nullable=False, default=0.0)
+    fiber = db.Column(db.Float, nullable=False, default=0.0)
+    meal_count = db.Column(db.Integer, nullable=False, default=0)
+    scheduled_meals = db.Column(db.Integer, nullable=False, default=0)
+    on_time_meals = db.Column(db.Integer, nullable=False, default=0)
+    days_logged = db.Column(db.Integer, nullable=False, default=0)
+
+    user = db.relationship("User", back_populates="nutrition_period_totals")
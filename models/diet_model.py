@@ -1,12 +1,16 @@
 from extensions import db  # type: ignore
-from models import TimestampMixin
+from models import AIResponseMixin, TimestampMixin
 
 
-class DietRequest(TimestampMixin, db.Model):
+class DietRequest(AIResponseMixin, TimestampMixin, db.Model):
     """Stores raw inputs and AI metadata for diet generations for analytics."""
 
     __tablename__ = "diet_requests"
 
+    STATUS_PENDING = "pending"
+    STATUS_READY = "ready"
+    STATUS_FAILED = "failed"
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(
         db.Integer,
@@ -16,6 +20,10 @@ class DietRequest(TimestampMixin, db.Model):
     )
     prompt_payload = db.Column(db.JSON, nullable=False)
     response_payload = db.Column(db.JSON, nullable=True)
-    ai_model = db.Column(db.String(128), nullable=True)
-    response_latency_ms = db.Column(db.Integer, nullable=True)
+    status = db.Column(
+        db.String(16),
+        nullable=False,
+        default=STATUS_READY,
+        server_default=STATUS_READY,
+    )
 
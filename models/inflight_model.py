@@ -0,0 +1,13 @@
+from extensions import db  # type: ignore
+from models import TimestampMixin
+
+
+class InflightCall(TimestampMixin, db.Model):
+    """Cross-process lock row held while a Gemini call for ``call_key`` runs."""
+
+    __tablename__ = "inflight_calls"
+
+    call_key = db.Column(db.String(128), primary_key=True)
+    owner = db.Column(db.String(128), nullable=False)
+    # Locks left behind by a crashed worker are reclaimed after this time.
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
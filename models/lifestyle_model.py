@@ -3,11 +3,21 @@ from typing import Optional
 
 from extensions import db  # type: ignore
 from models import TimestampMixin
+from models.user_model import User
 
 
 class UserLifestyle(TimestampMixin, db.Model):
     __tablename__ = "user_lifestyle"
 
+    TIME_FIELDS = (
+        "wake_time",
+        "breakfast_time",
+        "lunch_time",
+        "snack_time",
+        "dinner_time",
+        "sleep_time",
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(
         db.Integer,
@@ -51,6 +61,16 @@ class UserLifestyle(TimestampMixin, db.Model):
         lifestyle.dinner_time = dinner_time
         lifestyle.sleep_time = sleep_time
 
+        db.session.execute(
+            db.update(User)
+            .where(User.id == user_id)
+            .values(lifestyle_version=User.lifestyle_version + 1)
+        )
         db.session.commit()
+
+        # Local import: the cache service imports this model.
+        from services.lifestyle_cache_service import invalidate_lifestyle
+
+        invalidate_lifestyle(user_id)
         return lifestyle
 
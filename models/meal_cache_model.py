@@ -0,0 +1,13 @@
+from extensions import db  # type: ignore
+from models import TimestampMixin
+
+
+class MealAnalysisCacheEntry(TimestampMixin, db.Model):
+    """Persistent tier of the content-addressed meal image analysis cache."""
+
+    __tablename__ = "meal_analysis_cache"
+
+    cache_key = db.Column(db.String(64), primary_key=True)
+    analysis = db.Column(db.JSON, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,37 @@
+from extensions import db  # type: ignore
+from models import TimestampMixin
+
+
+class MealAnalysisJob(TimestampMixin, db.Model):
+    """Queued meal photo analysis processed by the local background workers."""
+
+    __tablename__ = "meal_analysis_jobs"
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    status = db.Column(db.String(16), nullable=False, default=STATUS_PENDING, index=True)
+
+    meal_label = db.Column(db.String(64), nullable=True)
+    mime_type = db.Column(db.String(64), nullable=False)
+    image_path = db.Column(db.String(512), nullable=False)
+    content_hash = db.Column(db.String(64), nullable=True)
+
+    nutrition_log_id = db.Column(
+        db.Integer,
+        db.ForeignKey("nutrition_logs.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    result_payload = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
@@ -1,21 +1,34 @@
 from extensions import db  # type: ignore
-from models import TimestampMixin
+from models import AIResponseMixin, TimestampMixin
 
 
-class NutritionLog(TimestampMixin, db.Model):
+class NutritionLog(AIResponseMixin, TimestampMixin, db.Model):
     __tablename__ = "nutrition_logs"
+    __table_args__ = (
+        # Every hot query filters by user and a logged_at range/order; the
+        # composite index also serves plain user_id lookups. Macros are left
+        # out on purpose: day totals come from daily_nutrition_totals, and
+        # the day list also needs meal_label, so a covering index would
+        # copy most of the row and slow every insert for a few-row scan.
+        db.Index("ix_nutrition_logs_user_id_logged_at", "user_id", "logged_at"),
+    )
+
+    MACRO_FIELDS = ("calories", "protein", "carbs", "fats", "sugar", "fiber")
+    # Response sources whose analysis may be reused for a near-duplicate photo.
+    REUSABLE_SOURCES = ("gemini", "cache")
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(
         db.Integer,
         db.ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
 
     meal_label = db.Column(db.String(64), nullable=True)
     logged_at = db.Column(db.DateTime, nullable=False)
     image_path = db.Column(db.String(512), nullable=True)
+    # 64-bit dHash of the uploaded photo (hex) for near-duplicate reuse.
+    image_phash = db.Column(db.String(16), nullable=True)
 
     calories = db.Column(db.Float, nullable=True)
     protein = db.Column(db.Float, nullable=True)
@@ -26,6 +39,9 @@ class NutritionLog(TimestampMixin, db.Model):
 
     ai_food_summary = db.Column(db.Text, nullable=True)
     ai_guidance = db.Column(db.Text, nullable=True)
+    # Full model analysis, kept for model/cache answers so near-duplicate
+    # photos can reuse it as-is.
+    ai_analysis = db.Column(db.JSON, nullable=True)
 
     user = db.relationship("User", back_populates="nutrition_logs")
 
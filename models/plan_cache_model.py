@@ -0,0 +1,16 @@
+from extensions import db  # type: ignore
+from models import TimestampMixin
+
+
+class DietPlanCacheEntry(TimestampMixin, db.Model):
+    """Generated diet plans keyed by a canonicalised prompt payload."""
+
+    __tablename__ = "diet_plan_cache"
+
+    cache_key = db.Column(db.String(64), primary_key=True)
+    # Hash of the system prompt + model; entries from older prompts are misses.
+    prompt_version = db.Column(db.String(16), nullable=False, index=True)
+    canonical_payload = db.Column(db.JSON, nullable=False)
+    response_payload = db.Column(db.JSON, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,24 @@
+from extensions import db  # type: ignore
+from models import TimestampMixin
+
+
+class OutboundRateLimit(TimestampMixin, db.Model):
+    """Shared token bucket for outbound model calls."""
+
+    __tablename__ = "outbound_rate_limits"
+
+    name = db.Column(db.String(64), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    # Epoch seconds of the last refill/acquire/release; shared by all workers.
+    refilled_at = db.Column(db.Float, nullable=False)
+
+
+class OutboundCallLease(TimestampMixin, db.Model):
+    """One in-flight outbound call; live rows are counted against the concurrency cap."""
+
+    __tablename__ = "outbound_call_leases"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), nullable=False, index=True)
+    # Epoch seconds; a lease left behind by a crashed worker stops counting then.
+    expires_at = db.Column(db.Float, nullable=False)
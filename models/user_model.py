@@ -11,6 +11,9 @@ class User(TimestampMixin, db.Model):
     email = db.Column(db.String(255), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
     full_name = db.Column(db.String(255), nullable=False)
+    # Bumped whenever the lifestyle row changes so every worker's lifestyle
+    # cache can tell its snapshot is stale from the user row alone.
+    lifestyle_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     lifestyle = db.relationship(
         "UserLifestyle",
@@ -24,6 +27,18 @@ class User(TimestampMixin, db.Model):
         lazy="dynamic",
         cascade="all, delete-orphan",
     )
+    daily_nutrition_totals = db.relationship(
+        "DailyNutritionTotal",
+        back_populates="user",
+        lazy="dynamic",
+        cascade="all, delete-orphan",
+    )
+    nutrition_period_totals = db.relationship(
+        "NutritionPeriodTotal",
+        back_populates="user",
+        lazy="dynamic",
+        cascade="all, delete-orphan",
+    )
 
     def set_password(self, password: str) -> None:
         self.password_hash = generate_password_hash(password)
@@ -0,0 +1,348 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import and_, case, delete, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db  # type: ignore
+from models.daily_totals_model import DailyNutritionTotal, NutritionPeriodTotal
+from models.lifestyle_model import UserLifestyle
+from models.nutrition_model import NutritionLog
+from models.user_model import User
+from services.lifestyle_cache_service import LifestyleSnapshot
+from services.sql_dates_service import day_of, minute_of_day, month_of, week_of
+
+MACRO_KEYS = NutritionLog.MACRO_FIELDS
+COUNT_KEYS = ("meal_count", "scheduled_meals", "on_time_meals")
+
+# Which lifestyle time a logged meal label is expected at.
+MEAL_TIME_FIELDS = {
+    "breakfast": "breakfast_time",
+    "lunch": "lunch_time",
+    "snack": "snack_time",
+    "dinner": "dinner_time",
+}
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _adherence_window() -> int:
+    return int(current_app.config.get("MEAL_ADHERENCE_WINDOW_MINUTES", 45))
+
+
+def classify_meal_timing(
+    logged_at: datetime,
+    meal_label: Optional[str],
+    lifestyle: Optional[LifestyleSnapshot],
+) -> Tuple[bool, bool]:
+    """Return ``(scheduled, on_time)`` for a meal against the user's routine."""
+    field = MEAL_TIME_FIELDS.get((meal_label or "").strip().lower())
+    scheduled_at: Optional[time] = getattr(lifestyle, field, None) if field else None
+    if scheduled_at is None:
+        return False, False
+    diff = abs(
+        (logged_at.hour * 60 + logged_at.minute)
+        - (scheduled_at.hour * 60 + scheduled_at.minute)
+    )
+    return True, min(diff, 24 * 60 - diff) <= _adherence_window()
+
+
+def _increment(model: Any, keys: Dict[str, Any], increments: Dict[str, Any]) -> bool:
+    """
+    Add ``increments`` to the bucket row at ``keys``; returns True if created.
+
+    The add is one UPDATE so concurrent writers cannot lose each other's
+    increments; a missing row is inserted in a savepoint.
+    """
+    table = model.__table__
+
+    def _update() -> int:
+        values: Dict[str, Any] = {key: table.c[key] + value for key, value in increments.items()}
+        values["updated_at"] = datetime.utcnow()
+        return db.session.execute(
+            update(table)
+            .where(*[table.c[key] == value for key, value in keys.items()])
+            .values(**values)
+        ).rowcount
+
+    if _update():
+        return False
+    try:
+        with db.session.begin_nested():
+            db.session.add(model(**keys, **increments))
+        return True
+    except IntegrityError:
+        # Another worker created the bucket first.
+        _update()
+        return False
+
+
+def record_log_in_rollups(log: NutritionLog, lifestyle: Optional[LifestyleSnapshot]) -> None:
+    """Add a new log to its day, week and month buckets in the current transaction."""
+    scheduled, on_time = classify_meal_timing(log.logged_at, log.meal_label, lifestyle)
+    increments: Dict[str, Any] = {key: float(getattr(log, key) or 0.0) for key in MACRO_KEYS}
+    increments.update(meal_count=1, scheduled_meals=int(scheduled), on_time_meals=int(on_time))
+
+    day = log.logged_at.date()
+    new_day = _increment(DailyNutritionTotal, {"user_id": log.user_id, "day": day}, increments)
+    for period, start in (
+        (NutritionPeriodTotal.PERIOD_WEEK, week_start(day)),
+        (NutritionPeriodTotal.PERIOD_MONTH, month_start(day)),
+    ):
+        _increment(
+            NutritionPeriodTotal,
+            {"user_id": log.user_id, "period": period, "period_start": start},
+            {**increments, "days_logged": int(new_day)},
+        )
+
+
+# Days per statement when rebuilding a set of days, well under SQLite's
+# bound-parameter limit.
+_REBUILD_DAYS_PER_STATEMENT = 500
+
+
+def _daily_rollup_source(user_id: Optional[int], days: Optional[Sequence[date]]) -> Any:
+    # Same normalisation as classify_meal_timing's ``.strip().lower()``.
+    label = func.lower(func.trim(NutritionLog.meal_label))
+    scheduled_at = case(
+        *[
+            (label == name, getattr(UserLifestyle, field))
+            for name, field in MEAL_TIME_FIELDS.items()
+        ],
+        else_=None,
+    )
+    diff = func.abs(minute_of_day(NutritionLog.logged_at) - minute_of_day(scheduled_at))
+    distance = case((diff > 12 * 60, 24 * 60 - diff), else_=diff)
+    log_day = day_of(NutritionLog.logged_at)
+    now = datetime.utcnow()
+
+    source = (
+        select(
+            NutritionLog.user_id,
+            log_day,
+            *[func.coalesce(func.sum(getattr(NutritionLog, key)), 0.0) for key in MACRO_KEYS],
+            func.count(NutritionLog.id),
+            func.sum(case((scheduled_at.isnot(None), 1), else_=0)),
+            func.sum(
+                case(
+                    (and_(scheduled_at.isnot(None), distance <= _adherence_window()), 1),
+                    else_=0,
+                )
+            ),
+            literal(now),
+            literal(now),
+        )
+        .select_from(NutritionLog)
+        .outerjoin(UserLifestyle, UserLifestyle.user_id == NutritionLog.user_id)
+        .group_by(NutritionLog.user_id, log_day)
+    )
+    if user_id is not None:
+        source = source.where(NutritionLog.user_id == user_id)
+    if days is not None:
+        # The logged_at range keeps the (user_id, logged_at) index usable.
+        source = source.where(
+            NutritionLog.logged_at >= datetime.combine(min(days), time.min),
+            NutritionLog.logged_at < datetime.combine(max(days) + timedelta(days=1), time.min),
+            log_day.in_(days),
+        )
+    return source
+
+
+def _period_rollup_source(
+    period: str,
+    start_expr: Any,
+    user_id: Optional[int],
+    starts: Optional[Sequence[date]],
+) -> Any:
+    daily = DailyNutritionTotal
+    now = datetime.utcnow()
+    source = select(
+        daily.user_id,
+        literal(period),
+        start_expr,
+        *[func.sum(getattr(daily, key)) for key in MACRO_KEYS + COUNT_KEYS],
+        func.count(),
+        literal(now),
+        literal(now),
+    ).group_by(daily.user_id, start_expr)
+    if user_id is not None:
+        source = source.where(daily.user_id == user_id)
+    if starts is not None:
+        source = source.where(
+            daily.day >= min(starts),
+            daily.day < max(starts) + timedelta(days=31),
+            start_expr.in_(starts),
+        )
+    return source
+
+
+def _rebuild_rollups(user_id: Optional[int], days: Optional[Sequence[date]]) -> int:
+    daily = DailyNutritionTotal.__table__
+    cleanup = delete(daily)
+    if user_id is not None:
+        cleanup = cleanup.where(daily.c.user_id == user_id)
+    if days is not None:
+        cleanup = cleanup.where(daily.c.day.in_(days))
+    db.session.execute(cleanup)
+    written = db.session.execute(
+        insert(daily).from_select(
+            ["user_id", "day", *MACRO_KEYS, *COUNT_KEYS, "created_at", "updated_at"],
+            _daily_rollup_source(user_id, days),
+        )
+    ).rowcount
+
+    periods = NutritionPeriodTotal.__table__
+    for period, start_expr, start_of in (
+        (
+            NutritionPeriodTotal.PERIOD_WEEK,
+            week_of(DailyNutritionTotal.day),
+            week_start,
+        ),
+        (
+            NutritionPeriodTotal.PERIOD_MONTH,
+            month_of(DailyNutritionTotal.day),
+            month_start,
+        ),
+    ):
+        starts = sorted({start_of(day) for day in days}) if days is not None else None
+        cleanup = delete(periods).where(periods.c.period == period)
+        if user_id is not None:
+            cleanup = cleanup.where(periods.c.user_id == user_id)
+        if starts is not None:
+            cleanup = cleanup.where(periods.c.period_start.in_(starts))
+        db.session.execute(cleanup)
+        db.session.execute(
+            insert(periods).from_select(
+                [
+                    "user_id",
+                    "period",
+                    "period_start",
+                    *MACRO_KEYS,
+                    *COUNT_KEYS,
+                    "days_logged",
+                    "created_at",
+                    "updated_at",
+                ],
+                _period_rollup_source(period, start_expr, user_id, starts),
+            )
+        )
+    return int(written or 0)
+
+
+def rebuild_nutrition_rollups(user_id: Optional[int] = None, day: Optional[date] = None) -> int:
+    """
+    Recompute day, week and month buckets from ``nutrition_logs``.
+
+    With ``day`` only that day and the week/month containing it are rebuilt.
+    Adherence uses each user's current lifestyle times. Returns daily rows
+    written.
+    """
+    written = _rebuild_rollups(user_id, [day] if day is not None else None)
+    db.session.commit()
+    return written
+
+
+def rebuild_nutrition_rollups_for_days(user_id: int, days: Iterable[date]) -> int:
+    """
+    Rebuild one user's buckets for ``days`` and the weeks/months containing them.
+
+    Each day, week and month is recomputed once however many logs landed
+    in it. Returns daily rows written.
+    """
+    ordered = sorted(set(days))
+    written = 0
+    for offset in range(0, len(ordered), _REBUILD_DAYS_PER_STATEMENT):
+        written += _rebuild_rollups(
+            user_id, ordered[offset : offset + _REBUILD_DAYS_PER_STATEMENT]
+        )
+    db.session.commit()
+    return written
+
+
+def _ratio(numerator: float, denominator: float, digits: int) -> Optional[float]:
+    return round(numerator / denominator, digits) if denominator else None
+
+
+def _bucket_entry(start: date, row: Any, days_logged: int) -> Dict[str, Any]:
+    entry: Dict[str, Any] = {"start": start.isoformat()}
+    for key in MACRO_KEYS:
+        entry[key] = round(float(getattr(row, key) or 0.0), 1) if row else 0.0
+    for key in COUNT_KEYS:
+        entry[key] = int(getattr(row, key) or 0) if row else 0
+    entry["days_logged"] = days_logged
+    entry["adherence"] = _ratio(entry["on_time_meals"], entry["scheduled_meals"], 3)
+    entry["avg_daily_calories"] = _ratio(entry["calories"], days_logged, 1)
+    return entry
+
+
+def _period_series(user_id: int, period: str, first: date, last: date) -> List[Dict[str, Any]]:
+    rows = (
+        NutritionPeriodTotal.query.filter(
+            NutritionPeriodTotal.user_id == user_id,
+            NutritionPeriodTotal.period == period,
+            NutritionPeriodTotal.period_start >= first,
+            NutritionPeriodTotal.period_start <= last,
+        )
+        .order_by(NutritionPeriodTotal.period_start.asc())
+        .all()
+    )
+    return [_bucket_entry(row.period_start, row, row.days_logged) for row in rows]
+
+
+def _summarize(days: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    logged = [entry for entry in days if entry["meal_count"]]
+    summary: Dict[str, Any] = {
+        key: round(sum(entry[key] for entry in logged), 1) for key in MACRO_KEYS
+    }
+    summary.update({key: sum(entry[key] for entry in logged) for key in COUNT_KEYS})
+    summary["days_logged"] = len(logged)
+    summary["adherence"] = _ratio(summary["on_time_meals"], summary["scheduled_meals"], 3)
+    summary["avg_daily_calories"] = _ratio(summary["calories"], len(logged), 1)
+    return summary
+
+
+def get_nutrition_trends(
+    user: User,
+    days: int = 90,
+    today: Optional[date] = None,
+) -> Dict[str, Any]:
+    """
+    Per-day, per-week and per-month macro series for the last ``days`` days.
+
+    Reads only the rollup tables (a few hundred primary-key range rows for
+    a year), never ``nutrition_logs``. Week and month buckets overlapping the
+    start of the range are returned whole.
+    """
+    end = today or datetime.now().date()
+    start = end - timedelta(days=days - 1)
+
+    rows = {
+        row.day: row
+        for row in DailyNutritionTotal.query.filter(
+            DailyNutritionTotal.user_id == user.id,
+            DailyNutritionTotal.day >= start,
+            DailyNutritionTotal.day <= end,
+        )
+    }
+    daily = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = rows.get(day)
+        daily.append(_bucket_entry(day, row, 1 if row else 0))
+
+    return {
+        "range": {"start": start.isoformat(), "end": end.isoformat(), "days": days},
+        "summary": _summarize(daily),
+        "daily": daily,
+        "weekly": _period_series(user.id, NutritionPeriodTotal.PERIOD_WEEK, week_start(start), end),
+        "monthly": _period_series(
+            user.id, NutritionPeriodTotal.PERIOD_MONTH, month_start(start), end
+        ),
+    }
@@ -0,0 +1,60 @@
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# One executor per pool per worker process; re-created after fork so
+# pre-fork servers do not inherit a pool whose threads no longer exist.
+# Pools are separate so a long meal-job drain cannot hold back diet plans.
+_EXECUTOR_LOCK = threading.Lock()
+_EXECUTORS: Dict[str, ThreadPoolExecutor] = {}
+_EXECUTOR_PID: Optional[int] = None
+
+
+def _get_executor(pool: str, max_workers: int) -> ThreadPoolExecutor:
+    global _EXECUTOR_PID
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR_PID != os.getpid():
+            _EXECUTORS.clear()
+            _EXECUTOR_PID = os.getpid()
+        executor = _EXECUTORS.get(pool)
+        if executor is None:
+            executor = _EXECUTORS[pool] = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix=f"swasthyasync-{pool}",
+            )
+        return executor
+
+
+def submit_to_pool(
+    pool: str, max_workers: int, fn: Callable[..., Any], *args: Any, **kwargs: Any
+) -> Future:
+    """
+    Run ``fn`` on the named worker-local pool inside an app context.
+
+    ``max_workers`` only applies when the pool is first created. Exceptions
+    are logged rather than lost with the discarded future.
+    """
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+    executor = _get_executor(pool, max_workers)
+
+    def _run() -> Any:
+        with app.app_context():
+            try:
+                return fn(*args, **kwargs)
+            except Exception:  # pragma: no cover - defensive
+                logger.exception("Background task %s failed", getattr(fn, "__name__", fn))
+                raise
+
+    return executor.submit(_run)
+
+
+def submit_background(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """Run ``fn`` on the general background pool (meal analysis jobs)."""
+    workers = int(current_app.config.get("BACKGROUND_WORKERS", 2))
+    return submit_to_pool("bg", workers, fn, *args, **kwargs)
@@ -0,0 +1,278 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import String, cast, func, select
+
+from extensions import db  # type: ignore
+from models.lifestyle_model import UserLifestyle
+from models.nutrition_model import NutritionLog
+from services.sleep_service import EXCESSIVE_HOURS, OPTIMAL_MAX_HOURS, OPTIMAL_MIN_HOURS
+from services.sql_dates_service import minute_of_day
+from services.timing_analysis_service import (
+    DINNER_BEFORE_SLEEP_MINUTES,
+    EARLY_LUNCH_ADVICE,
+    EARLY_LUNCH_MINUTES,
+    LATE_DINNER_ADVICE,
+    LONG_GAP_ADVICE,
+    LONG_GAP_MINUTES,
+)
+
+# Minutes-since-midnight value for a lifestyle time that is not set.
+MISSING = -1
+
+MINUTES_PER_DAY = 24 * 60
+
+LIFESTYLE_FIELDS = (
+    "wake_time",
+    "breakfast_time",
+    "lunch_time",
+    "snack_time",
+    "dinner_time",
+    "sleep_time",
+)
+
+# Python-rounded hours for every possible duration, so batch results match
+# ``round(seconds / 3600, 2)`` in ``calculate_sleep_analysis`` bit for bit.
+_SLEEP_HOURS = np.array([round(minutes / 60.0, 2) for minutes in range(MINUTES_PER_DAY + 1)])
+
+# Message and tags for each combination of (early_lunch, long_gap, late_dinner),
+# indexed by early_lunch | long_gap << 1 | late_dinner << 2.
+_RULES = (
+    (EARLY_LUNCH_ADVICE, "early_lunch"),
+    (LONG_GAP_ADVICE, "long_gap_snack_suggestion"),
+    (LATE_DINNER_ADVICE, "late_dinner"),
+)
+_FEEDBACK_MESSAGES = np.array(
+    [" ".join(text for bit, (text, _) in enumerate(_RULES) if code >> bit & 1) for code in range(8)],
+    dtype=object,
+)
+_FEEDBACK_TAGS = np.array(
+    [",".join(tag for bit, (_, tag) in enumerate(_RULES) if code >> bit & 1) for code in range(8)],
+    dtype=object,
+)
+
+
+def _int_array(values: Iterable[Optional[int]]) -> np.ndarray:
+    return np.array([MISSING if value is None else value for value in values], dtype=np.int64)
+
+
+def sleep_analysis_arrays(wake: np.ndarray, sleep: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized ``calculate_sleep_analysis`` over minutes-since-midnight arrays.
+
+    Returns ``sleep_hours`` (NaN where unknown) and ``sleep_status`` arrays.
+    """
+    known = (wake != MISSING) & (sleep != MISSING)
+    duration = np.mod(wake - sleep, MINUTES_PER_DAY)
+    # Equal times mean a full day, as in the scalar version.
+    duration[duration == 0] = MINUTES_PER_DAY
+    hours = np.where(known, _SLEEP_HOURS[np.where(known, duration, 0)], np.nan)
+
+    status = np.select(
+        [
+            ~known,
+            hours < OPTIMAL_MIN_HOURS,
+            hours <= OPTIMAL_MAX_HOURS,
+            hours > EXCESSIVE_HOURS,
+        ],
+        ["unknown", "insufficient", "optimal", "excessive"],
+        default="borderline",
+    ).astype(object)
+    return {"sleep_hours": hours, "sleep_status": status}
+
+
+def meal_timing_arrays(
+    *,
+    now: np.ndarray,
+    last_meal: np.ndarray,
+    has_last_meal: np.ndarray,
+    is_lunch: np.ndarray,
+    is_dinner: np.ndarray,
+    has_lifestyle: np.ndarray,
+    lunch: np.ndarray,
+    dinner: np.ndarray,
+    sleep: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized ``analyze_meal_timing`` rules for many meal events at once.
+
+    ``now`` is the meal's minute of day; ``last_meal`` is the previous meal in
+    minutes relative to the same midnight (negative for earlier days). Both
+    are truncated to the minute, which leaves every comparison against the
+    minute-resolution lifestyle times unchanged.
+    """
+    has_lunch = has_lifestyle & (lunch != MISSING)
+    has_dinner = has_lifestyle & (dinner != MISSING)
+    has_sleep = has_lifestyle & (sleep != MISSING)
+
+    early_lunch = is_lunch & has_lunch & (now < lunch - EARLY_LUNCH_MINUTES)
+
+    # Next scheduled main meal (lunch or dinner) after the previous meal.
+    lunch_next = has_lunch & (lunch > last_meal)
+    dinner_next = has_dinner & (dinner > last_meal)
+    next_meal = np.minimum(
+        np.where(lunch_next, lunch, np.iinfo(np.int64).max),
+        np.where(dinner_next, dinner, np.iinfo(np.int64).max),
+    )
+    long_gap = (
+        has_lifestyle
+        & has_last_meal
+        & (lunch_next | dinner_next)
+        & (next_meal - last_meal > LONG_GAP_MINUTES)
+    )
+
+    sleep_after_dinner = np.where(sleep <= dinner, sleep + MINUTES_PER_DAY, sleep)
+    late_dinner = (
+        is_dinner
+        & has_dinner
+        & has_sleep
+        & (dinner > sleep_after_dinner - DINNER_BEFORE_SLEEP_MINUTES)
+    )
+
+    code = early_lunch.astype(np.int8) | (long_gap.astype(np.int8) << 1) | (
+        late_dinner.astype(np.int8) << 2
+    )
+    return {
+        "early_lunch": early_lunch,
+        "long_gap": long_gap,
+        "late_dinner": late_dinner,
+        "message": _FEEDBACK_MESSAGES[code],
+        "tags": _FEEDBACK_TAGS[code],
+    }
+
+
+def load_lifestyle_minutes(user_ids: Optional[Iterable[int]] = None) -> Dict[str, np.ndarray]:
+    """Every stored lifestyle as ``user_id`` plus one minutes array per time field."""
+    query = select(
+        UserLifestyle.user_id,
+        *[minute_of_day(getattr(UserLifestyle, field)) for field in LIFESTYLE_FIELDS],
+    ).order_by(UserLifestyle.user_id)
+    if user_ids is not None:
+        query = query.where(UserLifestyle.user_id.in_(list(user_ids)))
+    rows = db.session.execute(query).all()
+
+    columns = list(zip(*rows)) if rows else [()] * (len(LIFESTYLE_FIELDS) + 1)
+    result = {"user_id": np.array(columns[0], dtype=np.int64)}
+    for field, values in zip(LIFESTYLE_FIELDS, columns[1:]):
+        result[field] = _int_array(values)
+    return result
+
+
+def batch_sleep_analysis(user_ids: Optional[Iterable[int]] = None) -> Dict[str, np.ndarray]:
+    """Sleep hours and status for every user with a stored lifestyle."""
+    lifestyles = load_lifestyle_minutes(user_ids)
+    return {
+        "user_id": lifestyles["user_id"],
+        **sleep_analysis_arrays(lifestyles["wake_time"], lifestyles["sleep_time"]),
+    }
+
+
+def _minutes_since_epoch(values: Iterable[str]) -> np.ndarray:
+    """Parse stored ``YYYY-MM-DD HH:MM:SS[.ffffff]`` strings, truncated to the minute."""
+    return (
+        np.array(list(values), dtype="datetime64[us]").astype("datetime64[m]").astype(np.int64)
+    )
+
+
+def _match(keys: np.ndarray, lookup: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Position of each key in the sorted ``lookup`` array and whether it is there.
+
+    Missing keys get position ``len(lookup)``, so callers index arrays padded
+    with one default value.
+    """
+    position = np.searchsorted(lookup, keys)
+    found = np.zeros(len(keys), dtype=bool)
+    inside = position < len(lookup)
+    found[inside] = lookup[position[inside]] == keys[inside]
+    position[~found] = len(lookup)
+    return position, found
+
+
+def batch_meal_timing(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_ids: Optional[Iterable[int]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Timing feedback for every meal log in ``[start, end)``.
+
+    Each log is judged as it would have been when it was created: against
+    the user's previous log and the user's current lifestyle times. Logs
+    are read in ``(user_id, logged_at)`` index order, so the previous log is
+    the preceding row of the same user.
+    """
+    user_ids = None if user_ids is None else list(user_ids)
+    # The stored text parses straight into datetime64, skipping per-row
+    # datetime objects.
+    logged_at_text = cast(NutritionLog.logged_at, String)
+    query = select(
+        NutritionLog.id,
+        NutritionLog.user_id,
+        func.lower(NutritionLog.meal_label),
+        logged_at_text,
+    ).order_by(NutritionLog.user_id, NutritionLog.logged_at, NutritionLog.id)
+    if user_ids is not None:
+        query = query.where(NutritionLog.user_id.in_(user_ids))
+    if start is not None:
+        query = query.where(NutritionLog.logged_at >= start)
+    if end is not None:
+        query = query.where(NutritionLog.logged_at < end)
+    rows = db.session.execute(query).all()
+    log_ids, owners, labels, logged_at = (
+        (list(column) for column in zip(*rows)) if rows else ([] for _ in range(4))
+    )
+
+    owners_array = np.array(owners, dtype=np.int64)
+    labels_array = np.array(labels, dtype=object)
+    stamps = _minutes_since_epoch(logged_at)
+    day_start = stamps - np.mod(stamps, MINUTES_PER_DAY)
+
+    has_last_meal = np.zeros(len(stamps), dtype=bool)
+    has_last_meal[1:] = owners_array[1:] == owners_array[:-1]
+    previous = np.zeros(len(stamps), dtype=np.int64)
+    previous[1:] = stamps[:-1]
+
+    if start is not None:
+        # A user's first log in the window follows their last one before it.
+        earlier_query = (
+            select(NutritionLog.user_id, cast(func.max(NutritionLog.logged_at), String))
+            .where(NutritionLog.logged_at < start)
+            .group_by(NutritionLog.user_id)
+            .order_by(NutritionLog.user_id)
+        )
+        if user_ids is not None:
+            earlier_query = earlier_query.where(NutritionLog.user_id.in_(user_ids))
+        earlier = db.session.execute(earlier_query).all()
+        if earlier:
+            earlier_users, earlier_at = zip(*earlier)
+            position, found = _match(owners_array, np.array(earlier_users, dtype=np.int64))
+            use_earlier = found & ~has_last_meal
+            previous[use_earlier] = np.append(_minutes_since_epoch(earlier_at), 0)[
+                position[use_earlier]
+            ]
+            has_last_meal |= use_earlier
+
+    lifestyles = load_lifestyle_minutes(user_ids)
+    position, has_lifestyle = _match(owners_array, lifestyles["user_id"])
+
+    def lifestyle_column(field: str) -> np.ndarray:
+        return np.append(lifestyles[field], MISSING)[position]
+
+    flags = meal_timing_arrays(
+        now=stamps - day_start,
+        last_meal=np.where(has_last_meal, previous - day_start, 0),
+        has_last_meal=has_last_meal,
+        is_lunch=labels_array == "lunch",
+        is_dinner=labels_array == "dinner",
+        has_lifestyle=has_lifestyle,
+        lunch=lifestyle_column("lunch_time"),
+        dinner=lifestyle_column("dinner_time"),
+        sleep=lifestyle_column("sleep_time"),
+    )
+    return {
+        "log_id": np.array(log_ids, dtype=np.int64),
+        "user_id": owners_array,
+        **flags,
+    }
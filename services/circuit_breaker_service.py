@@ -0,0 +1,177 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# Deadlines fall back to the configured maximum until this many samples exist.
+_MIN_LATENCY_SAMPLES = 10
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the model while a breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Worker-local breaker for one kind of Gemini call.
+
+    ``failure_threshold`` consecutive failures open the circuit; while open,
+    callers fall back immediately. After ``reset_seconds`` a single probe is
+    let through (half-open) and its outcome closes or re-opens the circuit.
+    Successful call latencies feed the per-call deadline.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float, window: int) -> None:
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._latencies: "deque[float]" = deque(maxlen=max(1, window))
+        self._counts = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def is_open(self) -> bool:
+        """True while callers should skip the model without probing."""
+        with self._lock:
+            return (
+                self._state == STATE_OPEN
+                and time.monotonic() - self._opened_at < self.reset_seconds
+            )
+
+    def allow(self) -> bool:
+        """Return True if a call may go to the model right now."""
+        with self._lock:
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_OPEN:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    self._counts["rejected"] += 1
+                    return False
+                self._state = STATE_HALF_OPEN
+                self._probe_in_flight = False
+            # Half-open: exactly one probe at a time.
+            if self._probe_in_flight:
+                self._counts["rejected"] += 1
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def abandon(self) -> None:
+        """Give back a granted call that never reached the model."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self, latency_seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(latency_seconds)
+            self._counts["successes"] += 1
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            if self._state != STATE_CLOSED:
+                logger.info("Gemini %s circuit closed after successful probe.", self.name)
+            self._state = STATE_CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._counts["failures"] += 1
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if (
+                self._state == STATE_HALF_OPEN
+                or self._consecutive_failures >= self.failure_threshold
+            ):
+                if self._state != STATE_OPEN:
+                    self._counts["opened"] += 1
+                    logger.warning(
+                        "Gemini %s circuit opened after %s consecutive failures.",
+                        self.name,
+                        self._consecutive_failures,
+                    )
+                self._state = STATE_OPEN
+                self._opened_at = time.monotonic()
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < _MIN_LATENCY_SAMPLES:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(percentile * len(samples)) - 1))
+        return samples[index]
+
+    def deadline(self, percentile: float, multiplier: float, floor: float, ceiling: float) -> float:
+        """Per-call timeout: a multiple of the rolling latency percentile."""
+        observed = self.latency_percentile(percentile)
+        if observed is None:
+            return ceiling
+        return min(ceiling, max(floor, observed * multiplier))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._state
+            if state == STATE_OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                state = STATE_HALF_OPEN
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "samples": len(self._latencies),
+                **self._counts,
+            }
+
+
+_BREAKERS_LOCK = threading.Lock()
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return this worker's breaker for ``name``, creating it from config."""
+    breaker = _BREAKERS.get(name)
+    if breaker is not None:
+        return breaker
+    config = current_app.config
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=int(config.get("GEMINI_BREAKER_FAILURE_THRESHOLD", 5)),
+                reset_seconds=float(config.get("GEMINI_BREAKER_RESET_SECONDS", 30)),
+                window=int(config.get("GEMINI_LATENCY_WINDOW", 100)),
+            )
+            _BREAKERS[name] = breaker
+        return breaker
+
+
+def get_call_deadline(breaker: CircuitBreaker) -> float:
+    """Timeout in seconds for the next call guarded by ``breaker``."""
+    config = current_app.config
+    return breaker.deadline(
+        percentile=float(config.get("GEMINI_TIMEOUT_PERCENTILE", 0.95)),
+        multiplier=float(config.get("GEMINI_TIMEOUT_MULTIPLIER", 2.0)),
+        floor=float(config.get("GEMINI_TIMEOUT_MIN_SECONDS", 10)),
+        ceiling=float(config.get("GEMINI_TIMEOUT_MAX_SECONDS", 90)),
+    )
+
+
+def get_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    with _BREAKERS_LOCK:
+        breakers = list(_BREAKERS.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+def reset_breakers() -> None:
+    """Forget all breaker state; called when the Gemini API key changes."""
+    with _BREAKERS_LOCK:
+        _BREAKERS.clear()
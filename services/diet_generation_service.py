@@ -0,0 +1,233 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from flask import current_app
+
+from extensions import db  # type: ignore
+from models.diet_model import DietRequest
+from services.background_service import submit_to_pool
+from services.gemini_service import generate_diet_plan
+
+logger = logging.getLogger(__name__)
+
+# Partial meal sections streamed by this worker, keyed by DietRequest id.
+# SSE clients served by another process still get status updates from the
+# database; they only miss the early previews.
+_PROGRESS = threading.Condition()
+_SECTIONS: Dict[int, List[Tuple[str, Dict[str, Any]]]] = {}
+_FINISHED_AT: Dict[int, float] = {}
+# Requests being generated in this process: their streams wait on
+# _PROGRESS instead of polling the database.
+_RUNNING: Set[int] = set()
+_PROGRESS_RETENTION_SECONDS = 300
+
+# Open SSE streams in this process; each one holds a WSGI worker thread.
+_STREAMS_LOCK = threading.Lock()
+_OPEN_STREAMS = 0
+
+# Database polling for plans generated by another process backs off to this.
+_MAX_POLL_SECONDS = 3.0
+
+
+def _prune_progress(now: float) -> None:
+    for request_id, finished_at in list(_FINISHED_AT.items()):
+        if now - finished_at > _PROGRESS_RETENTION_SECONDS:
+            _FINISHED_AT.pop(request_id, None)
+            _SECTIONS.pop(request_id, None)
+
+
+def _publish_section(request_id: int, key: str, section: Dict[str, Any]) -> None:
+    with _PROGRESS:
+        _SECTIONS.setdefault(request_id, []).append((key, section))
+        _PROGRESS.notify_all()
+
+
+def _mark_finished(request_id: int) -> None:
+    with _PROGRESS:
+        _RUNNING.discard(request_id)
+        now = time.time()
+        _FINISHED_AT[request_id] = now
+        _prune_progress(now)
+        _PROGRESS.notify_all()
+
+
+def _generate_for_request(request_id: int) -> None:
+    try:
+        diet_req = db.session.get(DietRequest, request_id)
+        if diet_req is None:
+            return
+
+        streaming = bool(current_app.config.get("DIET_PLAN_STREAMING", True))
+        started = time.perf_counter()
+        try:
+            diet_response = generate_diet_plan(
+                diet_req.prompt_payload,
+                on_partial=(
+                    (lambda key, section: _publish_section(request_id, key, section))
+                    if streaming
+                    else None
+                ),
+            )
+            diet_req.response_payload = diet_response
+            diet_req.record_ai_response(
+                diet_response, round((time.perf_counter() - started) * 1000)
+            )
+            diet_req.status = DietRequest.STATUS_READY
+        except Exception:
+            db.session.rollback()
+            logger.exception("Background diet generation failed for request %s", request_id)
+            diet_req = db.session.get(DietRequest, request_id)
+            if diet_req is None:
+                return
+            diet_req.status = DietRequest.STATUS_FAILED
+        db.session.commit()
+    finally:
+        # Always release local SSE waiters, whatever happened above.
+        _mark_finished(request_id)
+
+
+def start_diet_generation(diet_req: DietRequest) -> None:
+    """Generate the plan for a pending ``DietRequest`` on the diet plan pool."""
+    with _PROGRESS:
+        _RUNNING.add(diet_req.id)
+    workers = int(current_app.config.get("DIET_PLAN_WORKERS", 2))
+    submit_to_pool("diet", workers, _generate_for_request, diet_req.id)
+
+
+def fail_stale_diet_request(request_id: int, requested_at: datetime) -> bool:
+    """
+    Mark a ``pending`` request orphaned by a crashed or restarted worker as
+    ``failed`` once it is older than DIET_PLAN_STALE_SECONDS.
+
+    Requests still generating in this process are left alone. Returns True
+    when the request is (now) failed.
+    """
+    with _PROGRESS:
+        if request_id in _RUNNING:
+            return False
+    stale_after = int(current_app.config.get("DIET_PLAN_STALE_SECONDS", 300))
+    if requested_at > datetime.utcnow() - timedelta(seconds=stale_after):
+        return False
+    updated = DietRequest.query.filter(
+        DietRequest.id == request_id,
+        DietRequest.status == DietRequest.STATUS_PENDING,
+    ).update({"status": DietRequest.STATUS_FAILED}, synchronize_session=False)
+    db.session.commit()
+    if updated:
+        logger.warning("Diet request %s was stale in pending; marked failed", request_id)
+    return bool(updated)
+
+
+def _sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _claim_stream() -> bool:
+    global _OPEN_STREAMS
+    limit = int(current_app.config.get("DIET_PLAN_SSE_MAX_STREAMS", 8))
+    with _STREAMS_LOCK:
+        if _OPEN_STREAMS >= limit:
+            return False
+        _OPEN_STREAMS += 1
+        return True
+
+
+def _release_stream() -> None:
+    global _OPEN_STREAMS
+    with _STREAMS_LOCK:
+        _OPEN_STREAMS -= 1
+
+
+def _current_status(request_id: int) -> Optional[str]:
+    status = (
+        db.session.query(DietRequest.status)
+        .filter(DietRequest.id == request_id)
+        .scalar()
+    )
+    # End the read transaction so the next poll sees other writers.
+    db.session.rollback()
+    return status
+
+
+def iter_diet_plan_events(
+    request_id: int,
+    done_url: str,
+    requested_at: datetime,
+    resume_from: int = 0,
+) -> Iterator[str]:
+    """
+    Yield Server-Sent Events for a diet request until it leaves ``pending``.
+
+    Emits ``status`` once, ``partial`` for each streamed meal section (with
+    its index as the event id), then ``done``/``failed`` (both with the URL
+    to load) or ``timeout`` once DIET_PLAN_SSE_TIMEOUT_SECONDS have passed
+    since the request was made.
+
+    Each connection holds a worker thread, so it is closed after
+    DIET_PLAN_SSE_STREAM_SECONDS and the browser's EventSource reconnects,
+    resuming after ``resume_from`` (its Last-Event-ID). Past
+    DIET_PLAN_SSE_MAX_STREAMS open streams the client is told to retry
+    later. Plans generated in this process are followed through in-memory
+    progress; others are polled in the database with backoff.
+    """
+    config = current_app.config
+    if not _claim_stream():
+        yield "retry: 5000\n\n"
+        return
+    try:
+        timeout = float(config.get("DIET_PLAN_SSE_TIMEOUT_SECONDS", 120))
+        deadline = time.monotonic() + max(
+            0.0, timeout - (datetime.utcnow() - requested_at).total_seconds()
+        )
+        stream_deadline = time.monotonic() + float(config.get("DIET_PLAN_SSE_STREAM_SECONDS", 25))
+        poll_interval = 0.5
+        sent = resume_from
+        last_write = time.monotonic()
+
+        if not resume_from:
+            yield _sse("status", {"status": DietRequest.STATUS_PENDING})
+        while True:
+            with _PROGRESS:
+                local = request_id in _RUNNING
+                sections = _SECTIONS.get(request_id, [])
+                if len(sections) <= sent and request_id not in _FINISHED_AT:
+                    _PROGRESS.wait(poll_interval)
+                    sections = _SECTIONS.get(request_id, [])
+                fresh = sections[sent:]
+                local = local and request_id in _RUNNING
+            for index, (key, section) in enumerate(fresh, start=sent + 1):
+                yield _sse("partial", {"key": key, "section": section}, event_id=index)
+                last_write = time.monotonic()
+            sent += len(fresh)
+
+            status = DietRequest.STATUS_PENDING if local else _current_status(request_id)
+            if status == DietRequest.STATUS_READY:
+                yield _sse("done", {"status": status, "redirect_url": done_url})
+                return
+            if status != DietRequest.STATUS_PENDING:
+                yield _sse("failed", {"status": status or "missing", "redirect_url": done_url})
+                return
+            now = time.monotonic()
+            if now > deadline:
+                if fail_stale_diet_request(request_id, requested_at):
+                    yield _sse("failed", {"status": DietRequest.STATUS_FAILED, "redirect_url": done_url})
+                else:
+                    yield _sse("timeout", {"status": status})
+                return
+            if now > stream_deadline:
+                # Free this worker; EventSource reconnects after ``retry`` ms.
+                yield "retry: 1000\n\n"
+                return
+            if now - last_write > 15:
+                # Comment line keeps proxies from closing an idle stream.
+                yield ": keep-alive\n\n"
+                last_write = now
+            if not local:
+                poll_interval = min(poll_interval * 1.5, _MAX_POLL_SECONDS)
+    finally:
+        _release_stream()
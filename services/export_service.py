@@ -0,0 +1,257 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import select
+
+from extensions import db  # type: ignore
+from models.diet_model import DietRequest
+from models.nutrition_model import NutritionLog
+
+try:  # Parquet export is optional.
+    import pyarrow as pa  # type: ignore[import]
+    import pyarrow.parquet as pq  # type: ignore[import]
+except ImportError:  # pragma: no cover - depends on the environment
+    pa = None
+    pq = None
+
+DATASET_NUTRITION = "nutrition"
+DATASET_DIET = "diet"
+DATASETS = (DATASET_NUTRITION, DATASET_DIET)
+
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+FORMAT_PARQUET = "parquet"
+FORMATS = (FORMAT_CSV, FORMAT_JSONL, FORMAT_PARQUET)
+
+MIME_TYPES = {
+    FORMAT_CSV: "text/csv",
+    FORMAT_JSONL: "application/x-ndjson",
+    FORMAT_PARQUET: "application/vnd.apache.parquet",
+}
+
+# (column, parquet type name) per dataset; JSON payloads are exported as text.
+_NUTRITION_COLUMNS: Sequence[Tuple[str, str]] = (
+    ("id", "int64"),
+    ("user_id", "int64"),
+    ("logged_at", "timestamp"),
+    ("meal_label", "string"),
+    *[(key, "float64") for key in NutritionLog.MACRO_FIELDS],
+    ("ai_food_summary", "string"),
+    ("ai_guidance", "string"),
+)
+_DIET_COLUMNS: Sequence[Tuple[str, str]] = (
+    ("id", "int64"),
+    ("user_id", "int64"),
+    ("created_at", "timestamp"),
+    ("status", "string"),
+    ("ai_model", "string"),
+    ("response_latency_ms", "int64"),
+    ("prompt_payload", "json"),
+    ("response_payload", "json"),
+)
+
+
+class ExportError(ValueError):
+    """The requested export cannot be produced."""
+
+
+def available_formats() -> Tuple[str, ...]:
+    return FORMATS if pa is not None else (FORMAT_CSV, FORMAT_JSONL)
+
+
+def export_filename(dataset: str, fmt: str, compress: bool) -> str:
+    name = f"swasthyasync-{dataset}-{datetime.now():%Y%m%d}.{fmt}"
+    return name + ".gz" if compress and fmt != FORMAT_PARQUET else name
+
+
+def _dataset(dataset: str) -> Tuple[Any, Any, Sequence[Tuple[str, str]]]:
+    """Model, timestamp column used for range filters, and export columns."""
+    if dataset == DATASET_NUTRITION:
+        return NutritionLog, NutritionLog.logged_at, _NUTRITION_COLUMNS
+    if dataset == DATASET_DIET:
+        return DietRequest, DietRequest.created_at, _DIET_COLUMNS
+    raise ExportError(f"Unknown dataset {dataset!r}.")
+
+
+def _iter_row_batches(
+    dataset: str,
+    user_id: Optional[int],
+    start: Optional[date],
+    end: Optional[date],
+) -> Iterator[List[Any]]:
+    """
+    Yield the export rows in batches from a streaming cursor.
+
+    Columns are selected directly (no ORM instances), so nothing accumulates
+    in the session and memory stays bounded by one batch.
+    """
+    model, timestamp, columns = _dataset(dataset)
+    query = select(*[getattr(model, name) for name, _ in columns]).order_by(timestamp, model.id)
+    if user_id is not None:
+        query = query.where(model.user_id == user_id)
+    if start is not None:
+        query = query.where(timestamp >= datetime.combine(start, datetime.min.time()))
+    if end is not None:
+        # ``end`` is inclusive: everything before the next midnight.
+        query = query.where(
+            timestamp < datetime.combine(end + timedelta(days=1), datetime.min.time())
+        )
+
+    batch_size = int(current_app.config.get("EXPORT_BATCH_SIZE", 1000))
+    result = db.session.execute(
+        query.execution_options(stream_results=True, yield_per=batch_size)
+    )
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+def _csv_value(value: Any, kind: str) -> Any:
+    if value is None:
+        return ""
+    if kind == "json":
+        return json.dumps(value, default=_json_default, ensure_ascii=False)
+    if kind == "timestamp":
+        return value.isoformat()
+    return value
+
+
+def _csv_chunks(batches: Iterator[List[Any]], columns: Sequence[Tuple[str, str]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    for batch in batches:
+        for row in batch:
+            writer.writerow([_csv_value(value, kind) for value, (_, kind) in zip(row, columns)])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _jsonl_chunks(
+    batches: Iterator[List[Any]], columns: Sequence[Tuple[str, str]]
+) -> Iterator[bytes]:
+    names = [name for name, _ in columns]
+    for batch in batches:
+        lines = [
+            json.dumps(dict(zip(names, row)), default=_json_default, ensure_ascii=False)
+            for row in batch
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to the caller on ``drain``."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore[override]
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_chunks(
+    batches: Iterator[List[Any]], columns: Sequence[Tuple[str, str]]
+) -> Iterator[bytes]:
+    """One Parquet row group per batch, flushed to the stream as it is written."""
+    types = {
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "string": pa.string(),
+        "json": pa.string(),
+        "timestamp": pa.timestamp("us"),
+    }
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in batches:
+            arrays = []
+            for index, (_, kind) in enumerate(columns):
+                values = [row[index] for row in batch]
+                if kind == "json":
+                    values = [
+                        None if value is None else json.dumps(value, default=_json_default)
+                        for value in values
+                    ]
+                arrays.append(pa.array(values, type=types[kind]))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_export(
+    dataset: str,
+    fmt: str,
+    user_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    compress: bool = False,
+) -> Iterator[bytes]:
+    """
+    Stream a nutrition-log or diet-request export as encoded byte chunks.
+
+    ``user_id=None`` exports every user. ``start``/``end`` are inclusive days
+    on ``logged_at`` (nutrition) or ``created_at`` (diet). CSV and JSONL can
+    be gzip-compressed on the fly; Parquet is always compressed per column
+    and ignores ``compress``. Raises ``ExportError`` up front for bad
+    arguments, before any data is read.
+    """
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown export format {fmt!r}.")
+    if fmt == FORMAT_PARQUET and pa is None:
+        raise ExportError("Parquet export needs the optional pyarrow package.")
+    _, _, columns = _dataset(dataset)
+
+    writers: Dict[str, Callable[..., Iterator[bytes]]] = {
+        FORMAT_CSV: _csv_chunks,
+        FORMAT_JSONL: _jsonl_chunks,
+        FORMAT_PARQUET: _parquet_chunks,
+    }
+    chunks = writers[fmt](_iter_row_batches(dataset, user_id, start, end), columns)
+    if compress and fmt != FORMAT_PARQUET:
+        chunks = _gzip(chunks)
+    return chunks
@@ -1,12 +1,61 @@
 import json
 import logging
-from typing import Any, Dict, Optional
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 
 import google.generativeai as genai  # type: ignore[import]
 from flask import current_app
 
+from services.circuit_breaker_service import (
+    CircuitOpenError,
+    get_breaker,
+    get_call_deadline,
+    reset_breakers,
+)
+from services.meal_cache_service import (
+    build_meal_cache_key,
+    get_cached_meal_analysis,
+    store_meal_analysis,
+)
+from services.plan_cache_service import (
+    build_plan_cache_key,
+    build_prompt_version,
+    canonicalize_prompt_payload,
+    get_cached_plan,
+    store_plan,
+)
+from services.metrics_service import record_gemini_call
+from services.singleflight_service import single_flight
+from services.rate_limit_service import RateLimitedError, outbound_call_slot
+from services.upload_service import ImageBuffer
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+# Process-wide Gemini client registry.  ``genai.configure`` tears down and
+# rebuilds the SDK's cached transport clients, so it must only run when the
+# API key actually changes, not on every request.  Models are keyed by
+# (api_key, model_name) and share the default generative client (and its
+# pooled gRPC channel) that the SDK creates for the configured key.
+_CLIENT_LOCK = threading.Lock()
+_CLIENT_REGISTRY: Dict[Tuple[str, str], Any] = {}
+_CONFIGURED_API_KEY: Optional[str] = None
+_CLIENT_STATS: Dict[str, int] = {"constructed": 0, "configured": 0}
+
+
+def get_client_stats() -> Dict[str, int]:
+    """Return how many Gemini clients this worker has configured/constructed."""
+    with _CLIENT_LOCK:
+        return {**_CLIENT_STATS, "cached": len(_CLIENT_REGISTRY)}
+
+
+def _model_name() -> str:
+    # Model name can be swapped centrally via config.
+    return current_app.config.get("GEMINI_MODEL_NAME") or "gemini-1.5-pro"
+
 
 def _get_client():
     """
@@ -14,15 +63,84 @@ def _get_client():
 
     In local/dev setups without GEMINI_API_KEY this returns None so that the
     caller can fall back to a deterministic, offline plan generator instead of
-    crashing the request.
+    crashing the request.  Clients are built once per worker and reused until
+    the configured key or model name changes.
     """
+    global _CONFIGURED_API_KEY
     api_key = current_app.config.get("GEMINI_API_KEY")
     if not api_key:
         logger.warning("GEMINI_API_KEY is not configured; using local fallback diet plan.")
         return None
-    genai.configure(api_key=api_key)
-    # Model name can be swapped centrally here.
-    return genai.GenerativeModel("gemini-1.5-pro")
+    model_name = _model_name()
+    key = (api_key, model_name)
+
+    model = _CLIENT_REGISTRY.get(key)
+    if model is not None:
+        return model
+
+    with _CLIENT_LOCK:
+        model = _CLIENT_REGISTRY.get(key)
+        if model is not None:
+            return model
+        if _CONFIGURED_API_KEY != api_key:
+            # Key rotated: clients bound to the old key are no longer valid,
+            # and failures/latencies recorded under it say nothing about the
+            # new one.
+            _CLIENT_REGISTRY.clear()
+            reset_breakers()
+            genai.configure(api_key=api_key)
+            _CONFIGURED_API_KEY = api_key
+            _CLIENT_STATS["configured"] += 1
+        model = genai.GenerativeModel(model_name)
+        _CLIENT_REGISTRY[key] = model
+        _CLIENT_STATS["constructed"] += 1
+        logger.info("Constructed Gemini client for model %s.", model_name)
+        return model
+
+
+def _guarded_call(
+    operation: str,
+    call: Callable[[float], T],
+    timing: Optional[Dict[str, float]] = None,
+) -> T:
+    """
+    Run ``call(timeout_seconds)`` under the circuit breaker for ``operation``.
+
+    Raises ``CircuitOpenError`` without calling the model while the circuit
+    is open; transport errors and timeouts count as breaker failures. The
+    call also holds a slot from the shared outbound rate limiter, which may
+    raise ``RateLimitedError`` instead. ``timing`` receives the milliseconds
+    spent waiting for that slot (``queue_wait_ms``) and in the model call
+    (``model_ms``).
+    """
+    timing = {} if timing is None else timing
+    breaker = get_breaker(operation)
+    if not breaker.allow():
+        record_gemini_call(operation, "circuit_open")
+        raise CircuitOpenError(operation)
+    queued = time.monotonic()
+    try:
+        with outbound_call_slot():
+            started = time.monotonic()
+            timing["queue_wait_ms"] = (started - queued) * 1000
+            try:
+                result = call(get_call_deadline(breaker))
+            except Exception:
+                elapsed = time.monotonic() - started
+                timing["model_ms"] = elapsed * 1000
+                breaker.record_failure()
+                record_gemini_call(operation, "error", elapsed)
+                raise
+    except RateLimitedError:
+        timing["queue_wait_ms"] = (time.monotonic() - queued) * 1000
+        breaker.abandon()
+        record_gemini_call(operation, "rate_limited")
+        raise
+    elapsed = time.monotonic() - started
+    timing["model_ms"] = elapsed * 1000
+    breaker.record_success(elapsed)
+    record_gemini_call(operation, "success", elapsed)
+    return result
 
 
 def _build_local_fallback_plan(prompt_payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -172,82 +290,242 @@ def _build_local_fallback_plan(prompt_payload: Dict[str, Any]) -> Dict[str, Any]
     }
 
 
-def generate_diet_plan(prompt_payload: Dict[str, Any]) -> Dict[str, Any]:
+DIET_SYSTEM_INSTRUCTION = (
+    "You are SwasthyaSync, an AI nutrition coach. "
+    "Use the provided JSON payload to create a structured Indian-context diet plan. "
+    "Use specific Indian dish names (not generic phrases) and include approximate portions in each item. "
+    "For each meal, return 2–4 options under items[] as 'Dish (portion) + add-on' style. "
+    "Avoid repeating the phrase 'aligned with your routine' inside summaries. "
+    "Strictly align meals with the user's actual meal times: "
+    "breakfast at breakfast_time, lunch at lunch_time, snacks at snack_time, "
+    "and dinner at dinner_time. Ensure dinner is scheduled at least 2–3 hours "
+    "before sleep_time, and if the supplied dinner_time is too close to sleep_time, "
+    "suggest a corrected timing and explain why. Distribute calories intelligently "
+    "across the wake window based on wake_time and sleep_time. "
+    "If sleep_status is 'insufficient', include concrete sleep hygiene advice in a "
+    "Lifestyle section. Generate hydration guidance as specific timing suggestions "
+    "between meals instead of generic advice. Respond ONLY with valid JSON matching "
+    "this structure: {"
+    '"meals": {'
+    '"early_morning": {...},'
+    '"breakfast": {...},'
+    '"mid_morning_snack": {...},'
+    '"lunch": {...},'
+    '"evening_snack": {...},'
+    '"dinner": {...}'
+    "},"
+    '"hydration": { "summary": str, "timing_suggestions": [str] },'
+    '"lifestyle": {'
+    '"sleep_hours": number | null,'
+    '"sleep_status": str,'
+    '"dinner_timing_feedback": str,'
+    '"recommended_workout_window": str'
+    "}"
+    "}"
+)
+
+
+DIET_MEAL_KEYS = (
+    "early_morning",
+    "breakfast",
+    "mid_morning_snack",
+    "lunch",
+    "evening_snack",
+    "dinner",
+)
+
+
+def _extract_completed_meals(text: str, seen: set) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield meal sections that are already complete JSON in a partial response.
+
+    Used while streaming so each ``meals.<key>`` object can be shown as soon
+    as its closing brace arrives, before the whole plan has been generated.
+    """
+    meals_at = text.find('"meals"')
+    if meals_at == -1:
+        return
+    decoder = json.JSONDecoder()
+    for key in DIET_MEAL_KEYS:
+        if key in seen:
+            continue
+        key_at = text.find(f'"{key}"', meals_at)
+        if key_at == -1:
+            continue
+        brace_at = text.find("{", key_at)
+        if brace_at == -1:
+            continue
+        try:
+            section, _ = decoder.raw_decode(text, brace_at)
+        except ValueError:
+            continue
+        if isinstance(section, dict):
+            yield key, section
+
+
+def _stream_diet_plan_text(
+    model: Any,
+    contents: List[Dict[str, Any]],
+    on_partial: Callable[[str, Dict[str, Any]], None],
+    timeout: float,
+) -> str:
+    """Stream the diet plan, reporting each finished meal section as it lands."""
+    chunks: List[str] = []
+    seen: set = set()
+    stream = model.generate_content(contents, stream=True, request_options={"timeout": timeout})
+    for chunk in stream:
+        chunks.append(getattr(chunk, "text", "") or "")
+        for key, section in _extract_completed_meals("".join(chunks), seen):
+            seen.add(key)
+            try:
+                on_partial(key, section)
+            except Exception:  # pragma: no cover - progress is best effort
+                logger.exception("Diet plan partial callback failed for %s", key)
+    return "".join(chunks)
+
+
+def get_diet_prompt_version() -> str:
+    """Version tag for cached plans; changes with the system prompt or model."""
+    return build_prompt_version(DIET_SYSTEM_INSTRUCTION, _model_name())
+
+
+def _with_cache_meta(plan: Dict[str, Any], state: str) -> Dict[str, Any]:
+    meta = plan.setdefault("meta", {})
+    if isinstance(meta, dict):
+        meta["cache"] = state
+    return plan
+
+
+def _with_circuit_meta(result: Dict[str, Any]) -> Dict[str, Any]:
+    meta = result.setdefault("meta", {})
+    if isinstance(meta, dict):
+        meta["circuit"] = "open"
+    return result
+
+
+def _with_throttle_meta(result: Dict[str, Any]) -> Dict[str, Any]:
+    meta = result.setdefault("meta", {})
+    if isinstance(meta, dict):
+        meta["rate_limited"] = True
+    return result
+
+
+def _with_fallback_reason(result: Dict[str, Any], reason: str) -> Dict[str, Any]:
+    meta = result.setdefault("meta", {})
+    if isinstance(meta, dict):
+        meta["fallback_reason"] = reason
+    return result
+
+
+def _with_timing_meta(result: Dict[str, Any], timing: Dict[str, float]) -> Dict[str, Any]:
+    meta = result.setdefault("meta", {})
+    if isinstance(meta, dict) and timing:
+        meta["timing"] = {key: int(round(value)) for key, value in timing.items()}
+    return result
+
+
+def _mark_coalesced(result: Dict[str, Any], shared: bool) -> Dict[str, Any]:
+    if shared and isinstance(result.get("meta"), dict):
+        result["meta"]["coalesced"] = True
+    return result
+
+
+def generate_diet_plan(
+    prompt_payload: Dict[str, Any],
+    on_partial: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
     """
     Call Gemini to generate a structured diet plan with lifestyle timing.
 
-    Returns a parsed JSON dictionary produced by the model.
+    Returns a parsed JSON dictionary produced by the model. When
+    ``on_partial`` is given the response is streamed and the callback
+    receives ``(meal_key, meal_section)`` for each meal as it completes.
+
+    Plans are cached on a canonicalised payload; ``meta.cache`` records
+    whether the response was a cache "hit", a stored "miss" or a "bypass"
+    (local fallback, never cached). Model answers also carry ``meta.model``
+    and ``meta.timing`` (``queue_wait_ms``, ``model_ms``, ``parse_ms``);
+    fallbacks carry ``meta.fallback_reason``.
     """
-    system_instruction = (
-        "You are SwasthyaSync, an AI nutrition coach. "
-        "Use the provided JSON payload to create a structured Indian-context diet plan. "
-        "Use specific Indian dish names (not generic phrases) and include approximate portions in each item. "
-        "For each meal, return 2–4 options under items[] as 'Dish (portion) + add-on' style. "
-        "Avoid repeating the phrase 'aligned with your routine' inside summaries. "
-        "Strictly align meals with the user's actual meal times: "
-        "breakfast at breakfast_time, lunch at lunch_time, snacks at snack_time, "
-        "and dinner at dinner_time. Ensure dinner is scheduled at least 2–3 hours "
-        "before sleep_time, and if the supplied dinner_time is too close to sleep_time, "
-        "suggest a corrected timing and explain why. Distribute calories intelligently "
-        "across the wake window based on wake_time and sleep_time. "
-        "If sleep_status is 'insufficient', include concrete sleep hygiene advice in a "
-        "Lifestyle section. Generate hydration guidance as specific timing suggestions "
-        "between meals instead of generic advice. Respond ONLY with valid JSON matching "
-        "this structure: {"
-        '"meals": {'
-        '"early_morning": {...},'
-        '"breakfast": {...},'
-        '"mid_morning_snack": {...},'
-        '"lunch": {...},'
-        '"evening_snack": {...},'
-        '"dinner": {...}'
-        "},"
-        '"hydration": { "summary": str, "timing_suggestions": [str] },'
-        '"lifestyle": {'
-        '"sleep_hours": number | null,'
-        '"sleep_status": str,'
-        '"dinner_timing_feedback": str,'
-        '"recommended_workout_window": str'
-        "}"
-        "}"
-    )
+    canonical_payload = canonicalize_prompt_payload(prompt_payload)
+    cache_key = build_plan_cache_key(canonical_payload)
+    prompt_version = get_diet_prompt_version()
+    cached = get_cached_plan(cache_key, prompt_version, prompt_payload)
+    if cached is not None:
+        return cached
 
     model = _get_client()
     if model is None:
         # Local deterministic fallback when no API key is configured.
-        return _build_local_fallback_plan(prompt_payload)
+        plan = _with_cache_meta(_build_local_fallback_plan(prompt_payload), "bypass")
+        return _with_fallback_reason(plan, "no_api_key")
+    if get_breaker("diet").is_open():
+        # Gemini is failing: answer now instead of tying up the worker.
+        record_gemini_call("diet", "circuit_open")
+        plan = _with_cache_meta(_build_local_fallback_plan(prompt_payload), "bypass")
+        return _with_fallback_reason(_with_circuit_meta(plan), "circuit_open")
+
+    contents = [
+        {"role": "system", "parts": [DIET_SYSTEM_INSTRUCTION]},
+        {
+            "role": "user",
+            "parts": [
+                "Here is the combined user profile JSON for diet generation:\n",
+                json.dumps(prompt_payload),
+            ],
+        },
+    ]
 
-    try:
-        response = model.generate_content(
-            [
-                {"role": "system", "parts": [system_instruction]},
-                {
-                    "role": "user",
-                    "parts": [
-                        "Here is the combined user profile JSON for diet generation:\n",
-                        json.dumps(prompt_payload),
-                    ],
-                },
-            ]
-        )
-        text = response.text or "{}"
-        parsed: Dict[str, Any] = json.loads(text)
-        if isinstance(parsed, dict):
-            parsed.setdefault("meta", {})
-            if isinstance(parsed.get("meta"), dict):
-                parsed["meta"].setdefault("source", "gemini")
-        return parsed
-    except Exception as exc:  # pragma: no cover - defensive
-        logger.exception("Gemini diet generation failed: %s", exc)
-        # Fallback minimal safe structure
-        return _build_local_fallback_plan(prompt_payload)
+    def _call_model() -> Dict[str, Any]:
+        def _request(timeout: float) -> str:
+            if on_partial is not None:
+                return _stream_diet_plan_text(model, contents, on_partial, timeout)
+            response = model.generate_content(contents, request_options={"timeout": timeout})
+            return response.text
+
+        timing: Dict[str, float] = {}
+        try:
+            text = _guarded_call("diet", _request, timing) or "{}"
+            parse_started = time.monotonic()
+            parsed: Dict[str, Any] = json.loads(text)
+            if isinstance(parsed, dict):
+                parsed.setdefault("meta", {})
+                if isinstance(parsed.get("meta"), dict):
+                    parsed["meta"].setdefault("source", "gemini")
+                    parsed["meta"]["model"] = _model_name()
+                timing["parse_ms"] = (time.monotonic() - parse_started) * 1000
+                store_plan(cache_key, prompt_version, canonical_payload, parsed)
+                _with_timing_meta(_with_cache_meta(parsed, "miss"), timing)
+            return parsed
+        except CircuitOpenError:
+            plan = _with_cache_meta(_build_local_fallback_plan(prompt_payload), "bypass")
+            return _with_fallback_reason(_with_circuit_meta(plan), "circuit_open")
+        except RateLimitedError:
+            plan = _with_cache_meta(_build_local_fallback_plan(prompt_payload), "bypass")
+            plan = _with_fallback_reason(_with_throttle_meta(plan), "rate_limited")
+            return _with_timing_meta(plan, timing)
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.exception("Gemini diet generation failed: %s", exc)
+            # Fallback minimal safe structure
+            plan = _with_cache_meta(_build_local_fallback_plan(prompt_payload), "bypass")
+            return _with_timing_meta(_with_fallback_reason(plan, "error"), timing)
+
+    # Identical submissions racing each other (double clicks, several
+    # workers) wait for one model call and read its cached plan.
+    plan, shared = single_flight(
+        f"diet:{prompt_version}:{cache_key}",
+        _call_model,
+        lambda: get_cached_plan(cache_key, prompt_version, prompt_payload, record_stats=False),
+    )
+    return _mark_coalesced(plan, shared)
 
 
 def analyze_meal_from_image(
     *,
-    image_bytes: bytes,
+    image_bytes: ImageBuffer,
     mime_type: str,
     meal_label: Optional[str] = None,
+    content_hash: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Use Gemini (when available) to analyse a meal image and return nutrition.
@@ -270,14 +548,37 @@ def analyze_meal_from_image(
           "flags": [str],
           "next_meal_suggestions": [str],
         },
-        "meta": {"source": "gemini" | "fallback"},
+        "meta": {"source": "gemini" | "fallback", "cache": "hit" (optional)},
       }
+
+    Model answers add ``meta.model`` and ``meta.timing`` as for diet plans;
+    fallbacks add ``meta.fallback_reason``.
+
+    Model results are cached by image content + mime type + meal label, so a
+    re-uploaded photo is answered without another Gemini call. Pass the
+    upload's ``content_hash`` when it was already hashed while streaming.
+    Concurrent requests for the same key share a single in-flight call.
     """
+    cache_key = build_meal_cache_key(image_bytes, mime_type, meal_label, content_hash)
+    cached = get_cached_meal_analysis(cache_key)
+    if cached is not None:
+        return cached
+
     model = _get_client()
     if model is None:
-        return _build_local_meal_analysis_fallback(meal_label=meal_label)
-
-    image_part = {"mime_type": mime_type, "data": image_bytes}
+        return _with_fallback_reason(
+            _build_local_meal_analysis_fallback(meal_label=meal_label), "no_api_key"
+        )
+    if get_breaker("meal").is_open():
+        record_gemini_call("meal", "circuit_open")
+        analysis = _with_circuit_meta(_build_local_meal_analysis_fallback(meal_label=meal_label))
+        return _with_fallback_reason(analysis, "circuit_open")
+
+    # The SDK needs real bytes; file-backed buffers are only copied here.
+    image_part = {
+        "mime_type": mime_type,
+        "data": image_bytes if isinstance(image_bytes, bytes) else bytes(image_bytes),
+    }
 
     instruction = (
         "You are an expert nutritionist. Estimate nutrition for the meal image. "
@@ -305,56 +606,80 @@ def analyze_meal_from_image(
         "}"
     )
 
-    try:
-        response = model.generate_content(
-            [
-                {"role": "system", "parts": [instruction]},
-                {
-                    "role": "user",
-                    "parts": [
-                        "Analyse this plate of food and estimate macros and calories.",
-                        image_part,
-                    ],
-                },
-            ]
-        )
-        text = response.text or "{}"
-        parsed: Dict[str, Any] = json.loads(text)
-        if not isinstance(parsed, dict):
-            raise ValueError("Unexpected JSON from Gemini meal analysis")
-
-        parsed.setdefault("dish_name", None)
-        parsed.setdefault("metrics", {})
-        metrics = parsed["metrics"]
-        # Normalise numeric fields
-        for key in ["calories", "protein", "carbs", "fats", "sugar", "fiber"]:
-            try:
-                val = metrics.get(key)
-                metrics[key] = float(val) if val is not None else None
-            except (TypeError, ValueError, AttributeError):
-                metrics[key] = None
-
-        parsed.setdefault("summary", "")
-        parsed.setdefault("guidance", "")
-        parsed.setdefault("insights", {})
-        insights = parsed["insights"]
-        if not isinstance(insights, dict):
-            insights = {}
-        insights.setdefault("balance_score", 50)
-        insights.setdefault("flags", [])
-        insights.setdefault("next_meal_suggestions", [])
-        parsed["insights"] = insights
-
-        parsed.setdefault("meta", {})
-        if isinstance(parsed["meta"], dict):
-            parsed["meta"].setdefault("source", "gemini")
-        else:
-            parsed["meta"] = {"source": "gemini"}
-
-        return parsed
-    except Exception as exc:  # pragma: no cover - defensive
-        logger.exception("Gemini meal analysis failed: %s", exc)
-        return _build_local_meal_analysis_fallback(meal_label=meal_label)
+    def _call_model() -> Dict[str, Any]:
+        def _request(timeout: float) -> str:
+            response = model.generate_content(
+                [
+                    {"role": "system", "parts": [instruction]},
+                    {
+                        "role": "user",
+                        "parts": [
+                            "Analyse this plate of food and estimate macros and calories.",
+                            image_part,
+                        ],
+                    },
+                ],
+                request_options={"timeout": timeout},
+            )
+            return response.text
+
+        timing: Dict[str, float] = {}
+        try:
+            text = _guarded_call("meal", _request, timing) or "{}"
+            parse_started = time.monotonic()
+            parsed: Dict[str, Any] = json.loads(text)
+            if not isinstance(parsed, dict):
+                raise ValueError("Unexpected JSON from Gemini meal analysis")
+
+            parsed.setdefault("dish_name", None)
+            parsed.setdefault("metrics", {})
+            metrics = parsed["metrics"]
+            # Normalise numeric fields
+            for key in ["calories", "protein", "carbs", "fats", "sugar", "fiber"]:
+                try:
+                    val = metrics.get(key)
+                    metrics[key] = float(val) if val is not None else None
+                except (TypeError, ValueError, AttributeError):
+                    metrics[key] = None
+
+            parsed.setdefault("summary", "")
+            parsed.setdefault("guidance", "")
+            parsed.setdefault("insights", {})
+            insights = parsed["insights"]
+            if not isinstance(insights, dict):
+                insights = {}
+            insights.setdefault("balance_score", 50)
+            insights.setdefault("flags", [])
+            insights.setdefault("next_meal_suggestions", [])
+            parsed["insights"] = insights
+
+            parsed.setdefault("meta", {})
+            if isinstance(parsed["meta"], dict):
+                parsed["meta"].setdefault("source", "gemini")
+            else:
+                parsed["meta"] = {"source": "gemini"}
+            parsed["meta"]["model"] = _model_name()
+            timing["parse_ms"] = (time.monotonic() - parse_started) * 1000
+
+            store_meal_analysis(cache_key, parsed)
+            return _with_timing_meta(parsed, timing)
+        except CircuitOpenError:
+            analysis = _with_circuit_meta(_build_local_meal_analysis_fallback(meal_label=meal_label))
+            return _with_fallback_reason(analysis, "circuit_open")
+        except RateLimitedError:
+            analysis = _with_throttle_meta(_build_local_meal_analysis_fallback(meal_label=meal_label))
+            return _with_timing_meta(_with_fallback_reason(analysis, "rate_limited"), timing)
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.exception("Gemini meal analysis failed: %s", exc)
+            analysis = _build_local_meal_analysis_fallback(meal_label=meal_label)
+            return _with_timing_meta(_with_fallback_reason(analysis, "error"), timing)
+
+    analysis, shared = single_flight(
+        f"meal:{cache_key}",
+        _call_model,
+        lambda: get_cached_meal_analysis(cache_key, record_stats=False),
+    )
+    return _mark_coalesced(analysis, shared)
 
 
 def _build_local_meal_analysis_fallback(
@@ -0,0 +1,129 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import Row, func, select, tuple_
+
+from extensions import db  # type: ignore
+from models.nutrition_model import NutritionLog
+from models.user_model import User
+
+MACRO_KEYS = NutritionLog.MACRO_FIELDS
+
+DIRECTION_OLDER = "older"
+DIRECTION_NEWER = "newer"
+
+
+class InvalidCursorError(ValueError):
+    """A history cursor token could not be decoded."""
+
+
+def encode_cursor(logged_at: datetime, log_id: int, direction: str) -> str:
+    """Opaque URL-safe token for the page after/before ``(logged_at, id)``."""
+    payload = json.dumps(
+        {"t": logged_at.isoformat(), "i": log_id, "d": direction}, separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int, str]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = payload["d"]
+        if direction not in (DIRECTION_OLDER, DIRECTION_NEWER):
+            raise ValueError(direction)
+        return datetime.fromisoformat(payload["t"]), int(payload["i"]), direction
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursorError("Invalid history cursor.") from exc
+
+
+def clamp_page_size(requested: Optional[int]) -> int:
+    config = current_app.config
+    default = int(config.get("HISTORY_PAGE_SIZE", 25))
+    return max(1, min(requested or default, int(config.get("HISTORY_MAX_PAGE_SIZE", 100))))
+
+
+def get_meal_history(
+    user: User,
+    cursor: Optional[str] = None,
+    page_size: Optional[int] = None,
+    meal_label: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    One page of the user's meals, newest first.
+
+    Pages seek on ``(logged_at, id)`` from the cursor instead of using
+    OFFSET, so any page costs one short range scan of the
+    ``(user_id, logged_at)`` index however deep it is. Returns the rows plus
+    ``next_cursor`` (older meals) and ``prev_cursor`` (newer meals), each
+    None at the ends. Raises ``InvalidCursorError`` for a malformed cursor.
+    """
+    limit = clamp_page_size(page_size)
+    key = tuple_(NutritionLog.logged_at, NutritionLog.id)
+
+    query = select(
+        NutritionLog.id,
+        NutritionLog.logged_at,
+        NutritionLog.meal_label,
+        *[getattr(NutritionLog, name) for name in MACRO_KEYS],
+        NutritionLog.ai_food_summary,
+    ).where(NutritionLog.user_id == user.id)
+    if meal_label:
+        query = query.where(func.lower(NutritionLog.meal_label) == meal_label.strip().lower())
+
+    direction = DIRECTION_OLDER
+    if cursor:
+        logged_at, log_id, direction = decode_cursor(cursor)
+        if direction == DIRECTION_OLDER:
+            query = query.where(key < tuple_(logged_at, log_id))
+        else:
+            query = query.where(key > tuple_(logged_at, log_id))
+
+    if direction == DIRECTION_OLDER:
+        query = query.order_by(NutritionLog.logged_at.desc(), NutritionLog.id.desc())
+    else:
+        # Walk forward from the cursor, then flip back to newest-first.
+        query = query.order_by(NutritionLog.logged_at.asc(), NutritionLog.id.asc())
+
+    rows: List[Row] = list(db.session.execute(query.limit(limit + 1)).all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == DIRECTION_NEWER:
+        rows.reverse()
+
+    # "More" exists in the direction we walked; the other side always has
+    # rows when we arrived through a cursor.
+    has_older = has_more if direction == DIRECTION_OLDER else bool(cursor)
+    has_newer = has_more if direction == DIRECTION_NEWER else bool(cursor)
+    return {
+        "logs": rows,
+        "page_size": limit,
+        "meal_label": meal_label or None,
+        "next_cursor": (
+            encode_cursor(rows[-1].logged_at, rows[-1].id, DIRECTION_OLDER)
+            if rows and has_older
+            else None
+        ),
+        "prev_cursor": (
+            encode_cursor(rows[0].logged_at, rows[0].id, DIRECTION_NEWER)
+            if rows and has_newer
+            else None
+        ),
+    }
+
+
+def serialize_history_row(row: Row) -> Dict[str, Any]:
+    entry: Dict[str, Any] = {
+        "id": row.id,
+        "logged_at": row.logged_at.isoformat(),
+        "meal_label": row.meal_label,
+    }
+    for name in MACRO_KEYS:
+        value = getattr(row, name)
+        entry[name] = float(value) if value is not None else None
+    entry["ai_food_summary"] = row.ai_food_summary
+    return entry
@@ -0,0 +1,135 @@
+import io
+import logging
+import threading
+import warnings
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Iterable, Optional, Tuple
+
+from PIL import Image, UnidentifiedImageError
+
+from services.upload_service import ImageBuffer
+
+logger = logging.getLogger(__name__)
+
+DHASH_SIZE = 8
+
+# (user_id, limit) -> newest-first (log_id, phash, meal_label) rows.
+HashLoader = Callable[[int, int], Iterable[Tuple[int, str, Optional[str]]]]
+
+
+def _label_key(meal_label: Optional[str]) -> str:
+    return (meal_label or "").strip().lower()
+
+
+def compute_dhash(image_data: ImageBuffer) -> Optional[str]:
+    """
+    Return a 64-bit difference hash (dHash) of an image as 16 hex characters.
+
+    dHash compares neighbouring pixels of a tiny greyscale thumbnail, so it is
+    stable under re-compression, resizing and small framing changes. Returns
+    None when the bytes cannot be decoded as an image or are a decompression
+    bomb.
+    """
+    if hasattr(image_data, "seek"):
+        image_data.seek(0)  # type: ignore[union-attr]
+        source = image_data
+    else:
+        source = io.BytesIO(image_data)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            img = Image.open(source)
+        with img:
+            # Let the JPEG decoder downscale while decoding; much cheaper
+            # than decoding a full-resolution phone photo.
+            img.draft("L", (DHASH_SIZE * 8, DHASH_SIZE * 8))
+            small = img.convert("L").resize(
+                (DHASH_SIZE + 1, DHASH_SIZE), Image.Resampling.LANCZOS
+            )
+            pixels = list(small.getdata())
+    except (
+        UnidentifiedImageError,
+        Image.DecompressionBombError,
+        Image.DecompressionBombWarning,
+        OSError,
+        ValueError,
+    ) as exc:
+        logger.info("Could not compute perceptual hash for upload: %s", exc)
+        return None
+
+    value = 0
+    width = DHASH_SIZE + 1
+    for row in range(DHASH_SIZE):
+        offset = row * width
+        for col in range(DHASH_SIZE):
+            value = (value << 1) | int(pixels[offset + col] > pixels[offset + col + 1])
+    return f"{value:016x}"
+
+
+def hamming_distance(left: str, right: str) -> int:
+    """Number of differing bits between two hex-encoded hashes."""
+    return (int(left, 16) ^ int(right, 16)).bit_count()
+
+
+class RecentHashIndex:
+    """
+    Worker-local index of each user's most recent meal photo hashes.
+
+    Users are loaded lazily through ``loader`` and kept in an LRU so memory
+    stays bounded; a miss here only means the model is called again. Each
+    entry remembers its meal label so reuse stays within the same meal.
+    """
+
+    def __init__(self, per_user: int = 50, max_users: int = 1024) -> None:
+        self.per_user = per_user
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._users: "OrderedDict[int, Deque[Tuple[int, int, str]]]" = OrderedDict()
+
+    def _entries(self, user_id: int, loader: HashLoader) -> Deque[Tuple[int, int, str]]:
+        with self._lock:
+            entries = self._users.get(user_id)
+            if entries is not None:
+                self._users.move_to_end(user_id)
+                return entries
+
+        loaded: Deque[Tuple[int, int, str]] = deque(maxlen=self.per_user)
+        # Loader yields newest first; keep the deque oldest -> newest.
+        for log_id, phash, meal_label in reversed(list(loader(user_id, self.per_user))):
+            loaded.append((int(phash, 16), log_id, _label_key(meal_label)))
+
+        with self._lock:
+            entries = self._users.setdefault(user_id, loaded)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+            return entries
+
+    def nearest(
+        self,
+        user_id: int,
+        phash: str,
+        meal_label: Optional[str],
+        max_distance: int,
+        loader: HashLoader,
+    ) -> Optional[Tuple[int, int]]:
+        """Return ``(log_id, distance)`` of the closest same-meal hash within range."""
+        target = int(phash, 16)
+        label = _label_key(meal_label)
+        entries = self._entries(user_id, loader)
+        best: Optional[Tuple[int, int]] = None
+        with self._lock:
+            # Newest first so ties resolve to the most recent log.
+            for value, log_id, entry_label in reversed(entries):
+                if entry_label != label:
+                    continue
+                distance = (value ^ target).bit_count()
+                if distance <= max_distance and (best is None or distance < best[1]):
+                    best = (log_id, distance)
+        return best
+
+    def add(self, user_id: int, log_id: int, phash: str, meal_label: Optional[str]) -> None:
+        with self._lock:
+            entries = self._users.get(user_id)
+            if entries is not None:
+                entries.append((int(phash, 16), log_id, _label_key(meal_label)))
@@ -0,0 +1,121 @@
+import io
+import logging
+import threading
+import time
+import warnings
+from typing import Any, Dict, Tuple
+
+from flask import current_app
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from services.upload_service import ImageBuffer
+
+logger = logging.getLogger(__name__)
+
+_FORMAT_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+_STATS_LOCK = threading.Lock()
+_STATS: Dict[str, float] = {
+    "processed": 0,
+    "failed": 0,
+    "kept_original": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+    "seconds": 0.0,
+}
+
+
+def _open_source(image_data: ImageBuffer):
+    if hasattr(image_data, "seek"):
+        # Memory-mapped uploads are file-like; decode straight from the map.
+        image_data.seek(0)  # type: ignore[union-attr]
+        return image_data
+    return io.BytesIO(image_data)
+
+
+def prepare_meal_image(image_data: ImageBuffer, mime_type: str) -> Tuple[ImageBuffer, str]:
+    """
+    Shrink a meal photo before it is sent to Gemini.
+
+    The image is decoded, rotated according to its EXIF orientation, reduced
+    so its longest edge is at most MEAL_IMAGE_MAX_EDGE pixels and re-encoded
+    as MEAL_IMAGE_FORMAT at MEAL_IMAGE_QUALITY. Metadata (EXIF, GPS) is not
+    carried over. The original buffer is returned unchanged when the upload
+    cannot be decoded (including decompression bombs), when preprocessing is
+    disabled (max edge <= 0) or when re-encoding would not make it smaller.
+    """
+    max_edge = int(current_app.config.get("MEAL_IMAGE_MAX_EDGE", 0))
+    if max_edge <= 0:
+        return image_data, mime_type
+
+    out_format = str(current_app.config.get("MEAL_IMAGE_FORMAT", "JPEG")).upper()
+    if out_format not in _FORMAT_MIME_TYPES:
+        out_format = "JPEG"
+    quality = int(current_app.config.get("MEAL_IMAGE_QUALITY", 85))
+
+    started = time.perf_counter()
+    try:
+        with warnings.catch_warnings():
+            # Oversized images are not worth decoding; send the original.
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            img = Image.open(_open_source(image_data))
+        with img:
+            # JPEG decoders can downscale by 1/2..1/8 while decoding.
+            img.draft("RGB", (max_edge, max_edge))
+            img = ImageOps.exif_transpose(img)
+            if img.mode in ("RGBA", "LA", "P"):
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel("A"))
+                img = background
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+            img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+            buffer = io.BytesIO()
+            img.save(buffer, format=out_format, quality=quality, optimize=True)
+            processed = buffer.getvalue()
+    except (
+        UnidentifiedImageError,
+        Image.DecompressionBombError,
+        Image.DecompressionBombWarning,
+        OSError,
+        ValueError,
+    ) as exc:
+        logger.info("Meal image preprocessing skipped: %s", exc)
+        with _STATS_LOCK:
+            _STATS["failed"] += 1
+        return image_data, mime_type
+
+    elapsed = time.perf_counter() - started
+    if len(processed) >= len(image_data):
+        # Already small (e.g. a compact JPEG); re-encoding only costs quality.
+        with _STATS_LOCK:
+            _STATS["kept_original"] += 1
+            _STATS["seconds"] += elapsed
+        return image_data, mime_type
+
+    with _STATS_LOCK:
+        _STATS["processed"] += 1
+        _STATS["bytes_in"] += len(image_data)
+        _STATS["bytes_out"] += len(processed)
+        _STATS["seconds"] += elapsed
+    logger.debug(
+        "Meal image preprocessed %d -> %d bytes in %.1f ms",
+        len(image_data),
+        len(processed),
+        elapsed * 1000.0,
+    )
+    return processed, _FORMAT_MIME_TYPES[out_format]
+
+
+def get_preprocess_stats() -> Dict[str, Any]:
+    """Return bytes saved and time spent preprocessing meal photos."""
+    with _STATS_LOCK:
+        stats: Dict[str, Any] = dict(_STATS)
+    processed = int(stats["processed"])
+    stats["bytes_saved"] = int(stats["bytes_in"] - stats["bytes_out"])
+    attempts = processed + int(stats["kept_original"])
+    stats["avg_ms"] = round(stats["seconds"] * 1000.0 / attempts, 2) if attempts else 0.0
+    stats["seconds"] = round(stats["seconds"], 4)
+    return stats
@@ -0,0 +1,236 @@
+import csv
+import json
+import math
+import os
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from flask import current_app
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from extensions import db  # type: ignore
+from models.nutrition_model import NutritionLog
+from models.user_model import User
+from services.analytics_service import rebuild_nutrition_rollups_for_days
+from services.nutrition_service import clear_day_views
+
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+FORMATS = (FORMAT_CSV, FORMAT_JSONL)
+
+_EXTENSIONS = {".csv": FORMAT_CSV, ".jsonl": FORMAT_JSONL, ".ndjson": FORMAT_JSONL}
+_CONTENT_TYPES = {
+    "text/csv": FORMAT_CSV,
+    "application/jsonl": FORMAT_JSONL,
+    "application/x-ndjson": FORMAT_JSONL,
+    "application/x-jsonlines": FORMAT_JSONL,
+}
+
+# Per-row problems returned to the caller; the rest are only counted.
+MAX_REPORTED_ERRORS = 50
+# Keeps each chunk's duplicate lookup under SQLite's bound-parameter limit.
+MAX_CHUNK_SIZE = 5000
+
+_MEAL_LABEL_LENGTH = NutritionLog.__table__.c.meal_label.type.length
+_TEXT_FIELDS = ("ai_food_summary", "ai_guidance")
+# A row only counts as a duplicate when the user already has the same meal
+# at the same time; distinct meals may share a timestamp (or a bare date).
+_DEDUP_COLUMNS = ("logged_at", "meal_label") + NutritionLog.MACRO_FIELDS
+
+
+class ImportFormatError(ValueError):
+    """The import file as a whole cannot be read in the requested format."""
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Guess ``csv``/``jsonl`` from a file name (``.gz`` allowed) or MIME type."""
+    if filename:
+        stem, extension = os.path.splitext(filename.lower())
+        if extension == ".gz":
+            extension = os.path.splitext(stem)[1]
+        if extension in _EXTENSIONS:
+            return _EXTENSIONS[extension]
+    return _CONTENT_TYPES.get((content_type or "").lower())
+
+
+def _iter_records(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield ``(line_number, record)``; JSONL records are left as raw lines."""
+    if fmt == FORMAT_CSV:
+        reader = csv.DictReader(lines)
+        try:
+            if reader.fieldnames is None:
+                return
+            reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+            if "logged_at" not in reader.fieldnames:
+                raise ImportFormatError("CSV header must include a logged_at column.")
+            for record in reader:
+                yield reader.line_num, record
+        except csv.Error as exc:
+            raise ImportFormatError(f"Malformed CSV near line {reader.line_num}: {exc}") from None
+        return
+
+    for number, line in enumerate(lines, start=1):
+        if line.strip():
+            yield number, line
+
+
+def _parse_timestamp(value: Any) -> datetime:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        raise ValueError("logged_at is required.")
+    if not isinstance(value, str):
+        raise ValueError("logged_at must be an ISO 8601 string.")
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f"logged_at {value!r} is not an ISO 8601 date/time.") from None
+    if parsed.tzinfo is not None:
+        # Logs are stored in naive server-local time.
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _parse_amount(key: str, value: Any) -> Optional[float]:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"{key} must be a number.")
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a number.") from None
+    if not math.isfinite(amount) or amount < 0:
+        raise ValueError(f"{key} must be a non-negative number.")
+    return amount
+
+
+def _validate(record: Any, now: datetime) -> Dict[str, Any]:
+    """Turn one raw record into ``nutrition_logs`` column values or raise ValueError."""
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except ValueError:
+            raise ValueError("Line is not valid JSON.") from None
+    if not isinstance(record, dict):
+        raise ValueError("Record must be an object.")
+
+    logged_at = _parse_timestamp(record.get("logged_at"))
+    if logged_at > now:
+        raise ValueError("logged_at is in the future.")
+
+    meal_label = record.get("meal_label")
+    if meal_label is not None and not isinstance(meal_label, str):
+        raise ValueError("meal_label must be text.")
+    meal_label = (meal_label or "").strip() or None
+    if meal_label and len(meal_label) > _MEAL_LABEL_LENGTH:
+        raise ValueError(f"meal_label is longer than {_MEAL_LABEL_LENGTH} characters.")
+
+    values: Dict[str, Any] = {"logged_at": logged_at, "meal_label": meal_label}
+    for key in NutritionLog.MACRO_FIELDS:
+        values[key] = _parse_amount(key, record.get(key))
+    for key in _TEXT_FIELDS:
+        values[key] = str(record.get(key) or "").strip() or None
+    return values
+
+
+def _dedup_key(values: Dict[str, Any]) -> Tuple[Any, ...]:
+    return tuple(values[column] for column in _DEDUP_COLUMNS)
+
+
+def _insert_chunk(
+    user_id: int,
+    chunk: List[Dict[str, Any]],
+    seen: Set[Tuple[Any, ...]],
+    days: Set[date],
+    result: Dict[str, Any],
+) -> None:
+    """Insert one validated chunk in its own transaction, skipping duplicates."""
+    columns = [NutritionLog.__table__.c[column] for column in _DEDUP_COLUMNS]
+    existing = {
+        tuple(row)
+        for row in db.session.execute(
+            select(*columns).where(
+                NutritionLog.user_id == user_id,
+                NutritionLog.logged_at.in_(list({values["logged_at"] for values in chunk})),
+            )
+        )
+    }
+    rows = []
+    for values in chunk:
+        key = _dedup_key(values)
+        if key in existing or key in seen:
+            result["duplicates"] += 1
+            continue
+        seen.add(key)
+        rows.append({"user_id": user_id, **values})
+    if not rows:
+        return
+
+    try:
+        # A list of parameter sets runs as a single executemany.
+        db.session.execute(insert(NutritionLog.__table__), rows)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+    days.update(row["logged_at"].date() for row in rows)
+    result["imported"] += len(rows)
+
+
+def import_nutrition_logs(
+    user: User,
+    lines: Iterable[str],
+    fmt: str,
+    chunk_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Stream meal logs from CSV or JSONL text into ``user``'s history.
+
+    Rows are validated as they are read. Invalid rows are skipped and
+    reported. A row matching one of the user's meals on ``logged_at``,
+    ``meal_label`` and every macro is skipped as a duplicate, so re-running
+    an import is safe. Valid rows are inserted
+    ``chunk_size`` at a time, one transaction per chunk. Day, week and
+    month rollups are then rebuilt once for each affected day.
+
+    Raises ``ImportFormatError`` if the file itself is unusable.
+    """
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"Unsupported import format {fmt!r}.")
+    if chunk_size is None:
+        chunk_size = int(current_app.config.get("NUTRITION_IMPORT_CHUNK_SIZE", 1000))
+    chunk_size = max(1, min(chunk_size, MAX_CHUNK_SIZE))
+
+    result: Dict[str, Any] = {
+        "imported": 0,
+        "duplicates": 0,
+        "invalid": 0,
+        "days": 0,
+        "errors": [],
+    }
+    seen: Set[Tuple[Any, ...]] = set()
+    days: Set[date] = set()
+    now = datetime.now()
+    chunk: List[Dict[str, Any]] = []
+
+    try:
+        for line, record in _iter_records(lines, fmt):
+            try:
+                chunk.append(_validate(record, now))
+            except ValueError as exc:
+                result["invalid"] += 1
+                if len(result["errors"]) < MAX_REPORTED_ERRORS:
+                    result["errors"].append({"line": line, "error": str(exc)})
+                continue
+            if len(chunk) >= chunk_size:
+                _insert_chunk(user.id, chunk, seen, days, result)
+                chunk = []
+        if chunk:
+            _insert_chunk(user.id, chunk, seen, days, result)
+    finally:
+        # Chunks committed before a format error still need their rollups.
+        if days:
+            rebuild_nutrition_rollups_for_days(user.id, days)
+            clear_day_views()
+    result["days"] = len(days)
+    return result
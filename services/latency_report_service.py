@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import String, case, cast, func, select
+
+from extensions import db  # type: ignore
+from models.diet_model import DietRequest
+from models.nutrition_model import NutritionLog
+from services.sql_dates_service import day_of, hour_label, week_of
+
+KIND_DIET = "diet"
+KIND_MEAL = "meal"
+KINDS = (KIND_DIET, KIND_MEAL)
+
+BUCKETS = ("hour", "day", "week")
+PERCENTILES = (50, 95, 99)
+MAX_REPORT_DAYS = 365
+
+
+def _bucket(bucket: str, column: Any) -> Any:
+    """SQL label of the hour/day/week a timestamp falls in (weeks start Monday)."""
+    if bucket == "hour":
+        return hour_label(column)
+    return cast(week_of(column) if bucket == "week" else day_of(column), String)
+
+
+def get_latency_report(kind: str, bucket: str = "day", days: int = 30) -> List[Dict[str, Any]]:
+    """
+    p50/p95/p99 AI response latency per time bucket and response source.
+
+    Percentiles use the nearest-rank method in SQL: ``row_number()`` and
+    ``count()`` window aggregates rank each bucket's latencies, and the pth
+    percentile is the smallest latency ranked at or above p% of the bucket.
+    Averages of the queue, model and parse timings are included. Rows
+    without a recorded latency (older rows, imports) are skipped.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown latency report kind {kind!r}.")
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown latency report bucket {bucket!r}.")
+    days = max(1, min(days, MAX_REPORT_DAYS))
+    model = DietRequest if kind == KIND_DIET else NutritionLog
+
+    period = _bucket(bucket, model.created_at)
+    source = func.coalesce(model.response_source, "unknown")
+    latency = model.response_latency_ms
+    partition = (period, source)
+    ranked = (
+        select(
+            period.label("bucket"),
+            source.label("source"),
+            latency.label("latency_ms"),
+            model.queue_wait_ms,
+            model.model_latency_ms,
+            model.parse_latency_ms,
+            func.row_number().over(partition_by=partition, order_by=latency).label("rank"),
+            func.count().over(partition_by=partition).label("total"),
+        )
+        .where(
+            latency.isnot(None),
+            model.created_at >= datetime.utcnow() - timedelta(days=days),
+        )
+        .subquery()
+    )
+
+    percentiles = [
+        func.min(
+            case((ranked.c.rank * 100 >= ranked.c.total * p, ranked.c.latency_ms))
+        ).label(f"p{p}_ms")
+        for p in PERCENTILES
+    ]
+    query = (
+        select(
+            ranked.c.bucket,
+            ranked.c.source,
+            func.count().label("calls"),
+            *percentiles,
+            func.max(ranked.c.latency_ms).label("max_ms"),
+            func.avg(ranked.c.queue_wait_ms).label("avg_queue_wait_ms"),
+            func.avg(ranked.c.model_latency_ms).label("avg_model_ms"),
+            func.avg(ranked.c.parse_latency_ms).label("avg_parse_ms"),
+        )
+        .group_by(ranked.c.bucket, ranked.c.source)
+        .order_by(ranked.c.bucket.desc(), ranked.c.source)
+    )
+
+    report = []
+    for row in db.session.execute(query):
+        entry = dict(row._mapping)
+        for key in ("avg_queue_wait_ms", "avg_model_ms", "avg_parse_ms"):
+            if entry[key] is not None:
+                entry[key] = round(float(entry[key]), 1)
+        report.append(entry)
+    return report
@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+from datetime import time
+from time import monotonic
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import select
+
+from extensions import db  # type: ignore
+from models.lifestyle_model import UserLifestyle
+from models.user_model import User
+
+
+class LifestyleSnapshot(NamedTuple):
+    """Immutable copy of a user's lifestyle timings, shared across requests."""
+
+    user_id: int
+    version: int
+    wake_time: Optional[time]
+    breakfast_time: Optional[time]
+    lunch_time: Optional[time]
+    snack_time: Optional[time]
+    dinner_time: Optional[time]
+    sleep_time: Optional[time]
+
+
+# Worker-local LRU: user_id -> (expires_at monotonic seconds, version, snapshot).
+# A None snapshot records that the user has no lifestyle row yet.
+_LOCK = threading.Lock()
+_SNAPSHOTS: "OrderedDict[int, Tuple[float, int, Optional[LifestyleSnapshot]]]" = OrderedDict()
+_STATS: Dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "stale": 0,
+    "evictions": 0,
+    "invalidations": 0,
+}
+
+
+def _load_snapshot(user_id: int, version: int) -> Optional[LifestyleSnapshot]:
+    row = db.session.execute(
+        select(*[getattr(UserLifestyle, field) for field in UserLifestyle.TIME_FIELDS]).where(
+            UserLifestyle.user_id == user_id
+        )
+    ).first()
+    if row is None:
+        return None
+    return LifestyleSnapshot(user_id, version, *row)
+
+
+def get_lifestyle(user: User) -> Optional[LifestyleSnapshot]:
+    """
+    Return ``user``'s lifestyle timings, or None if they have not set any.
+
+    Snapshots are cached per worker for ``LIFESTYLE_CACHE_TTL_SECONDS`` and
+    tagged with ``users.lifestyle_version``. The user row is loaded for every
+    request anyway, so a version bump by another worker is seen on the next
+    request without querying ``user_lifestyle``.
+    """
+    version = int(user.lifestyle_version or 0)
+    now = monotonic()
+    with _LOCK:
+        entry = _SNAPSHOTS.get(user.id)
+        if entry is not None:
+            expires_at, cached_version, snapshot = entry
+            if cached_version == version and expires_at > now:
+                _SNAPSHOTS.move_to_end(user.id)
+                _STATS["hits"] += 1
+                return snapshot
+            del _SNAPSHOTS[user.id]
+            _STATS["stale"] += 1
+        _STATS["misses"] += 1
+
+    snapshot = _load_snapshot(user.id, version)
+
+    config = current_app.config
+    max_size = int(config.get("LIFESTYLE_CACHE_SIZE", 1024))
+    ttl = float(config.get("LIFESTYLE_CACHE_TTL_SECONDS", 300))
+    if max_size > 0 and ttl > 0:
+        with _LOCK:
+            _SNAPSHOTS[user.id] = (now + ttl, version, snapshot)
+            _SNAPSHOTS.move_to_end(user.id)
+            while len(_SNAPSHOTS) > max_size:
+                _SNAPSHOTS.popitem(last=False)
+                _STATS["evictions"] += 1
+    return snapshot
+
+
+def invalidate_lifestyle(user_id: int) -> None:
+    """Drop this worker's snapshot for ``user_id`` (others see the version bump)."""
+    with _LOCK:
+        if _SNAPSHOTS.pop(user_id, None) is not None:
+            _STATS["invalidations"] += 1
+
+
+def get_lifestyle_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters and the hit ratio for this worker."""
+    with _LOCK:
+        stats: Dict[str, Any] = dict(_STATS)
+        stats["entries"] = len(_SNAPSHOTS)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
@@ -0,0 +1,220 @@
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from flask import current_app
+
+from extensions import db  # type: ignore
+from models.meal_job_model import MealAnalysisJob
+from models.user_model import User
+from services.background_service import submit_background
+from services.gemini_service import analyze_meal_from_image
+from services.image_hash_service import compute_dhash
+from services.image_preprocess_service import prepare_meal_image
+from services.nutrition_service import (
+    build_analysis_from_log,
+    clear_day_views,
+    create_nutrition_log,
+    find_near_duplicate_log,
+)
+from services.upload_service import ImageBuffer, UploadBuffer
+
+logger = logging.getLogger(__name__)
+
+
+def analyze_and_log_meal(
+    *,
+    user: User,
+    image_data: ImageBuffer,
+    mime_type: str,
+    meal_label: Optional[str],
+    content_hash: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run the full meal photo pipeline and persist the resulting log.
+
+    Shared by the synchronous tracker POST and the background job workers.
+    Returns the ``create_nutrition_log`` result plus the ``analysis`` dict.
+    """
+    started = time.perf_counter()
+    image_data, mime_type = prepare_meal_image(image_data, mime_type)
+
+    # Re-taken or re-compressed photos of a recent plate reuse that
+    # log's analysis instead of another model call.
+    image_phash = compute_dhash(image_data)
+    duplicate_log = find_near_duplicate_log(user, image_phash, meal_label)
+    if duplicate_log is not None:
+        analysis = build_analysis_from_log(duplicate_log)
+    else:
+        analysis = analyze_meal_from_image(
+            image_bytes=image_data,
+            mime_type=mime_type,
+            meal_label=meal_label,
+            content_hash=content_hash,
+        )
+    latency_ms = round((time.perf_counter() - started) * 1000)
+
+    result = create_nutrition_log(
+        user=user,
+        meal_label=meal_label,
+        metrics=analysis.get("metrics", {}) or {},
+        ai_food_summary=analysis.get("summary") or "",
+        ai_guidance=analysis.get("guidance") or "",
+        image_path=None,
+        image_phash=image_phash,
+        analysis=analysis,
+        analysis_latency_ms=latency_ms,
+    )
+    result["analysis"] = analysis
+    return result
+
+
+def _job_upload_dir() -> str:
+    path = current_app.config.get("MEAL_JOB_UPLOAD_DIR") or os.path.join(
+        current_app.instance_path, "meal_jobs"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def enqueue_meal_analysis(
+    *,
+    user: User,
+    upload: UploadBuffer,
+    meal_label: Optional[str],
+) -> MealAnalysisJob:
+    """Persist the upload and a pending job row, then wake a worker."""
+    image_path = os.path.join(_job_upload_dir(), f"{uuid.uuid4().hex}.upload")
+    with open(image_path, "wb") as fh:
+        if hasattr(upload.data, "seek"):
+            upload.data.seek(0)  # type: ignore[union-attr]
+            shutil.copyfileobj(upload.data, fh)  # type: ignore[arg-type]
+        else:
+            fh.write(upload.data)
+
+    job = MealAnalysisJob(
+        user_id=user.id,
+        status=MealAnalysisJob.STATUS_PENDING,
+        meal_label=meal_label,
+        mime_type=upload.mime_type,
+        image_path=image_path,
+        content_hash=upload.sha256,
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    submit_background(drain_meal_jobs)
+    return job
+
+
+def _requeue_stale_jobs() -> None:
+    """Return jobs orphaned by a crashed worker to the pending state."""
+    stale_after = int(current_app.config.get("MEAL_JOB_STALE_SECONDS", 300))
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_after)
+    MealAnalysisJob.query.filter(
+        MealAnalysisJob.status == MealAnalysisJob.STATUS_RUNNING,
+        MealAnalysisJob.started_at < cutoff,
+    ).update(
+        {"status": MealAnalysisJob.STATUS_PENDING, "started_at": None},
+        synchronize_session=False,
+    )
+    db.session.commit()
+
+
+def _claim_next_job() -> Optional[MealAnalysisJob]:
+    """
+    Atomically move the oldest pending job to ``running``.
+
+    The conditional UPDATE is the lock: only one worker (thread or process)
+    sees rowcount == 1 for a given job.
+    """
+    while True:
+        candidate = (
+            db.session.query(MealAnalysisJob.id)
+            .filter(MealAnalysisJob.status == MealAnalysisJob.STATUS_PENDING)
+            .order_by(MealAnalysisJob.id.asc())
+            .first()
+        )
+        if candidate is None:
+            db.session.commit()
+            return None
+        claimed = (
+            MealAnalysisJob.query.filter(
+                MealAnalysisJob.id == candidate.id,
+                MealAnalysisJob.status == MealAnalysisJob.STATUS_PENDING,
+            ).update(
+                {
+                    "status": MealAnalysisJob.STATUS_RUNNING,
+                    "started_at": datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+        )
+        db.session.commit()
+        if claimed == 1:
+            return db.session.get(MealAnalysisJob, candidate.id)
+
+
+def _run_job(job: MealAnalysisJob) -> None:
+    # One app context drains many jobs; other workers may have logged meals
+    # since the last one, so day views must not carry over.
+    clear_day_views()
+    user = db.session.get(User, job.user_id)
+    try:
+        if user is None:
+            raise ValueError("User for meal analysis job no longer exists")
+        with open(job.image_path, "rb") as fh:
+            image_bytes = fh.read()
+        result = analyze_and_log_meal(
+            user=user,
+            image_data=image_bytes,
+            mime_type=job.mime_type,
+            meal_label=job.meal_label,
+            content_hash=job.content_hash,
+        )
+        job.status = MealAnalysisJob.STATUS_DONE
+        job.nutrition_log_id = result["log"].id
+        job.result_payload = {
+            "analysis": result["analysis"],
+            "timing_feedback": result["timing_feedback"],
+            "next_meal_plan": result.get("next_meal_plan"),
+        }
+    except Exception as exc:
+        db.session.rollback()
+        logger.exception("Meal analysis job %s failed", job.id)
+        job = db.session.get(MealAnalysisJob, job.id)
+        job.status = MealAnalysisJob.STATUS_FAILED
+        job.error = str(exc) or exc.__class__.__name__
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+    try:
+        os.remove(job.image_path)
+    except OSError:
+        pass
+
+
+def drain_meal_jobs() -> int:
+    """Process pending jobs until the queue is empty; returns jobs handled."""
+    _requeue_stale_jobs()
+    handled = 0
+    while True:
+        job = _claim_next_job()
+        if job is None:
+            return handled
+        _run_job(job)
+        handled += 1
+
+
+def get_meal_job_status(job: MealAnalysisJob) -> Dict[str, Any]:
+    """JSON-serialisable status for the tracker's polling endpoint."""
+    return {
+        "id": job.id,
+        "status": job.status,
+        "nutrition_log_id": job.nutrition_log_id,
+        "error": job.error if job.status == MealAnalysisJob.STATUS_FAILED else None,
+    }
@@ -0,0 +1,171 @@
+import copy
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from extensions import db  # type: ignore
+from models.meal_cache_model import MealAnalysisCacheEntry
+from services.upload_service import ImageBuffer
+
+logger = logging.getLogger(__name__)
+
+# Worker-local LRU tier: cache_key -> (expires_at epoch seconds, analysis).
+_MEMORY_LOCK = threading.Lock()
+_MEMORY: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_STATS: Dict[str, int] = {
+    "memory_hits": 0,
+    "db_hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "evictions": 0,
+    "expired": 0,
+}
+
+
+def build_meal_cache_key(
+    image_bytes: ImageBuffer,
+    mime_type: str,
+    meal_label: Optional[str],
+    content_hash: Optional[str] = None,
+) -> str:
+    """
+    Return a content address for a meal analysis request.
+
+    ``content_hash`` lets callers that already hashed the upload while
+    streaming it skip re-hashing the image bytes.
+    """
+    digest = hashlib.sha256()
+    digest.update((content_hash or hashlib.sha256(image_bytes).hexdigest()).encode())
+    digest.update(b"\0")
+    digest.update((mime_type or "").lower().encode())
+    digest.update(b"\0")
+    digest.update((meal_label or "").strip().lower().encode())
+    return digest.hexdigest()
+
+
+def _remember(cache_key: str, expires_at: float, analysis: Dict[str, Any]) -> None:
+    max_size = int(current_app.config.get("MEAL_ANALYSIS_CACHE_SIZE", 256))
+    if max_size <= 0:
+        return
+    with _MEMORY_LOCK:
+        _MEMORY[cache_key] = (expires_at, analysis)
+        _MEMORY.move_to_end(cache_key)
+        while len(_MEMORY) > max_size:
+            _MEMORY.popitem(last=False)
+            _STATS["evictions"] += 1
+
+
+def _as_hit(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    result = copy.deepcopy(analysis)
+    meta = result.get("meta")
+    if not isinstance(meta, dict):
+        meta = {}
+        result["meta"] = meta
+    meta["cache"] = "hit"
+    return result
+
+
+def get_cached_meal_analysis(
+    cache_key: str,
+    record_stats: bool = True,
+) -> Optional[Dict[str, Any]]:
+    """
+    Look up a stored analysis in memory first, then in the database.
+
+    Pass ``record_stats=False`` for repeated polling lookups (single-flight
+    followers) so they don't count as misses. Lookups never commit: a DB
+    hit's ``hit_count`` bump is saved by the caller's commit, and expired
+    rows are treated as misses until purged.
+    """
+    now = time.time()
+    with _MEMORY_LOCK:
+        entry = _MEMORY.get(cache_key)
+        if entry is not None:
+            expires_at, analysis = entry
+            if expires_at > now:
+                _MEMORY.move_to_end(cache_key)
+                if record_stats:
+                    _STATS["memory_hits"] += 1
+                return _as_hit(analysis)
+            del _MEMORY[cache_key]
+            _STATS["expired"] += 1
+
+    try:
+        row = db.session.get(MealAnalysisCacheEntry, cache_key)
+        if row is not None and row.expires_at <= datetime.utcnow():
+            # Left for ``flask nutrition purge-meal-cache``.
+            with _MEMORY_LOCK:
+                _STATS["expired"] += 1
+            row = None
+        if row is not None:
+            analysis = copy.deepcopy(row.analysis)
+            expires_at = (row.expires_at - datetime.utcnow()).total_seconds() + now
+            # Atomic increment flushed with the caller's next commit, so a
+            # lookup never commits unrelated pending request state.
+            row.hit_count = MealAnalysisCacheEntry.hit_count + 1
+            _remember(cache_key, expires_at, analysis)
+            if record_stats:
+                with _MEMORY_LOCK:
+                    _STATS["db_hits"] += 1
+            return _as_hit(analysis)
+    except SQLAlchemyError as exc:
+        db.session.rollback()
+        logger.warning("Meal analysis cache lookup failed: %s", exc)
+
+    if record_stats:
+        with _MEMORY_LOCK:
+            _STATS["misses"] += 1
+    return None
+
+
+def store_meal_analysis(cache_key: str, analysis: Dict[str, Any]) -> None:
+    """Persist a model-produced analysis in both cache tiers."""
+    ttl = int(current_app.config.get("MEAL_ANALYSIS_CACHE_TTL_SECONDS", 0))
+    if ttl <= 0:
+        return
+    snapshot = copy.deepcopy(analysis)
+    expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+
+    try:
+        row = db.session.get(MealAnalysisCacheEntry, cache_key)
+        if row is None:
+            row = MealAnalysisCacheEntry(cache_key=cache_key, hit_count=0)
+            db.session.add(row)
+        row.analysis = snapshot
+        row.expires_at = expires_at
+        db.session.commit()
+    except SQLAlchemyError as exc:
+        db.session.rollback()
+        logger.warning("Meal analysis cache store failed: %s", exc)
+
+    _remember(cache_key, time.time() + ttl, snapshot)
+    with _MEMORY_LOCK:
+        _STATS["stores"] += 1
+
+
+def purge_expired_meal_analyses() -> int:
+    """Delete expired rows from the persistent tier; returns rows removed."""
+    removed = MealAnalysisCacheEntry.query.filter(
+        MealAnalysisCacheEntry.expires_at <= datetime.utcnow()
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return int(removed or 0)
+
+
+def get_meal_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters and the hit ratio for this worker."""
+    with _MEMORY_LOCK:
+        stats: Dict[str, Any] = dict(_STATS)
+        stats["memory_entries"] = len(_MEMORY)
+    lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+    stats["hit_ratio"] = (
+        round((stats["memory_hits"] + stats["db_hits"]) / lookups, 4) if lookups else 0.0
+    )
+    return stats
@@ -0,0 +1,306 @@
+import hmac
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import Flask, Response, g, has_request_context, request
+from sqlalchemy import event
+
+from extensions import db  # type: ignore
+
+# In-process metrics registry rendered in the Prometheus text format.
+# Series are per worker process, like the other service stats. One lock
+# guards every series and each update is a few dict/list operations.
+_LOCK = threading.Lock()
+_METRICS: List["_Metric"] = []
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+GEMINI_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 90.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _METRICS.append(self)
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        with _LOCK:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _samples(self) -> Iterable[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        with _LOCK:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def _samples(self) -> Iterable[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with _LOCK:
+            series = self._series.get(labels)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[labels] = series
+            series[0][index] += 1
+            series[1][0] += value
+
+    def _samples(self) -> Iterable[str]:
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield (
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(total[0])}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+HTTP_REQUESTS = Counter(
+    "swasthyasync_http_requests_total",
+    "HTTP requests by endpoint, method and status code.",
+    ("endpoint", "method", "status"),
+)
+HTTP_LATENCY = Histogram(
+    "swasthyasync_http_request_duration_seconds",
+    "Time to produce the response (streamed bodies are not included).",
+    ("endpoint", "method"),
+)
+HTTP_IN_FLIGHT = Gauge(
+    "swasthyasync_http_requests_in_flight",
+    "Requests currently being handled by this worker.",
+)
+REQUEST_DB_QUERIES = Histogram(
+    "swasthyasync_http_request_db_queries",
+    "Database statements executed per request.",
+    ("endpoint",),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "swasthyasync_http_request_db_seconds",
+    "Time spent in database statements per request.",
+    ("endpoint",),
+)
+DB_QUERIES = Counter(
+    "swasthyasync_db_queries_total",
+    "Database statements executed, including background jobs and CLI commands.",
+)
+DB_QUERY_SECONDS = Counter(
+    "swasthyasync_db_query_seconds_total",
+    "Time spent in database statements.",
+)
+GEMINI_CALLS = Counter(
+    "swasthyasync_gemini_calls_total",
+    "Gemini calls by operation and outcome (success, error, circuit_open, rate_limited).",
+    ("operation", "outcome"),
+)
+GEMINI_LATENCY = Histogram(
+    "swasthyasync_gemini_call_duration_seconds",
+    "Latency of Gemini calls that reached the model, by operation and outcome.",
+    ("operation", "outcome"),
+    buckets=GEMINI_BUCKETS,
+)
+
+
+def record_gemini_call(operation: str, outcome: str, seconds: Optional[float] = None) -> None:
+    """Count a Gemini call; pass ``seconds`` when the model was actually called."""
+    GEMINI_CALLS.inc((operation, outcome))
+    if seconds is not None:
+        GEMINI_LATENCY.observe((operation, outcome), seconds)
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info.setdefault("metrics_query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    _record_statement(conn.info["metrics_query_started"].pop())
+
+
+def _handle_error(context) -> None:
+    # after_cursor_execute does not fire for failed statements (integrity
+    # errors, lock timeouts); pop their start time so the pooled
+    # connection's stack does not grow forever.
+    conn = context.connection
+    if conn is None or getattr(context, "statement", None) is None:
+        return
+    started = conn.info.get("metrics_query_started")
+    if started:
+        _record_statement(started.pop())
+
+
+def _record_statement(started: float) -> None:
+    elapsed = time.perf_counter() - started
+    DB_QUERIES.inc()
+    DB_QUERY_SECONDS.inc(amount=elapsed)
+    if has_request_context() and "metrics_started" in g:
+        g.metrics_db_queries += 1
+        g.metrics_db_seconds += elapsed
+
+
+def metrics_access_allowed(config: Dict[str, Any]) -> bool:
+    """
+    Whether the current request may read ``/metrics``.
+
+    Allowed with ``Authorization: Bearer <METRICS_TOKEN>`` or from
+    METRICS_ALLOWED_IPS (empty by default); per-endpoint traffic is not for
+    anonymous clients. The address check relies on PROXY_FIX_X_FOR behind a
+    reverse proxy.
+    """
+    if request.remote_addr in config.get("METRICS_ALLOWED_IPS", ()):
+        return True
+    token = config.get("METRICS_TOKEN")
+    supplied = request.headers.get("Authorization", "")
+    return bool(token) and hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode())
+
+
+def _endpoint() -> str:
+    return request.endpoint or "unmatched"
+
+
+def _before_request() -> None:
+    g.metrics_started = time.perf_counter()
+    g.metrics_db_queries = 0
+    g.metrics_db_seconds = 0.0
+    HTTP_IN_FLIGHT.inc()
+
+
+def _finish_request(status: int) -> None:
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return
+    endpoint = _endpoint()
+    method = request.method
+    HTTP_IN_FLIGHT.dec()
+    HTTP_REQUESTS.inc((endpoint, method, str(status)))
+    HTTP_LATENCY.observe((endpoint, method), time.perf_counter() - started)
+    REQUEST_DB_QUERIES.observe((endpoint,), g.metrics_db_queries)
+    REQUEST_DB_SECONDS.observe((endpoint,), g.metrics_db_seconds)
+
+
+def _after_request(response: Response) -> Response:
+    _finish_request(response.status_code)
+    return response
+
+
+def _teardown_request(exc: Optional[BaseException]) -> None:
+    # Only reached with the timer still set when after_request never ran,
+    # i.e. an unhandled exception turned into a 500.
+    _finish_request(500)
+
+
+def render_metrics(extra: Optional[Callable[[], Dict[str, Dict[str, Any]]]] = None) -> str:
+    """
+    Render every registered metric in the Prometheus text format.
+
+    ``extra`` returns ``{section: {name: value}}`` counters already kept by
+    other services (the ``/health`` stats); their numeric values are added
+    as ``swasthyasync_<section>_<name>`` gauges.
+    """
+    lines: List[str] = []
+    with _LOCK:
+        for metric in _METRICS:
+            lines.extend(metric.render())
+    for section, stats in sorted((extra() if extra else {}).items()):
+        if not isinstance(stats, dict):
+            continue
+        for key, value in sorted(stats.items()):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f"swasthyasync_{section}_{key}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def init_metrics(app: Flask) -> None:
+    """Record request and database metrics for ``app`` unless METRICS_ENABLED is off."""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
@@ -1,65 +1,230 @@
-from datetime import datetime
-from typing import Any, Dict, Optional
+import copy
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Optional, Tuple
 
-from flask import current_app
+from flask import current_app, g
+from sqlalchemy import func, select
+from sqlalchemy.orm import load_only
 
 from extensions import db  # type: ignore
+from models.daily_totals_model import DailyNutritionTotal
 from models.nutrition_model import NutritionLog
 from models.user_model import User
-from models.lifestyle_model import UserLifestyle
+from services.analytics_service import record_log_in_rollups
+from services.image_hash_service import RecentHashIndex
+from services.lifestyle_cache_service import LifestyleSnapshot, get_lifestyle
 from services.timing_analysis_service import analyze_meal_timing
 
+_PHASH_INDEX: Optional[RecentHashIndex] = None
 
-def aggregate_daily_nutrition(user: User, day: datetime) -> Dict[str, float]:
-    """Compute total macros for a given day."""
+MACRO_KEYS = NutritionLog.MACRO_FIELDS
+
+
+def _day_bounds(day: datetime) -> Tuple[datetime, datetime]:
+    """Half-open [midnight, next midnight) range for ``day``."""
     start = datetime(day.year, day.month, day.day)
-    end = start.replace(hour=23, minute=59, second=59)
-    logs = (
-        NutritionLog.query.filter(
+    return start, start + timedelta(days=1)
+
+
+def aggregate_daily_nutrition(user: User, day: datetime) -> Dict[str, float]:
+    """
+    Recompute a day's total macros from the raw logs with one SQL aggregate.
+
+    Request paths read the rollup through ``get_daily_totals``; this is the
+    from-scratch reference the benchmarks time and check the rollup against.
+    """
+    start, end = _day_bounds(day)
+    row = db.session.execute(
+        select(
+            *[func.coalesce(func.sum(getattr(NutritionLog, key)), 0.0) for key in MACRO_KEYS]
+        ).where(
             NutritionLog.user_id == user.id,
             NutritionLog.logged_at >= start,
-            NutritionLog.logged_at <= end,
+            NutritionLog.logged_at < end,
         )
-        .order_by(NutritionLog.logged_at.asc())
-        .all()
-    )
+    ).one()
+    return {key: float(value) for key, value in zip(MACRO_KEYS, row)}
+
+
+def _rollup_totals(user_id: int, day: date) -> Dict[str, float]:
+    # The row is bumped with UPDATE statements, so never trust a copy
+    # already in the identity map.
+    row = db.session.get(DailyNutritionTotal, (user_id, day), populate_existing=True)
+    return {key: float(getattr(row, key) or 0.0) if row else 0.0 for key in MACRO_KEYS}
 
-    totals = {
-        "calories": 0.0,
-        "protein": 0.0,
-        "carbs": 0.0,
-        "fats": 0.0,
-        "sugar": 0.0,
-        "fiber": 0.0,
-    }
-    for log in logs:
-        for key in totals:
-            value = getattr(log, key)
-            if value is not None:
-                totals[key] += float(value)
-    return totals
+
+def get_daily_totals(user: User, day: datetime) -> Dict[str, float]:
+    """Return the day's macro totals from the rollup table (one PK lookup)."""
+    return _rollup_totals(user.id, day.date())
 
 
 def get_daily_meal_logs(user: User, day: datetime) -> list[NutritionLog]:
-    """Return all meals logged for a given day (chronological)."""
-    start = datetime(day.year, day.month, day.day)
-    end = start.replace(hour=23, minute=59, second=59)
+    """
+    Return all meals logged for a given day (chronological).
+
+    Only the columns the day table shows are loaded, read off the
+    (user_id, logged_at) index range; other attributes load on access.
+    """
+    start, end = _day_bounds(day)
+    return list(
+        db.session.scalars(
+            select(NutritionLog)
+            .options(
+                load_only(
+                    NutritionLog.id,
+                    NutritionLog.user_id,
+                    NutritionLog.logged_at,
+                    NutritionLog.meal_label,
+                    *[getattr(NutritionLog, key) for key in MACRO_KEYS],
+                )
+            )
+            .where(
+                NutritionLog.user_id == user.id,
+                NutritionLog.logged_at >= start,
+                NutritionLog.logged_at < end,
+            )
+            .order_by(NutritionLog.logged_at.asc())
+        )
+    )
+
+
+class DayView:
+    """
+    A user's logs for one day, loaded once and shared for the request.
+
+    The last meal time and the chronological list derive from the same
+    ordered result set, so the tracker's service and template layers do not
+    re-query the same rows. Totals come from the daily rollup instead.
+    """
+
+    def __init__(self, user_id: int, day: date, logs: list[NutritionLog]) -> None:
+        self.user_id = user_id
+        self.day = day
+        self.logs = logs
+
+    @property
+    def totals(self) -> Dict[str, float]:
+        # Not memoised: the rollup row changes when a log is added.
+        return _rollup_totals(self.user_id, self.day)
+
+    @property
+    def last_logged_at(self) -> Optional[datetime]:
+        return self.logs[-1].logged_at if self.logs else None
+
+    def add(self, log: NutritionLog) -> None:
+        """Include a log inserted during this request."""
+        self.logs.append(log)
+        self.logs.sort(key=lambda item: item.logged_at)
+
+
+def get_day_view(user: User, day: datetime) -> DayView:
+    """Return the request-scoped ``DayView`` for ``user`` on ``day``."""
+    views: Dict[Tuple[int, date], DayView] = g.setdefault("_nutrition_day_views", {})
+    key = (user.id, day.date())
+    view = views.get(key)
+    if view is None:
+        view = DayView(user.id, key[1], get_daily_meal_logs(user, day))
+        views[key] = view
+    return view
+
+
+def clear_day_views() -> None:
+    """Forget cached day views (for app contexts that outlive one request)."""
+    g.pop("_nutrition_day_views", None)
+
+
+def _last_logged_before(user_id: int, before: datetime) -> Optional[datetime]:
     return (
-        NutritionLog.query.filter(
-            NutritionLog.user_id == user.id,
-            NutritionLog.logged_at >= start,
-            NutritionLog.logged_at <= end,
+        db.session.query(NutritionLog.logged_at)
+        .filter(NutritionLog.user_id == user_id, NutritionLog.logged_at < before)
+        .order_by(NutritionLog.logged_at.desc())
+        .limit(1)
+        .scalar()
+    )
+
+
+def _get_phash_index() -> RecentHashIndex:
+    global _PHASH_INDEX
+    if _PHASH_INDEX is None:
+        _PHASH_INDEX = RecentHashIndex(
+            per_user=int(current_app.config.get("MEAL_PHASH_RECENT_LIMIT", 50))
+        )
+    return _PHASH_INDEX
+
+
+def _load_recent_phashes(user_id: int, limit: int) -> list[tuple[int, str, Optional[str]]]:
+    """Newest reusable logs: hashed, answered by the model or its cache."""
+    rows = (
+        db.session.query(NutritionLog.id, NutritionLog.image_phash, NutritionLog.meal_label)
+        .filter(
+            NutritionLog.user_id == user_id,
+            NutritionLog.image_phash.isnot(None),
+            NutritionLog.response_source.in_(NutritionLog.REUSABLE_SOURCES),
+            NutritionLog.ai_analysis.isnot(None),
         )
-        .order_by(NutritionLog.logged_at.asc())
+        .order_by(NutritionLog.logged_at.desc())
+        .limit(limit)
         .all()
     )
+    return [(row.id, row.image_phash, row.meal_label) for row in rows]
+
+
+def _is_reusable(log: NutritionLog) -> bool:
+    return log.response_source in NutritionLog.REUSABLE_SOURCES and bool(log.ai_analysis)
+
+
+def find_near_duplicate_log(
+    user: User,
+    image_phash: Optional[str],
+    meal_label: Optional[str],
+) -> Optional[NutritionLog]:
+    """
+    Return the user's recent same-meal log whose photo is perceptually near-identical.
+
+    Only logs answered by Gemini (or its cache) are candidates, so fallback
+    answers and earlier reuses are never propagated. Distance is measured in
+    differing dHash bits; MEAL_PHASH_MAX_DISTANCE < 0 disables reuse entirely.
+    """
+    max_distance = int(current_app.config.get("MEAL_PHASH_MAX_DISTANCE", 6))
+    if not image_phash or max_distance < 0:
+        return None
+
+    match = _get_phash_index().nearest(
+        user.id, image_phash, meal_label, max_distance, _load_recent_phashes
+    )
+    if match is None:
+        return None
+    log = db.session.get(NutritionLog, match[0])
+    if log is None or log.user_id != user.id or not _is_reusable(log):
+        return None
+    return log
+
+
+def _stored_analysis(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    snapshot = copy.deepcopy(analysis)
+    if isinstance(snapshot.get("meta"), dict):
+        # Per-request details; the source is kept in response_source.
+        snapshot["meta"] = {"model": snapshot["meta"].get("model")}
+    return snapshot
+
+
+def build_analysis_from_log(log: NutritionLog) -> Dict[str, Any]:
+    """Copy a reusable log's stored analysis, marked as a near-duplicate answer."""
+    analysis = copy.deepcopy(log.ai_analysis)
+    original = analysis.get("meta") if isinstance(analysis.get("meta"), dict) else {}
+    analysis["meta"] = {
+        "source": "near_duplicate",
+        "model": original.get("model"),
+        "reused_log_id": log.id,
+    }
+    return analysis
 
 
 def _build_next_meal_plan(
     *,
     log: NutritionLog,
     day_totals: Dict[str, float],
-    lifestyle: Optional[UserLifestyle],
+    lifestyle: Optional[LifestyleSnapshot],
 ) -> Dict[str, Any]:
     """
     Derive simple, rule-based next‑meal suggestions from the last meal + day totals.
@@ -237,6 +402,23 @@ def _build_next_meal_plan(
     }
 
 
+def _commit_without_expiring() -> None:
+    """
+    Commit, keeping loaded attributes.
+
+    The day view's logs, the new log and the user were all read or written
+    in this transaction, so expiring them would only re-select each row one
+    at a time when the tracker renders.
+    """
+    session = db.session()
+    expire_on_commit = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        session.commit()
+    finally:
+        session.expire_on_commit = expire_on_commit
+
+
 def create_nutrition_log(
     *,
     user: User,
@@ -245,25 +427,33 @@ def create_nutrition_log(
     ai_food_summary: str,
     ai_guidance: str,
     image_path: Optional[str] = None,
+    image_phash: Optional[str] = None,
+    analysis: Optional[Dict[str, Any]] = None,
+    analysis_latency_ms: Optional[int] = None,
 ) -> Dict[str, Any]:
-    """Persist a nutrition log and return analytics + timing guidance."""
+    """
+    Persist a nutrition log and return analytics + timing guidance.
+
+    When given, the model, source and timing of ``analysis`` (and its
+    end-to-end ``analysis_latency_ms``) are stored on the log.
+    """
     # Use local server time (IST on your machine) so logged meal
     # timestamps and day summaries match what you see on the clock.
     now = datetime.now()
-    lifestyle = UserLifestyle.get_lifestyle_by_user_id(user.id)
+    lifestyle = get_lifestyle(user)
 
-    last_log = (
-        NutritionLog.query.filter_by(user_id=user.id)
-        .order_by(NutritionLog.logged_at.desc())
-        .first()
-    )
-    last_meal_time = last_log.logged_at if last_log else None
+    day_view = get_day_view(user, now)
+    last_meal_time = day_view.last_logged_at
+    if last_meal_time is None:
+        # First meal of the day: the previous one is on an earlier day.
+        last_meal_time = _last_logged_before(user.id, datetime.combine(day_view.day, time.min))
 
     log = NutritionLog(
         user_id=user.id,
         meal_label=meal_label,
         logged_at=now,
         image_path=image_path,
+        image_phash=image_phash,
         calories=metrics.get("calories"),
         protein=metrics.get("protein"),
         carbs=metrics.get("carbs"),
@@ -273,8 +463,17 @@ def create_nutrition_log(
         ai_food_summary=ai_food_summary,
         ai_guidance=ai_guidance,
     )
+    if analysis_latency_ms is not None:
+        log.record_ai_response(analysis, analysis_latency_ms)
+        if log.response_source in NutritionLog.REUSABLE_SOURCES:
+            log.ai_analysis = _stored_analysis(analysis)
     db.session.add(log)
-    db.session.commit()
+    db.session.flush()
+    record_log_in_rollups(log, lifestyle)
+    _commit_without_expiring()
+    day_view.add(log)
+    if image_phash and _is_reusable(log):
+        _get_phash_index().add(user.id, log.id, image_phash, meal_label)
 
     timing_feedback = analyze_meal_timing(
         now=now,
@@ -283,7 +482,7 @@ def create_nutrition_log(
         meal_label=meal_label,
     )
 
-    day_totals = aggregate_daily_nutrition(user=user, day=now)
+    day_totals = day_view.totals
     next_meal_plan = _build_next_meal_plan(
         log=log,
         day_totals=day_totals,
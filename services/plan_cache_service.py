@@ -0,0 +1,242 @@
+import copy
+import hashlib
+import json
+import logging
+import math
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from extensions import db  # type: ignore
+from models.plan_cache_model import DietPlanCacheEntry
+
+logger = logging.getLogger(__name__)
+
+TIME_BUCKET_MINUTES = 15
+
+# Which lifestyle timing each generated meal block is scheduled against.
+MEAL_TIME_KEYS = {
+    "early_morning": "wake_time",
+    "breakfast": "breakfast_time",
+    "mid_morning_snack": "snack_time",
+    "lunch": "lunch_time",
+    "evening_snack": "snack_time",
+    "dinner": "dinner_time",
+}
+
+_STATS_LOCK = threading.Lock()
+_STATS: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0}
+
+
+def _norm_text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    text = re.sub(r"\s+", " ", str(value)).strip().lower().strip(".;,")
+    return text or None
+
+
+def _norm_list(value: Any) -> Optional[str]:
+    """Order-insensitive form of free-text lists like 'paneer, dal,  Rice'."""
+    text = _norm_text(value)
+    if not text:
+        return None
+    items = {part.strip() for part in re.split(r"[,;/\n]+", text) if part.strip()}
+    return ", ".join(sorted(items)) or None
+
+
+def _bucket(value: Any, step: float) -> Any:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return _norm_text(value)
+    if not math.isfinite(number):
+        return _norm_text(value)
+    lower = int(number // step * step)
+    return f"{lower}-{lower + step:g}"
+
+
+def _round_number(value: Any, step: float) -> Any:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return _norm_text(value)
+    if not math.isfinite(number):
+        return _norm_text(value)
+    return round(number / step) * step
+
+
+def _round_time(value: Any) -> Optional[str]:
+    text = _norm_text(value)
+    if not text:
+        return None
+    try:
+        parsed = datetime.strptime(text, "%H:%M")
+    except ValueError:
+        return text
+    minutes = parsed.hour * 60 + parsed.minute
+    minutes = int(round(minutes / TIME_BUCKET_MINUTES) * TIME_BUCKET_MINUTES) % (24 * 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def canonicalize_prompt_payload(prompt_payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce a ``build_diet_prompt_payload`` result to its cache-relevant shape.
+
+    Ages and BMI are bucketed, height/weight and sleep hours rounded, timings
+    rounded to 15 minutes and free text lower-cased with whitespace collapsed,
+    so near-identical form submissions map to the same key.
+    """
+    body = prompt_payload.get("body_profile", {}) or {}
+    medical = prompt_payload.get("medical_profile", {}) or {}
+    prefs = prompt_payload.get("diet_preferences", {}) or {}
+    timing = prompt_payload.get("lifestyle_timing", {}) or {}
+    sleep = prompt_payload.get("sleep_analysis", {}) or {}
+
+    return {
+        "body_profile": {
+            "age": _bucket(body.get("age"), 5),
+            "gender": _norm_text(body.get("gender")),
+            "height_cm": _round_number(body.get("height_cm"), 5),
+            "weight_kg": _round_number(body.get("weight_kg"), 2),
+            "activity_level": _norm_text(body.get("activity_level")),
+            "primary_fitness_goal": _norm_text(body.get("primary_fitness_goal")),
+            "bmi": _bucket(body.get("bmi"), 2),
+        },
+        "medical_profile": {
+            "medical_issues": _norm_list(medical.get("medical_issues")),
+            "additional_notes": _norm_text(medical.get("additional_notes")),
+        },
+        "diet_preferences": {
+            "diet_preference": _norm_text(prefs.get("diet_preference")),
+            "regional_cuisine": _norm_text(prefs.get("regional_cuisine")),
+            "food_likes": _norm_list(prefs.get("food_likes")),
+            "food_dislikes": _norm_list(prefs.get("food_dislikes")),
+        },
+        "lifestyle_timing": {key: _round_time(value) for key, value in sorted(timing.items())},
+        "sleep_analysis": {
+            "sleep_hours": _round_number(sleep.get("sleep_hours"), 0.5),
+            "sleep_status": _norm_text(sleep.get("sleep_status")),
+        },
+    }
+
+
+def build_plan_cache_key(canonical_payload: Dict[str, Any]) -> str:
+    encoded = json.dumps(canonical_payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def build_prompt_version(system_instruction: str, model_name: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{system_instruction}".encode()).hexdigest()[:16]
+
+
+def _personalize(plan: Dict[str, Any], prompt_payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-stamp exact times and sleep hours of the requesting user on a hit."""
+    timing = prompt_payload.get("lifestyle_timing", {}) or {}
+    meals = plan.get("meals")
+    if isinstance(meals, dict):
+        for key, time_key in MEAL_TIME_KEYS.items():
+            meal = meals.get(key)
+            if isinstance(meal, dict) and timing.get(time_key):
+                meal["scheduled_time"] = timing[time_key]
+    lifestyle = plan.get("lifestyle")
+    sleep = prompt_payload.get("sleep_analysis", {}) or {}
+    if isinstance(lifestyle, dict) and sleep.get("sleep_hours") is not None:
+        lifestyle["sleep_hours"] = sleep["sleep_hours"]
+    return plan
+
+
+def get_cached_plan(
+    cache_key: str,
+    prompt_version: str,
+    prompt_payload: Dict[str, Any],
+    record_stats: bool = True,
+) -> Optional[Dict[str, Any]]:
+    """
+    Return a stored, unexpired plan generated with the current prompt.
+
+    ``record_stats=False`` is used by single-flight followers polling for a
+    leader's result so their repeated lookups don't skew the hit ratio.
+    """
+    if int(current_app.config.get("DIET_PLAN_CACHE_TTL_SECONDS", 0)) <= 0:
+        return None
+    try:
+        row = db.session.get(DietPlanCacheEntry, cache_key)
+        if (
+            row is not None
+            and row.prompt_version == prompt_version
+            and row.expires_at > datetime.utcnow()
+        ):
+            plan = copy.deepcopy(row.response_payload)
+            # Saved by the caller's commit; the lookup itself never commits.
+            row.hit_count = DietPlanCacheEntry.hit_count + 1
+            if record_stats:
+                with _STATS_LOCK:
+                    _STATS["hits"] += 1
+            plan = _personalize(plan, prompt_payload)
+            plan.setdefault("meta", {})
+            if isinstance(plan["meta"], dict):
+                plan["meta"]["cache"] = "hit"
+            return plan
+    except SQLAlchemyError as exc:
+        db.session.rollback()
+        logger.warning("Diet plan cache lookup failed: %s", exc)
+
+    if record_stats:
+        with _STATS_LOCK:
+            _STATS["misses"] += 1
+    return None
+
+
+def store_plan(
+    cache_key: str,
+    prompt_version: str,
+    canonical_payload: Dict[str, Any],
+    plan: Dict[str, Any],
+) -> None:
+    """Persist a model-generated plan for identical canonical payloads."""
+    ttl = int(current_app.config.get("DIET_PLAN_CACHE_TTL_SECONDS", 0))
+    if ttl <= 0:
+        return
+    snapshot = copy.deepcopy(plan)
+    if isinstance(snapshot.get("meta"), dict):
+        snapshot["meta"].pop("cache", None)
+
+    try:
+        row = db.session.get(DietPlanCacheEntry, cache_key)
+        if row is None:
+            row = DietPlanCacheEntry(cache_key=cache_key, hit_count=0)
+            db.session.add(row)
+        row.prompt_version = prompt_version
+        row.canonical_payload = canonical_payload
+        row.response_payload = snapshot
+        row.expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+        db.session.commit()
+        with _STATS_LOCK:
+            _STATS["stores"] += 1
+    except SQLAlchemyError as exc:
+        db.session.rollback()
+        logger.warning("Diet plan cache store failed: %s", exc)
+
+
+def purge_plan_cache(current_prompt_version: str) -> int:
+    """Delete expired plans and plans generated with an older prompt."""
+    removed = DietPlanCacheEntry.query.filter(
+        db.or_(
+            DietPlanCacheEntry.expires_at <= datetime.utcnow(),
+            DietPlanCacheEntry.prompt_version != current_prompt_version,
+        )
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return int(removed or 0)
+
+
+def get_plan_cache_stats() -> Dict[str, Any]:
+    with _STATS_LOCK:
+        stats: Dict[str, Any] = dict(_STATS)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
@@ -0,0 +1,305 @@
+import cProfile
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from flask import Flask
+from itsdangerous import BadSignature, URLSafeSerializer
+
+from config import DEFAULT_SECRET_KEY
+
+logger = logging.getLogger(__name__)
+
+MODE_CPROFILE = "cprofile"
+MODE_SAMPLE = "sample"
+MODES = (MODE_CPROFILE, MODE_SAMPLE)
+
+HEADER = "X-SwasthyaSync-Profile"
+RESPONSE_HEADER = "X-SwasthyaSync-Profile-File"
+_TOKEN_SALT = "swasthyasync-profile"
+
+_LOCK = threading.Lock()
+_STATS: Dict[str, int] = {
+    "written": 0,
+    "write_errors": 0,
+    "pruned": 0,
+    "rejected_tokens": 0,
+    "cprofile_busy": 0,
+    "skipped": 0,
+}
+# cProfile is process-wide on Python >= 3.12 (sys.monitoring), so only one
+# request at a time may run it; the others fall back to the sampler.
+_CPROFILE_LOCK = threading.Lock()
+
+
+def _bump(key: str) -> None:
+    with _LOCK:
+        _STATS[key] += 1
+
+
+def get_profiling_stats() -> Dict[str, int]:
+    """Worker-local counters for profiles written, failed, pruned, skipped and bad tokens."""
+    with _LOCK:
+        return dict(_STATS)
+
+
+def tokens_allowed(secret_key: Optional[str]) -> bool:
+    """Header tokens need a real SECRET_KEY; the public default lets anyone mint one."""
+    return bool(secret_key) and secret_key != DEFAULT_SECRET_KEY
+
+
+def _serializer(secret_key: str) -> URLSafeSerializer:
+    return URLSafeSerializer(secret_key, salt=_TOKEN_SALT)
+
+
+def create_profile_token(secret_key: str, mode: str, max_age_seconds: int) -> str:
+    """Signed value for the profiling header, valid for ``max_age_seconds``."""
+    if not tokens_allowed(secret_key):
+        raise ValueError("Set SWASTHYASYNC_SECRET_KEY before issuing profile tokens.")
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiling mode {mode!r}.")
+    return _serializer(secret_key).dumps(
+        {"mode": mode, "exp": int(time.time()) + max_age_seconds}
+    )
+
+
+def read_profile_token(secret_key: str, token: str) -> Optional[str]:
+    """Profiling mode from a valid, unexpired header token, else None."""
+    if not tokens_allowed(secret_key):
+        return None
+    try:
+        payload = _serializer(secret_key).loads(token)
+    except BadSignature:
+        return None
+    if not isinstance(payload, dict) or payload.get("mode") not in MODES:
+        return None
+    if int(payload.get("exp") or 0) < time.time():
+        return None
+    return payload["mode"]
+
+
+class StackSampler:
+    """
+    Statistical profiler for one thread.
+
+    A daemon thread reads the target thread's stack every ``interval``
+    seconds and counts identical stacks, so the profiled request pays only
+    for GIL hand-offs rather than a hook on every call.
+    """
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                )
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def __enter__(self) -> "StackSampler":
+        self.start()
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.stop()
+
+    def collapsed(self) -> str:
+        """Folded stacks (``frame;frame;frame count``) for flamegraph.pl or speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _collapsed_writer(sampler: StackSampler) -> Callable[[str], None]:
+    def _dump(path: str) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(sampler.collapsed())
+
+    return _dump
+
+
+def _slug(path: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-")[:60] or "root"
+
+
+class ProfilingMiddleware:
+    """
+    WSGI middleware that profiles selected requests and writes the results.
+
+    A request is profiled when it carries a valid signed ``HEADER`` token
+    (which also picks the mode) or, for paths under ``path_prefixes``, when
+    it falls within ``sample_rate``. cProfile runs are written as ``.prof``
+    (pstats) files and sampler runs as ``.collapsed`` folded stacks. Only the
+    view call is covered; bodies streamed after it returns are not.
+
+    cProfile runs one request at a time; a cProfile request arriving while
+    another is profiled is sampled instead. Profiler failures never fail the
+    request, which then simply runs unprofiled.
+    """
+
+    def __init__(self, wsgi_app: Callable, config: Dict[str, Any], output_dir: str) -> None:
+        self.wsgi_app = wsgi_app
+        self.secret_key = config["SECRET_KEY"]
+        self.sample_rate = float(config.get("PROFILING_SAMPLE_RATE", 0.0))
+        self.default_mode = config.get("PROFILING_MODE", MODE_CPROFILE)
+        self.path_prefixes = tuple(config.get("PROFILING_PATH_PREFIXES") or ())
+        self.sample_interval = float(config.get("PROFILING_SAMPLE_INTERVAL_MS", 5)) / 1000
+        self.max_files = int(config.get("PROFILING_MAX_FILES", 200))
+        self.max_age_seconds = float(config.get("PROFILING_MAX_AGE_HOURS", 72)) * 3600
+        self.output_dir = output_dir
+        self._prune_lock = threading.Lock()
+
+    def _select(self, environ: Dict[str, Any]) -> Optional[str]:
+        token = environ.get("HTTP_" + HEADER.upper().replace("-", "_"))
+        if token:
+            mode = read_profile_token(self.secret_key, token)
+            if mode is None:
+                _bump("rejected_tokens")
+            return mode
+        path = environ.get("PATH_INFO", "")
+        if self.path_prefixes and not path.startswith(self.path_prefixes):
+            return None
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return self.default_mode
+        return None
+
+    def __call__(self, environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        mode = self._select(environ)
+        if mode is None:
+            return self.wsgi_app(environ, start_response)
+
+        filename = "{:%Y%m%dT%H%M%S%f}-{}-{}".format(
+            datetime.now(), environ.get("REQUEST_METHOD", "GET"), _slug(environ.get("PATH_INFO", ""))
+        )
+
+        profiler: Optional[cProfile.Profile] = None
+        sampler: Optional[StackSampler] = None
+        if mode == MODE_CPROFILE:
+            profiler = self._start_cprofile()
+        if profiler is None:
+            sampler = self._start_sampler()
+            if sampler is None:
+                _bump("skipped")
+                return self.wsgi_app(environ, start_response)
+        extension = "prof" if profiler is not None else "collapsed"
+
+        def _start_response(status, headers, exc_info=None):
+            headers = list(headers) + [(RESPONSE_HEADER, f"{filename}.{extension}")]
+            return start_response(status, headers, exc_info)
+
+        started = time.perf_counter()
+        try:
+            return self.wsgi_app(environ, _start_response)
+        finally:
+            if profiler is not None:
+                try:
+                    profiler.disable()
+                finally:
+                    _CPROFILE_LOCK.release()
+                self._write(filename, extension, started, profiler.dump_stats)
+            elif sampler is not None:
+                sampler.stop()
+                self._write(filename, extension, started, _collapsed_writer(sampler))
+
+    def _start_cprofile(self) -> Optional[cProfile.Profile]:
+        """Enable cProfile for this request, or None if it is already in use."""
+        if not _CPROFILE_LOCK.acquire(blocking=False):
+            _bump("cprofile_busy")
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as exc:
+            # Another profiling tool (debugger, coverage) holds sys.monitoring.
+            _CPROFILE_LOCK.release()
+            logger.info("cProfile unavailable, sampling instead: %s", exc)
+            _bump("cprofile_busy")
+            return None
+        return profiler
+
+    def _start_sampler(self) -> Optional[StackSampler]:
+        sampler = StackSampler(threading.get_ident(), self.sample_interval)
+        try:
+            sampler.start()
+        except RuntimeError as exc:
+            logger.warning("Could not start the stack sampler: %s", exc)
+            return None
+        return sampler
+
+    def _write(
+        self, filename: str, extension: str, started: float, dump: Callable[[str], None]
+    ) -> None:
+        elapsed_ms = round((time.perf_counter() - started) * 1000)
+        path = os.path.join(self.output_dir, f"{filename}.{extension}")
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            dump(path)
+        except Exception as exc:  # a lost profile must not fail the request
+            logger.warning("Could not write profile %s: %s", path, exc)
+            _bump("write_errors")
+            return
+        logger.info("Profiled request in %s ms: %s", elapsed_ms, path)
+        _bump("written")
+        self._prune()
+
+    def _prune(self) -> None:
+        """Delete profiles beyond PROFILING_MAX_FILES or older than PROFILING_MAX_AGE_HOURS."""
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            entries = []
+            for name in os.listdir(self.output_dir):
+                if name.endswith((".prof", ".collapsed")):
+                    path = os.path.join(self.output_dir, name)
+                    try:
+                        entries.append((os.path.getmtime(path), path))
+                    except OSError:
+                        continue
+            entries.sort(reverse=True)
+            cutoff = time.time() - self.max_age_seconds
+            for index, (mtime, path) in enumerate(entries):
+                if index >= self.max_files or mtime < cutoff:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    _bump("pruned")
+        finally:
+            self._prune_lock.release()
+
+
+def init_profiling(app: Flask) -> None:
+    """Wrap ``app.wsgi_app`` with ``ProfilingMiddleware`` when PROFILING_ENABLED is on."""
+    if not app.config.get("PROFILING_ENABLED"):
+        return
+    if not tokens_allowed(app.config.get("SECRET_KEY")):
+        logger.warning(
+            "Profiling header tokens are disabled until SWASTHYASYNC_SECRET_KEY is set; "
+            "only sampled requests will be profiled."
+        )
+    output_dir = app.config.get("PROFILING_DIR") or os.path.join(app.instance_path, "profiles")
+    app.wsgi_app = ProfilingMiddleware(app.wsgi_app, app.config, output_dir)
@@ -0,0 +1,209 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from flask import current_app
+from sqlalchemy import case, delete, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from extensions import db  # type: ignore
+from models.rate_limit_model import OutboundCallLease, OutboundRateLimit
+
+logger = logging.getLogger(__name__)
+
+POLICY_WAIT = "wait"
+POLICY_FALLBACK = "fallback"
+
+_POLL_SECONDS = 0.05
+
+_STATS_LOCK = threading.Lock()
+_STATS: Dict[str, float] = {
+    "acquired": 0,
+    "waited": 0,
+    "rejected": 0,
+    "unavailable": 0,
+    "wait_seconds": 0.0,
+    "max_wait_seconds": 0.0,
+}
+
+
+class RateLimitedError(RuntimeError):
+    """No outbound call slot was available within the configured policy."""
+
+
+def _settings() -> Dict[str, Any]:
+    config = current_app.config
+    return {
+        "rate": float(config.get("GEMINI_RATE_LIMIT_PER_SECOND", 0)),
+        "burst": max(1.0, float(config.get("GEMINI_RATE_LIMIT_BURST", 1))),
+        "max_concurrent": int(config.get("GEMINI_MAX_CONCURRENT_CALLS", 0)),
+        "lease": float(config.get("GEMINI_CALL_LEASE_SECONDS", 300)),
+        "policy": config.get("GEMINI_RATE_LIMIT_POLICY", POLICY_WAIT),
+        "max_wait": float(config.get("GEMINI_RATE_LIMIT_MAX_WAIT_SECONDS", 10)),
+    }
+
+
+def _available_tokens(settings: Dict[str, Any], now: float) -> Any:
+    """SQL expression for the bucket's tokens after refilling up to ``now``."""
+    table = OutboundRateLimit.__table__
+    refilled = table.c.tokens + (literal(now) - table.c.refilled_at) * settings["rate"]
+    return case((refilled > settings["burst"], settings["burst"]), else_=refilled)
+
+
+def _ensure_bucket(name: str, settings: Dict[str, Any], now: float) -> None:
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(
+                insert(OutboundRateLimit.__table__).values(
+                    name=name, tokens=settings["burst"], refilled_at=now
+                )
+            )
+    except IntegrityError:
+        pass
+
+
+def _try_acquire(name: str, settings: Dict[str, Any]) -> Optional[int]:
+    """
+    Take one token and, under a concurrency cap, one call lease.
+
+    Returns the lease id (0 when concurrency is uncapped) or None when no
+    slot is free. The bucket UPDATE runs first and locks the bucket row, so
+    the lease count and insert that follow are serialised across workers.
+    Leases expire ``lease`` seconds after they are taken, so a slot leaked
+    by a crashed worker frees itself however busy the limiter is.
+    """
+    bucket = OutboundRateLimit.__table__
+    leases = OutboundCallLease.__table__
+    now = time.time()
+    available = _available_tokens(settings, now)
+
+    conditions = [bucket.c.name == name]
+    values: Dict[str, Any] = {"refilled_at": now}
+    if settings["rate"] > 0:
+        conditions.append(available >= 1)
+        values["tokens"] = available - 1
+
+    with db.engine.connect() as conn:
+        with conn.begin() as transaction:
+            claimed = conn.execute(update(bucket).where(*conditions).values(**values)).rowcount
+            if claimed != 1:
+                transaction.rollback()
+            elif settings["max_concurrent"] <= 0:
+                return 0
+            else:
+                conn.execute(
+                    delete(leases).where(leases.c.name == name, leases.c.expires_at < now)
+                )
+                in_flight = conn.execute(
+                    select(func.count()).select_from(leases).where(leases.c.name == name)
+                ).scalar()
+                if in_flight >= settings["max_concurrent"]:
+                    # Give the token back with the rest of the transaction.
+                    transaction.rollback()
+                    return None
+                return conn.execute(
+                    insert(leases).values(name=name, expires_at=now + settings["lease"])
+                ).inserted_primary_key[0]
+
+        exists = conn.execute(select(bucket.c.name).where(bucket.c.name == name)).first()
+    if exists is None:
+        _ensure_bucket(name, settings, now)
+        return _try_acquire(name, settings)
+    return None
+
+
+def _next_poll(name: str, settings: Dict[str, Any]) -> float:
+    """Seconds until a token is likely to be free; short poll for slots."""
+    if settings["rate"] <= 0:
+        return _POLL_SECONDS
+    table = OutboundRateLimit.__table__
+    with db.engine.connect() as conn:
+        tokens = conn.execute(
+            select(_available_tokens(settings, time.time())).where(table.c.name == name)
+        ).scalar()
+    if tokens is None or tokens >= 1:
+        return _POLL_SECONDS
+    return max(_POLL_SECONDS, (1 - tokens) / settings["rate"])
+
+
+def _release(name: str, lease_id: int) -> None:
+    if not lease_id:
+        return
+    leases = OutboundCallLease.__table__
+    with db.engine.begin() as conn:
+        conn.execute(delete(leases).where(leases.c.id == lease_id, leases.c.name == name))
+
+
+def _record_wait(waited: float, queued: bool) -> None:
+    with _STATS_LOCK:
+        _STATS["acquired"] += 1
+        if queued:
+            _STATS["waited"] += 1
+            _STATS["wait_seconds"] += waited
+            _STATS["max_wait_seconds"] = max(_STATS["max_wait_seconds"], waited)
+
+
+@contextmanager
+def outbound_call_slot(name: str = "gemini") -> Iterator[None]:
+    """
+    Hold a rate-limited, concurrency-capped slot for one outbound model call.
+
+    With the ``wait`` policy callers queue for up to
+    ``GEMINI_RATE_LIMIT_MAX_WAIT_SECONDS``; with ``fallback`` they fail fast.
+    Raises ``RateLimitedError`` when no slot is granted. If the limiter table
+    cannot be used the call proceeds unthrottled.
+    """
+    settings = _settings()
+    if settings["rate"] <= 0 and settings["max_concurrent"] <= 0:
+        yield
+        return
+
+    started = time.monotonic()
+    deadline = started + (settings["max_wait"] if settings["policy"] == POLICY_WAIT else 0)
+    lease_id: Optional[int] = None
+    queued = False
+    try:
+        while True:
+            lease_id = _try_acquire(name, settings)
+            if lease_id is not None:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                with _STATS_LOCK:
+                    _STATS["rejected"] += 1
+                raise RateLimitedError(f"No {name} call slot within {settings['max_wait']}s")
+            # Jitter keeps waiting workers from polling in lockstep.
+            pause = _next_poll(name, settings) * random.uniform(1.0, 1.2)
+            queued = True
+            time.sleep(min(remaining, pause))
+    except SQLAlchemyError as exc:
+        logger.warning("Outbound rate limiter unavailable: %s", exc)
+        with _STATS_LOCK:
+            _STATS["unavailable"] += 1
+        lease_id = None
+
+    if lease_id is not None:
+        _record_wait(time.monotonic() - started, queued)
+    try:
+        yield
+    finally:
+        if lease_id:
+            try:
+                _release(name, lease_id)
+            except SQLAlchemyError as exc:  # pragma: no cover - the lease expires
+                logger.warning("Failed to release outbound call slot: %s", exc)
+
+
+def get_rate_limit_stats() -> Dict[str, Any]:
+    """Queue-wait metrics for outbound model calls in this worker."""
+    with _STATS_LOCK:
+        stats: Dict[str, Any] = dict(_STATS)
+    stats["avg_wait_ms"] = (
+        round(stats["wait_seconds"] * 1000 / stats["acquired"], 2) if stats["acquired"] else 0.0
+    )
+    stats["wait_seconds"] = round(stats["wait_seconds"], 4)
+    stats["max_wait_seconds"] = round(stats["max_wait_seconds"], 4)
+    return stats
@@ -0,0 +1,171 @@
+import copy
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from flask import current_app
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from extensions import db  # type: ignore
+from models.inflight_model import InflightCall
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_OWNER_PREFIX = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class _LocalCall:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.failed = False
+
+
+_LOCAL_LOCK = threading.Lock()
+_LOCAL_CALLS: Dict[str, _LocalCall] = {}
+_STATS: Dict[str, int] = {
+    "leaders": 0,
+    "local_followers": 0,
+    "remote_followers": 0,
+    "fallthrough": 0,
+}
+
+
+def _bump(name: str) -> None:
+    with _LOCAL_LOCK:
+        _STATS[name] += 1
+
+
+def _try_acquire(key: str, ttl_seconds: float) -> Optional[bool]:
+    """
+    Insert the cross-process lock row; False if another worker holds it.
+
+    Returns None when the lock table itself is unusable, in which case the
+    caller proceeds without cross-process coalescing.
+    """
+    now = datetime.utcnow()
+    owner = f"{_OWNER_PREFIX}:{threading.get_ident()}"
+    table = InflightCall.__table__
+    try:
+        with db.engine.begin() as conn:
+            # Clear a lock abandoned by a crashed worker before claiming.
+            conn.execute(
+                delete(table).where(table.c.call_key == key, table.c.expires_at < now)
+            )
+            conn.execute(
+                insert(table).values(
+                    call_key=key,
+                    owner=owner,
+                    expires_at=now + timedelta(seconds=ttl_seconds),
+                )
+            )
+        return True
+    except IntegrityError:
+        return False
+    except SQLAlchemyError as exc:
+        logger.warning("Single-flight lock unavailable for %s: %s", key, exc)
+        return None
+
+
+def _release(key: str) -> None:
+    table = InflightCall.__table__
+    with db.engine.begin() as conn:
+        conn.execute(delete(table).where(table.c.call_key == key))
+
+
+def _lock_held(key: str) -> bool:
+    table = InflightCall.__table__
+    with db.engine.connect() as conn:
+        expires_at = conn.execute(
+            select(table.c.expires_at).where(table.c.call_key == key)
+        ).scalar()
+    return expires_at is not None and expires_at >= datetime.utcnow()
+
+
+def single_flight(
+    key: str,
+    compute: Callable[[], T],
+    load_shared: Callable[[], Optional[T]],
+) -> Tuple[T, bool]:
+    """
+    Run ``compute`` once for concurrent callers that share ``key``.
+
+    Threads in this worker wait on the leader's in-memory result. Other
+    worker processes see the leader's row in ``inflight_calls`` and poll
+    ``load_shared`` (typically a cache lookup the leader populates) until
+    the result appears or the lock is released. Callers that give up waiting
+    compute on their own, so coalescing never turns into an outage.
+
+    Returns ``(result, shared)`` where ``shared`` is True if the result came
+    from another caller's computation.
+    """
+    config = current_app.config
+    wait_seconds = float(config.get("SINGLE_FLIGHT_WAIT_SECONDS", 90))
+    lock_ttl = float(config.get("SINGLE_FLIGHT_LOCK_TTL_SECONDS", 120))
+    poll_seconds = float(config.get("SINGLE_FLIGHT_POLL_SECONDS", 0.25))
+
+    with _LOCAL_LOCK:
+        call = _LOCAL_CALLS.get(key)
+        leader = call is None
+        if leader:
+            call = _LocalCall()
+            _LOCAL_CALLS[key] = call
+
+    if not leader:
+        _bump("local_followers")
+        if call.done.wait(wait_seconds) and not call.failed:
+            # Prefer the shared copy: it is what a later caller would get.
+            shared = load_shared()
+            if shared is None:
+                shared = copy.deepcopy(call.result)
+            return shared, True
+        _bump("fallthrough")
+        return compute(), False
+
+    try:
+        deadline = time.monotonic() + wait_seconds
+        acquired = _try_acquire(key, lock_ttl)
+        while acquired is False:
+            shared = load_shared()
+            if shared is not None:
+                _bump("remote_followers")
+                call.result = shared
+                return copy.deepcopy(shared), True
+            if time.monotonic() > deadline:
+                _bump("fallthrough")
+                break
+            if not _lock_held(key):
+                acquired = _try_acquire(key, lock_ttl)
+                continue
+            time.sleep(poll_seconds)
+
+        if acquired:
+            _bump("leaders")
+        try:
+            call.result = compute()
+        finally:
+            if acquired:
+                try:
+                    _release(key)
+                except Exception:  # pragma: no cover - lock expires anyway
+                    logger.exception("Failed to release single-flight lock %s", key)
+        return call.result, False
+    except BaseException:
+        call.failed = True
+        raise
+    finally:
+        with _LOCAL_LOCK:
+            _LOCAL_CALLS.pop(key, None)
+        call.done.set()
+
+
+def get_single_flight_stats() -> Dict[str, int]:
+    with _LOCAL_LOCK:
+        return {**_STATS, "in_flight": len(_LOCAL_CALLS)}
@@ -3,6 +3,10 @@ from typing import Dict, Optional
 
 TIME_FORMAT = "%H:%M"
 
+OPTIMAL_MIN_HOURS = 7
+OPTIMAL_MAX_HOURS = 9
+EXCESSIVE_HOURS = 9.5
+
 
 def _to_time(value: Optional[str]) -> Optional[time]:
     if not value:
@@ -41,11 +45,11 @@ def calculate_sleep_analysis(
     duration = wake_dt - sleep_dt
     sleep_hours = round(duration.total_seconds() / 3600.0, 2)
 
-    if sleep_hours < 7:
+    if sleep_hours < OPTIMAL_MIN_HOURS:
         status = "insufficient"
-    elif 7 <= sleep_hours <= 9:
+    elif OPTIMAL_MIN_HOURS <= sleep_hours <= OPTIMAL_MAX_HOURS:
         status = "optimal"
-    elif sleep_hours > 9.5:
+    elif sleep_hours > EXCESSIVE_HOURS:
         status = "excessive"
     else:
         status = "borderline"
@@ -0,0 +1,121 @@
+"""
+Calendar buckets as SQL expressions that compile for the configured database.
+
+SQLite has no date_trunc and PostgreSQL has no ``date(x, modifier)``, so the
+rollup rebuilds and latency reports build their day/week/month/hour buckets
+from these constructs rather than from dialect-specific ``func`` calls.
+Weeks start on Monday, matching ``analytics_service.week_start``.
+"""
+from typing import Any
+
+from sqlalchemy import Date, Integer, String, extract, literal
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+_MYSQL = ("mysql", "mariadb")
+
+
+class _DateBucket(FunctionElement):
+    type = Date()
+    inherit_cache = True
+
+
+class day_of(_DateBucket):
+    """Calendar date of a timestamp."""
+
+    name = "day_of"
+    inherit_cache = True
+
+
+class week_of(_DateBucket):
+    """Monday of the week a timestamp falls in."""
+
+    name = "week_of"
+    inherit_cache = True
+
+
+class month_of(_DateBucket):
+    """First day of the month a timestamp falls in."""
+
+    name = "month_of"
+    inherit_cache = True
+
+
+class hour_label(FunctionElement):
+    """``YYYY-MM-DD HH:00`` text label of the hour a timestamp falls in."""
+
+    name = "hour_label"
+    type = String()
+    inherit_cache = True
+
+
+def _arg(element: FunctionElement, compiler: Any, **kw: Any) -> str:
+    return compiler.process(list(element.clauses)[0], **kw)
+
+
+@compiles(day_of)
+def _day_of_default(element, compiler, **kw):
+    return f"CAST({_arg(element, compiler, **kw)} AS DATE)"
+
+
+@compiles(day_of, "sqlite")
+def _day_of_sqlite(element, compiler, **kw):
+    return f"date({_arg(element, compiler, **kw)})"
+
+
+@compiles(week_of)
+def _week_of_default(element, compiler, **kw):
+    return f"CAST(date_trunc('week', {_arg(element, compiler, **kw)}) AS DATE)"
+
+
+@compiles(week_of, "sqlite")
+def _week_of_sqlite(element, compiler, **kw):
+    return f"date({_arg(element, compiler, **kw)}, 'weekday 0', '-6 days')"
+
+
+@compiles(month_of)
+def _month_of_default(element, compiler, **kw):
+    return f"CAST(date_trunc('month', {_arg(element, compiler, **kw)}) AS DATE)"
+
+
+@compiles(month_of, "sqlite")
+def _month_of_sqlite(element, compiler, **kw):
+    return f"date({_arg(element, compiler, **kw)}, 'start of month')"
+
+
+@compiles(hour_label)
+def _hour_label_default(element, compiler, **kw):
+    return f"to_char({_arg(element, compiler, **kw)}, 'YYYY-MM-DD HH24:00')"
+
+
+@compiles(hour_label, "sqlite")
+def _hour_label_sqlite(element, compiler, **kw):
+    return f"strftime('%Y-%m-%d %H:00', {_arg(element, compiler, **kw)})"
+
+
+for _dialect in _MYSQL:
+
+    @compiles(day_of, _dialect)
+    def _day_of_mysql(element, compiler, **kw):
+        return f"DATE({_arg(element, compiler, **kw)})"
+
+    @compiles(week_of, _dialect)
+    def _week_of_mysql(element, compiler, **kw):
+        value = _arg(element, compiler, **kw)
+        return f"DATE_SUB(DATE({value}), INTERVAL WEEKDAY({value}) DAY)"
+
+    @compiles(month_of, _dialect)
+    def _month_of_mysql(element, compiler, **kw):
+        value = _arg(element, compiler, **kw)
+        return f"DATE_SUB(DATE({value}), INTERVAL DAYOFMONTH({value}) - 1 DAY)"
+
+    @compiles(hour_label, _dialect)
+    def _hour_label_mysql(element, compiler, **kw):
+        # Bound, so the driver's %-style paramstyle leaves the pattern alone.
+        pattern = compiler.process(literal("%Y-%m-%d %H:00"), **kw)
+        return f"DATE_FORMAT({_arg(element, compiler, **kw)}, {pattern})"
+
+
+def minute_of_day(column: Any) -> Any:
+    """SQL minutes since midnight for a time or datetime column."""
+    return extract("hour", column).cast(Integer) * 60 + extract("minute", column).cast(Integer)
@@ -1,7 +1,27 @@
 from datetime import datetime, timedelta, time
 from typing import Dict, Optional
 
-from models.lifestyle_model import UserLifestyle
+from services.lifestyle_cache_service import LifestyleSnapshot
+
+EARLY_LUNCH_MINUTES = 90
+LONG_GAP_MINUTES = 5 * 60
+DINNER_BEFORE_SLEEP_MINUTES = 2 * 60
+
+EARLY_LUNCH_ADVICE = (
+    "You're having lunch quite early compared to your usual schedule. "
+    "Aim to keep at least 3–4 hours after breakfast so your hunger and "
+    "blood sugar patterns stay steady."
+)
+LONG_GAP_ADVICE = (
+    "There is a long gap (>5 hours) between this meal and your next "
+    "scheduled one. Consider adding a light, high-fiber snack in between "
+    "to avoid energy crashes."
+)
+LATE_DINNER_ADVICE = (
+    "Your dinner is quite close to your sleep time. Try to finish dinner "
+    "at least 2–3 hours before bed to support digestion, glucose control, "
+    "and sleep quality."
+)
 
 
 def _to_datetime(base: datetime, t: Optional[time]) -> Optional[datetime]:
@@ -13,7 +33,7 @@ def _to_datetime(base: datetime, t: Optional[time]) -> Optional[datetime]:
 def analyze_meal_timing(
     *,
     now: datetime,
-    lifestyle: Optional[UserLifestyle],
+    lifestyle: Optional[LifestyleSnapshot],
     last_meal_time: Optional[datetime],
     meal_label: Optional[str],
 ) -> Dict[str, str]:
@@ -41,12 +61,8 @@ def analyze_meal_timing(
 
     if meal_label and meal_label.lower() == "lunch" and lunch_dt:
         # Lunch more than 90 minutes earlier than schedule
-        if now < lunch_dt - timedelta(minutes=90):
-            advice.append(
-                "You're having lunch quite early compared to your usual schedule. "
-                "Aim to keep at least 3–4 hours after breakfast so your hunger and "
-                "blood sugar patterns stay steady."
-            )
+        if now < lunch_dt - timedelta(minutes=EARLY_LUNCH_MINUTES):
+            advice.append(EARLY_LUNCH_ADVICE)
             tags.append("early_lunch")
 
     if last_meal_time and lifestyle:
@@ -56,21 +72,15 @@ def analyze_meal_timing(
         ]
         next_meal_dt = min(candidate_times) if candidate_times else None
 
-        if next_meal_dt and (next_meal_dt - last_meal_time) > timedelta(hours=5):
-            advice.append(
-                "There is a long gap (>5 hours) between this meal and your next "
-                "scheduled one. Consider adding a light, high-fiber snack in between "
-                "to avoid energy crashes."
-            )
+        if next_meal_dt and (next_meal_dt - last_meal_time) > timedelta(
+            minutes=LONG_GAP_MINUTES
+        ):
+            advice.append(LONG_GAP_ADVICE)
             tags.append("long_gap_snack_suggestion")
 
     if meal_label and meal_label.lower() == "dinner" and dinner_dt and sleep_dt:
-        if dinner_dt > sleep_dt - timedelta(hours=2):
-            advice.append(
-                "Your dinner is quite close to your sleep time. Try to finish dinner "
-                "at least 2–3 hours before bed to support digestion, glucose control, "
-                "and sleep quality."
-            )
+        if dinner_dt > sleep_dt - timedelta(minutes=DINNER_BEFORE_SLEEP_MINUTES):
+            advice.append(LATE_DINNER_ADVICE)
             tags.append("late_dinner")
 
     return {
@@ -0,0 +1,112 @@
+import hashlib
+import mmap
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional, Union
+
+from flask import Request, current_app
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# Anything the analysis pipeline accepts in place of a fully read ``bytes``.
+ImageBuffer = Union[bytes, memoryview, mmap.mmap]
+
+
+class HashingSpooledFile(tempfile.SpooledTemporaryFile):
+    """
+    Upload sink that hashes and size-checks each chunk as it is parsed.
+
+    Data stays in memory until ``max_size`` bytes, then rolls over to a
+    temporary file. Exceeding ``limit`` aborts parsing with a 413 before the
+    rest of the body is read.
+    """
+
+    def __init__(self, max_size: int, limit: Optional[int]) -> None:
+        super().__init__(max_size=max_size, mode="w+b")
+        self._digest = hashlib.sha256()
+        self._limit = limit
+        self.size = 0
+
+    def write(self, data) -> int:  # type: ignore[override]
+        self.size += len(data)
+        if self._limit and self.size > self._limit:
+            raise RequestEntityTooLarge()
+        self._digest.update(data)
+        return super().write(data)
+
+    @property
+    def sha256(self) -> str:
+        return self._digest.hexdigest()
+
+    @property
+    def on_disk(self) -> bool:
+        return bool(self._rolled)
+
+
+class UploadRequest(Request):
+    """Request class that streams file parts into ``HashingSpooledFile``."""
+
+    #: Per-file size limit; views taking non-photo uploads set it (together
+    #: with ``max_content_length``) before touching ``request.files``.
+    file_size_limit: Optional[int] = None
+
+    def _get_file_stream(
+        self,
+        total_content_length: Optional[int],
+        content_type: Optional[str],
+        filename: Optional[str] = None,
+        content_length: Optional[int] = None,
+    ):
+        config = current_app.config
+        return HashingSpooledFile(
+            max_size=int(config.get("UPLOAD_SPOOL_THRESHOLD_BYTES", 512 * 1024)),
+            limit=(
+                self.file_size_limit
+                if self.file_size_limit is not None
+                else config.get("MEAL_UPLOAD_MAX_BYTES")
+            ),
+        )
+
+
+class UploadBuffer:
+    """A parsed upload exposed as a zero-copy buffer plus its digest."""
+
+    def __init__(self, data: ImageBuffer, sha256: str, size: int, mime_type: str) -> None:
+        self.data = data
+        self.sha256 = sha256
+        self.size = size
+        self.mime_type = mime_type
+
+
+@contextmanager
+def open_upload_buffer(file_storage: FileStorage) -> Iterator[UploadBuffer]:
+    """
+    Yield the upload without materialising it as a ``bytes`` object.
+
+    Spooled-to-disk uploads are memory-mapped read-only; small in-memory
+    uploads are exposed as a ``memoryview`` of the spool buffer.
+    """
+    mime_type = file_storage.mimetype or "image/jpeg"
+    stream = file_storage.stream
+
+    if not isinstance(stream, HashingSpooledFile):
+        data = stream.read()
+        yield UploadBuffer(data, hashlib.sha256(data).hexdigest(), len(data), mime_type)
+        return
+
+    stream.flush()
+    if stream.size == 0:
+        yield UploadBuffer(b"", stream.sha256, 0, mime_type)
+        return
+
+    if stream.on_disk:
+        data: ImageBuffer = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+        data = stream._file.getbuffer()  # type: ignore[attr-defined]
+    try:
+        yield UploadBuffer(data, stream.sha256, stream.size, mime_type)
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+        else:
+            data.release()
@@ -0,0 +1,39 @@
+from typing import Optional
+
+from flask import current_app, g, has_request_context, session
+
+from extensions import db  # type: ignore
+from models.user_model import User
+
+_UNLOADED = object()
+
+
+def get_current_user() -> Optional[User]:
+    """
+    The signed-in user for this request, or None.
+
+    The first call loads the user and keeps it on ``flask.g``; later calls
+    in the same request, from routes or services, reuse it without touching
+    the database. Lifestyle timings come from
+    ``lifestyle_cache_service.get_lifestyle``, which checks its snapshot
+    against the ``lifestyle_version`` loaded here.
+    """
+    if not has_request_context():
+        return None
+    user = g.get("current_user", _UNLOADED)
+    if user is _UNLOADED:
+        user_id = session.get("user_id")
+        user = db.session.get(User, user_id) if user_id else None
+        g.current_user = user
+    return user
+
+
+def forget_current_user() -> None:
+    """Drop the cached user, e.g. after logging in or out mid-request."""
+    g.pop("current_user", None)
+
+
+def is_admin(user: Optional[User]) -> bool:
+    """Whether ``user``'s email is listed in ADMIN_EMAILS."""
+    admins = current_app.config.get("ADMIN_EMAILS") or ()
+    return user is not None and (user.email or "").lower() in admins
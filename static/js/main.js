@@ -9,6 +9,71 @@ document.addEventListener("DOMContentLoaded", () => {
     });
   });
 
+  // Poll background meal analysis jobs until the log is ready
+  document.querySelectorAll("[data-job-status-url]").forEach((card) => {
+    const url = card.getAttribute("data-job-status-url");
+    const message = card.querySelector("[data-job-message]");
+    const poll = () => {
+      fetch(url, { headers: { Accept: "application/json" } })
+        .then((res) => res.json())
+        .then((job) => {
+          if (job.status === "done" && job.redirect_url) {
+            window.location.assign(job.redirect_url);
+          } else if (job.status === "failed") {
+            if (message) message.textContent = "We couldn't analyse that photo. Please try again.";
+          } else {
+            setTimeout(poll, 1500);
+          }
+        })
+        .catch(() => setTimeout(poll, 3000));
+    };
+    setTimeout(poll, 1000);
+  });
+
+  // Stream diet plan generation progress (Server-Sent Events)
+  document.querySelectorAll("[data-diet-events-url]").forEach((panel) => {
+    if (!window.EventSource) {
+      setTimeout(() => window.location.reload(), 5000);
+      return;
+    }
+    const status = panel.querySelector("[data-diet-status]");
+    const grid = panel.querySelector("[data-diet-partials]");
+    const source = new EventSource(panel.getAttribute("data-diet-events-url"));
+
+    source.addEventListener("partial", (e) => {
+      const { key, section } = JSON.parse(e.data);
+      const card = document.createElement("article");
+      card.className = "ss-card ss-card-animated";
+      const title = document.createElement("h3");
+      title.className = `ss-meal-title ss-meal-${key}`;
+      title.textContent = section.title || key.replace(/_/g, " ");
+      card.appendChild(title);
+      const list = document.createElement("ul");
+      (section.items || []).forEach((item) => {
+        const li = document.createElement("li");
+        li.textContent = item;
+        list.appendChild(li);
+      });
+      card.appendChild(list);
+      if (grid) grid.appendChild(card);
+    });
+    source.addEventListener("done", (e) => {
+      source.close();
+      const { redirect_url: url } = JSON.parse(e.data);
+      window.location.assign(url || window.location.href);
+    });
+    source.addEventListener("failed", (e) => {
+      source.close();
+      // The detail page flashes the failure and sends the user back to the form.
+      const { redirect_url: url } = JSON.parse(e.data);
+      window.location.assign(url || window.location.href);
+    });
+    source.addEventListener("timeout", () => {
+      source.close();
+      if (status) status.textContent = "Plan generation is taking longer than expected. Please refresh in a moment.";
+    });
+  });
+
   // Smooth scroll for hash links
   document.querySelectorAll('a[href^="#"]').forEach((link) => {
     link.addEventListener("click", (e) => {
@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+import pytest
+
+# Config is read at import time, so point it at a scratch database (and away
+# from any real Gemini key) before the app is imported.
+_TMPDIR = tempfile.mkdtemp(prefix="swasthyasync-tests-")
+os.environ["SWASTHYASYNC_DATABASE_URI"] = f"sqlite:///{_TMPDIR}/test.db"
+os.environ["SWASTHYASYNC_GEMINI_API_KEY"] = ""
+os.environ["SWASTHYASYNC_MEAL_ANALYSIS_ASYNC"] = "0"
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models.user_model import User  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.app_context():
+        db.create_all()
+    # Not held open: requests must push their own context (and flask.g).
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user_id(app):
+    with app.app_context():
+        user = User(email="test@example.com", full_name="Test User")
+        user.set_password("test")
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+    return client
@@ -0,0 +1,78 @@
+import io
+from contextlib import contextmanager
+
+from PIL import Image
+from sqlalchemy import event
+
+from extensions import db
+from models.user_model import User
+from services.nutrition_service import create_nutrition_log
+
+
+@contextmanager
+def count_statements(app):
+    statements = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+def _log_earlier_meal(app, user_id):
+    # Today already has a meal, so the POST never looks at the previous day.
+    with app.app_context():
+        create_nutrition_log(
+            user=db.session.get(User, user_id),
+            meal_label="breakfast",
+            metrics={"calories": 300, "protein": 10, "carbs": 40, "fats": 8},
+            ai_food_summary="Oats",
+            ai_guidance="",
+            image_path=None,
+        )
+
+
+def _photo():
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (200, 120, 40)).save(buffer, format="JPEG")
+    buffer.seek(0)
+    return buffer
+
+
+def test_tracker_get_reads_the_day_once(app, client, user_id):
+    _log_earlier_meal(app, user_id)
+
+    with count_statements(app) as statements:
+        response = client.get("/nutrition/tracker")
+
+    assert response.status_code == 200
+    # The user, the day's logs and the day's rollup row.
+    assert len(statements) == 3, statements
+
+
+def test_tracker_post_reuses_the_day_view(app, client, user_id):
+    _log_earlier_meal(app, user_id)
+
+    with count_statements(app) as statements:
+        response = client.post(
+            "/nutrition/tracker",
+            data={"meal_label": "lunch", "meal_image": (_photo(), "lunch.jpg")},
+            content_type="multipart/form-data",
+        )
+
+    assert response.status_code == 200
+    day_queries = [
+        statement
+        for statement in statements
+        if statement.startswith("SELECT nutrition_logs.id, nutrition_logs.user_id")
+    ]
+    assert len(day_queries) == 1, statements
+    # The user, near-duplicate and meal-cache lookups, the day's logs, the
+    # insert, three rollup bumps and the day's rollup row.
+    assert len(statements) == 9, statements